@@ -1,8 +1,10 @@
+import array
 import backtrader as bt
-import math
-import statistics
 import backtrader.indicators as btind
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from backtesting.indicatorcache import cached_indicator
+from backtesting.rolling import RollingExtreme, RollingMoments, RollingRank
 
 class BaseStrategy(bt.Strategy):
     params = (
@@ -93,8 +95,8 @@ class CrossStrategy(BaseStrategy):
 
     def __init__(self):
         super().__init__()
-        self.ma1 = self.params.ma1_type(self.datas[0] , period = self.params.ma1_period)
-        self.ma2 = self.params.ma2_type(self.datas[0] , period = self.params.ma2_period)
+        self.ma1 = cached_indicator(self.params.ma1_type, self.datas[0], period = self.params.ma1_period)
+        self.ma2 = cached_indicator(self.params.ma2_type, self.datas[0], period = self.params.ma2_period)
 
     def buy_condition(self):
         if self.ma1 > self.ma2:
@@ -119,9 +121,9 @@ class TripleCrossStrategy(BaseStrategy):
 
     def __init__(self):
         super().__init__()
-        self.ma1 = self.params.ma1_type(self.datas[0], period = self.params.ma1_period)
-        self.ma2 = self.params.ma2_type(self.datas[0], period = self.params.ma2_period)
-        self.ma3 = self.params.ma3_type(self.datas[0], period= self.params.ma3_period)
+        self.ma1 = cached_indicator(self.params.ma1_type, self.datas[0], period = self.params.ma1_period)
+        self.ma2 = cached_indicator(self.params.ma2_type, self.datas[0], period = self.params.ma2_period)
+        self.ma3 = cached_indicator(self.params.ma3_type, self.datas[0], period= self.params.ma3_period)
 
     def buy_condition(self):
         if self.ma1 > self.ma2 and self.ma2 > self.ma3:
@@ -334,7 +336,7 @@ class AtrCrossStrategy(CrossStrategy):
     def __init__(self):
         super().__init__()
 
-        self.atr = btind.AverageTrueRange(
+        self.atr = cached_indicator(btind.AverageTrueRange,
             self.datas[0], period=self.params.period)
 
     def buy_condition(self):
@@ -356,7 +358,7 @@ class AboveMA(BaseStrategy):
 
     def __init__(self):
         super().__init__()
-        self.ma1 = self.params.ma1_type(self.datas[0], period = self.params.ma1_period)
+        self.ma1 = cached_indicator(self.params.ma1_type, self.datas[0], period = self.params.ma1_period)
 
     def buy_condition(self):
         if self.dataclose[0] > self.ma1 :
@@ -877,29 +879,66 @@ class Vix_Fix_Indicator(bt.Indicator):
 
     lines = ("wvf", "bbands_top", "bbands_bot", "range_high", "range_low")
 
+    def __init__(self):
+        # windows of the last bars kept up to date bar by bar, O(1) per bar
+        self._close_max = RollingExtreme(self.params.pd)
+        self._wvf_bands = RollingMoments(self.params.bbl)
+        self._wvf_max = RollingExtreme(self.params.lb)
+        self._wvf_min = RollingExtreme(self.params.lb, maximum=False)
+
     def next(self):
-        self.lines.wvf[0] = 0.0
         self.lines.bbands_top[0] = 0.0
         self.lines.bbands_bot[0] = 0.0
 
-        close_list = self.datas[0].close.get(size=self.params.pd).tolist()
-        if (len(close_list) == self.params.pd):
-            max_close_list = max(close_list)
-            self.lines.wvf[0] = ((max_close_list - self.datas[0].low[0]) / max_close_list) * 100
-
-            sdev = self.params.mult * statistics.stdev(self.lines.wvf.get(size=self.params.bbl))
-            datasum = math.fsum(self.lines.wvf.get(size=self.params.bbl))
-            midline = datasum / self.params.bbl
-
+        max_close = self._close_max.push(self.datas[0].close[0])
+        full = len(self._close_max) == self.params.pd
+        wvf = ((max_close - self.datas[0].low[0]) / max_close) * 100 if full else 0.0
+        self.lines.wvf[0] = wvf
+        self._wvf_bands.push(wvf)
+        range_high = self._wvf_max.push(wvf)
+        range_low = self._wvf_min.push(wvf)
+
+        if full:
+            sdev = self.params.mult * self._wvf_bands.stdev()
+            midline = self._wvf_bands.sum() / self.params.bbl
             self.lines.bbands_top[0] = midline + sdev
             self.lines.bbands_bot[0] = midline - sdev
-
-            range = self.lines.wvf.get(size=self.params.lb).tolist()
-            if (len(range) == self.params.lb):
-                self.lines.range_high[0] = max(range) * self.params.ph
-                self.lines.range_low[0] = min(range) * self.params.pl
-
-            #print(self.lines.max[0], self.lines.wvf[0], self.lines.bbands_top[0], self.lines.bbands_bot[0], self.lines.range_high[0], self.lines.range_low[0])
+            if len(self._wvf_max) == self.params.lb:
+                self.lines.range_high[0] = range_high * self.params.ph
+                self.lines.range_low[0] = range_low * self.params.pl
+
+    def once(self, start, end):
+        pd, bbl, lb = self.params.pd, self.params.bbl, self.params.lb
+        close = np.frombuffer(self.datas[0].close.array, dtype=np.float64, count=end)
+        low = np.frombuffer(self.datas[0].low.array, dtype=np.float64, count=end)
+
+        # the series is computed from the first bar, only [start, end) is written
+        wvf = np.zeros(end)
+        if end >= pd:
+            max_close = sliding_window_view(close, pd).max(axis=1)
+            wvf[pd - 1:] = ((max_close - low[pd - 1:]) / max_close) * 100
+        self.lines.wvf.array[start:end] = array.array('d', wvf[start:end].tolist())
+
+        top = self.lines.bbands_top.array
+        bot = self.lines.bbands_bot.array
+        first = max(start, pd - 1)
+        for i in range(start, min(first, end)):
+            top[i] = bot[i] = 0.0
+        bands = RollingMoments(bbl)
+        lo = max(first - bbl + 1, 0)
+        for i, value in enumerate(wvf[lo:end].tolist(), lo):
+            bands.push(value)
+            if i >= first:
+                sdev = self.params.mult * bands.stdev()
+                midline = bands.sum() / bbl
+                top[i] = midline + sdev
+                bot[i] = midline - sdev
+
+        first = max(start, pd - 1, lb - 1)
+        if first < end:
+            windows = sliding_window_view(wvf[first - lb + 1:end], lb)
+            self.lines.range_high.array[first:end] = array.array('d', (windows.max(axis=1) * self.params.ph).tolist())
+            self.lines.range_low.array[first:end] = array.array('d', (windows.min(axis=1) * self.params.pl).tolist())
 
 class Williams_Vix_Fix(BaseStrategy):
 
@@ -913,6 +952,40 @@ class Williams_Vix_Fix(BaseStrategy):
             self.log('BUY CREATE, %.2f' % self.dataclose[0])
             self.order = self.buy()
 
+class PercentRank(bt.Indicator):
+    """Drop-in for btind.PercentRank: fraction of the last period values lower than the current one
+
+    The window is kept sorted, so every bar costs a binary search instead of a
+    pass over period values.
+    """
+
+    lines = ('pctrank',)
+    params = (
+        ('period', 50),
+    )
+
+    def __init__(self):
+        self.addminperiod(self.p.period)
+        self._rank = RollingRank(self.p.period)
+
+    def prenext(self):
+        self._rank.push(self.data[0])
+
+    def next(self):
+        self._rank.push(self.data[0])
+        self.lines.pctrank[0] = self._rank.count_below(self.data[0]) / self.p.period
+
+    def once(self, start, end):
+        src = self.data.array
+        dst = self.lines.pctrank.array
+        rank = RollingRank(self.p.period)
+        for value in src[max(start - self.p.period + 1, 0):start]:
+            rank.push(value)
+        for i in range(start, end):
+            rank.push(src[i])
+            dst[i] = rank.count_below(src[i]) / self.p.period
+
+
 class Laguerre(bt.Indicator):
 
     params = (
@@ -929,6 +1002,10 @@ class Laguerre(bt.Indicator):
     lmas_l0, lmas_l1, lmas_l2, lmas_l3 = 0.0, 0.0, 0.0, 0.0
     lmal_l0, lmal_l1, lmal_l2, lmal_l3 = 0.0, 0.0, 0.0, 0.0
 
+    def __init__(self):
+        self._rankT = RollingRank(self.params.lkbT)
+        self._rankB = RollingRank(self.params.lkbB)
+
     def next(self):
 
         #lmas
@@ -963,13 +1040,13 @@ class Laguerre(bt.Indicator):
         self.lines.ppoT[0] = (lmas - lmal) / lmal * 100
         self.lines.ppoB[0] = (lmal - lmas) / lmal * 100
 
-        ppoT_list = self.lines.ppoT.get(size=self.params.lkbT).tolist()
-        if (len(ppoT_list) == self.params.lkbT):
-            self.lines.pctRankT[0] = sum(self.lines.ppoT[0] >= i for i in ppoT_list) / len(ppoT_list) * 100
+        self._rankT.push(self.lines.ppoT[0])
+        if (len(self._rankT) == self.params.lkbT):
+            self.lines.pctRankT[0] = self._rankT.count_at_most(self.lines.ppoT[0]) / self.params.lkbT * 100
 
-        ppoB_list = self.lines.ppoB.get(size=self.params.lkbB).tolist()
-        if (len(ppoB_list) == self.params.lkbB):
-            self.lines.pctRankB[0] = sum(self.lines.ppoB[0] >= i for i in ppoB_list) / len(ppoB_list) * -100
+        self._rankB.push(self.lines.ppoB[0])
+        if (len(self._rankB) == self.params.lkbB):
+            self.lines.pctRankB[0] = self._rankB.count_at_most(self.lines.ppoB[0]) / self.params.lkbB * -100
 
 class LaguerrePPO(BaseStrategy):
 
@@ -1107,7 +1184,7 @@ class Laguerre_Williams(BaseStrategy):
         self.ma2 = btind.MovingAverageSimple(self.datas[0], period=self.params.ma2)
 
         self.rsi = btind.RelativeStrengthIndex(self.datas[0], period = self.params.rsi_period)
-        self.prank= btind.PercentRank(self.rsi, period = self.params.percent_period) * 100
+        self.prank= PercentRank(self.rsi, period = self.params.percent_period) * 100
 
         self.pendingBuy = False
         self.pendingSell = False
@@ -1147,7 +1224,7 @@ class PercentRsi(BaseStrategy):
     def __init__(self):
         super().__init__()
         self.rsi = btind.RSI(self.datas[0], period = self.params.rsi_period)
-        self.prank= btind.PercentRank(self.rsi, period = self.params.percent_period) * 100
+        self.prank= PercentRank(self.rsi, period = self.params.percent_period) * 100
         self.pendingBuy = False
         self.pendingSell = False
 
@@ -1185,10 +1262,10 @@ class PercentMacdRsi(BaseStrategy):
     def __init__(self):
         super().__init__()
         self.rsi = btind.RelativeStrengthIndex(self.datas[0], period = self.params.rsi_period)
-        self.prank_rsi= btind.PercentRank(self.rsi, period = self.params.percent_period) * 100
+        self.prank_rsi= PercentRank(self.rsi, period = self.params.percent_period) * 100
 
         self.macd = btind.MACD(self.datas[0], period_me1 = self.params.period1, period_me2 = self.params.period2)
-        self.prank_macd = btind.PercentRank(self.macd, period=self.params.percent_period) * 100
+        self.prank_macd = PercentRank(self.macd, period=self.params.percent_period) * 100
 
         self.buy_limit_rsi = self.params.rsi_limit
         self.sell_limit_rsi = 100 - self.buy_limit_rsi
@@ -1239,7 +1316,7 @@ class PercentMA(BaseStrategy):
         self.ma1 = self.params.movav(self.datas[0], period = self.params.period1)
         self.ma2 = self.params.movav(self.datas[0], period = self.params.period2)
         self.diff = self.ma1 - self.ma2
-        self.prank_diff = btind.PercentRank(self.diff, period=self.params.percent_period) * 100
+        self.prank_diff = PercentRank(self.diff, period=self.params.percent_period) * 100
 
         self.buy_limit_macd = self.params.macd_limit
         self.sell_limit_macd = 100 - self.buy_limit_macd
@@ -1321,7 +1398,7 @@ class LimitCrossStrategy(CrossStrategy):
 
     def __init__(self):
         super().__init__()
-        self.atr = btind.AverageTrueRange(self.datas[0])
+        self.atr = cached_indicator(btind.AverageTrueRange, self.datas[0])
         self.sellprice = 0
 
     def buy_condition(self):
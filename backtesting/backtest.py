@@ -1,7 +1,6 @@
-import backtrader as bt
-import backtrader.feeds as btfeeds
 import backtrader.indicators as btind
-from backtesting import strategy
+from backtesting import Strategy as strategy
+from backtesting import optimizer
 
 
 #list of coins
@@ -11,58 +10,19 @@ coins = ['ETHBTC', 'LTCBTC', 'BNBBTC', 'NEOBTC', 'BCCBTC', 'GASBTC', 'HSRBTC', '
          'ETCBTC', 'MTHBTC', 'ENGBTC', 'DNTBTC', 'ZECBTC', 'BNTBTC', 'ASTBTC', 'DASHBTC', 'OAXBTC', 'ICNBTC',
          'BTGBTC', 'XRPBTC', 'EVXBTC', 'REQBTC', 'VIBBTC', 'TRXBTC', 'POWRBTC', 'ARKBTC']
 
-max = 0
+if __name__ == '__main__':
+    grid = optimizer.param_grid(
+        condition=lambda p: p['ma1_period'] < p['ma2_period'],
+        ma1_period=range(5,25,2),
+        ma2_period=range(8,50,3),
+        atr=[x * 0.1 for x in range(0,11,5)],
+        ma1_type=[btind.SmoothedMovingAverage],
+        ma2_type=[btind.MovingAverageSimple]
+    )
 
-for ma1 in range(5,25,2):
-    for ma2 in range(8,50,3):
-        for atr in [x * 0.1 for x in range(0,11,5)]:
-                if(ma1 < ma2):
-                    default_value = 0
-                    strategy_value = 0
-                    for coin in coins:
-                        data = btfeeds.GenericCSVData(
-                            dataname="market_data/" + coin + "/" +"1h?09-01-2017?01-01-2018.txt",
-                            datetime=0,
-                            open=1,
-                            high=2,
-                            low=3,
-                            close=4,
-                            volume=5,
-                            openinterest=-1,
-                            dtformat='%Y-%m-%d %H:%M:%S',
-                            timeframe=bt.TimeFrame.Ticks,
-                            nullvalue=0.0
-                        )
-                        # print(data.params.dataname)
-                        #
-                        # default_cerebro = bt.Cerebro()
-                        # default_cerebro.addstrategy(Strategy.Default)
-                        # default_cerebro.broker.setcash(1000000.0)
-                        # default_cerebro.adddata(data)
-                        # default_cerebro.addsizer(bt.sizers.PercentSizer, percents=99)
-                        # default_cerebro.broker.setcommission(commission=0.002)
-                        # default_cerebro.run()
-                        # default_value += default_cerebro.broker.getvalue()
+    # every (params, coin) run is spread over all the cores, totals come back in grid order
+    results = optimizer.optimize(strategy.AtrCrossStrategy, grid, coins)
 
-                        cerebro = bt.Cerebro()
-                        cerebro.addstrategy(
-                            strategy.AtrCrossStrategy,
-                            ma1_period = ma1,
-                            ma2_period = ma2,
-                            ma1_type = btind.SmoothedMovingAverage,
-                            ma2_type = btind.MovingAverageSimple,
-                            atr = atr
-                        )
-
-                        cerebro.broker.setcash(1000000.0)
-                        cerebro.adddata(data)
-                        cerebro.addsizer(bt.sizers.PercentSizer, percents=99)
-                        cerebro.broker.setcommission(commission=0.001)
-                        value = cerebro.run()
-                        strategy_value += cerebro.broker.getvalue()
-
-                    if strategy_value > max:
-                        max = strategy_value
-                        print(default_value)
-                        print(ma1, ma2, atr, "Simple Moving Average Crossover", strategy_value)
-                        print(ma1, strategy_value)
+    # the highest total, the earliest combination of the grid on ties
+    params, strategy_value = optimizer.best(results)
+    print(params['ma1_period'], params['ma2_period'], params['atr'], "Simple Moving Average Crossover", strategy_value)
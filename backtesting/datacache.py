@@ -0,0 +1,343 @@
+import datetime
+import hashlib
+import itertools
+import json
+import os
+
+import backtrader as bt
+import numpy as np
+
+# column name and fixed width dtype of every binary column file, in the order
+# they appear in the market_data kline files (the trailing "ignore" field is dropped)
+COLUMNS = (
+    ('datetime', '<i8'),            # open time in ms
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('close_time', '<i8'),          # close time in ms
+    ('quote_volume', '<f8'),
+    ('trades', '<i8'),
+    ('taker_base_volume', '<f8'),
+    ('taker_quote_volume', '<f8'),
+)
+
+CACHE_SUFFIX = '.cache'
+META_FILE = 'meta.json'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def cache_path(path):
+    """Directory holding the binary columns of a market_data file
+
+    :param path: path of the source .txt file e.g market_data/ETHBTC/1h?09-01-2017?01-01-2018.txt
+    :type path: str
+
+    """
+    return path + CACHE_SUFFIX
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE), 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp = os.path.join(cache_dir, META_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(cache_dir, META_FILE))
+
+
+def parse_csv(path):
+    """Parse a market_data kline file into one NumPy array per column
+
+    :param path: path of the source .txt file
+    :type path: str
+
+    :returns: dict of column name to array
+
+    """
+    rows = {name: [] for name, _ in COLUMNS}
+    names = [name for name, _ in COLUMNS]
+    with open(path, 'r') as f:
+        next(f)  # header
+        for line in f:
+            fields = line.strip().split(',')
+            if len(fields) < len(names):
+                continue
+            dt = datetime.datetime.strptime(fields[0], DATE_FORMAT)
+            rows['datetime'].append((dt - _EPOCH) // datetime.timedelta(milliseconds=1))
+            for name, value in zip(names[1:], fields[1:len(names)]):
+                rows[name].append(value)
+
+    return {name: np.array(rows[name], dtype=dtype)
+            for name, dtype in COLUMNS}
+
+
+def convert(path, file_hash=None):
+    """Convert a market_data kline file into the binary column cache
+
+    Every column is written to its own raw file and the meta file is replaced
+    last, so a cache interrupted half way is never picked up as valid.
+
+    :param path: path of the source .txt file
+    :type path: str
+    :param file_hash: optional - sha1 of the source file if already known
+    :type file_hash: str
+
+    :returns: the meta dictionary of the new cache
+
+    """
+    stat = os.stat(path)
+    columns = parse_csv(path)
+    cache_dir = cache_path(path)
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    for name, dtype in COLUMNS:
+        tmp = os.path.join(cache_dir, name + '.bin.tmp')
+        columns[name].tofile(tmp)
+        os.replace(tmp, os.path.join(cache_dir, name + '.bin'))
+
+    meta = {
+        'source_mtime': stat.st_mtime,
+        'source_size': stat.st_size,
+        'source_hash': file_hash or _file_hash(path),
+        'rows': len(columns['datetime']),
+        'columns': [[name, dtype] for name, dtype in COLUMNS],
+    }
+    _write_meta(cache_dir, meta)
+    return meta
+
+
+def ensure_cache(path):
+    """Build the cache of a market_data file or rebuild it if the source changed
+
+    The source modification time is checked first. Only when it moved is the
+    file hashed, a touched but unchanged file just gets its mtime refreshed.
+
+    :param path: path of the source .txt file
+    :type path: str
+
+    :returns: the meta dictionary of the up to date cache
+
+    """
+    meta = _read_meta(cache_path(path))
+    if meta is None or meta.get('columns') != [[name, dtype] for name, dtype in COLUMNS]:
+        return convert(path)
+
+    stat = os.stat(path)
+    if meta['source_mtime'] == stat.st_mtime and meta['source_size'] == stat.st_size:
+        return meta
+
+    file_hash = _file_hash(path)
+    if file_hash != meta['source_hash']:
+        return convert(path, file_hash)
+
+    meta['source_mtime'] = stat.st_mtime
+    _write_meta(cache_path(path), meta)
+    return meta
+
+
+def load(path, meta=None):
+    """Memory-map the binary columns of a market_data file
+
+    :param path: path of the source .txt file
+    :type path: str
+    :param meta: optional - meta dictionary returned by ensure_cache, the cache is checked if not passed
+    :type meta: dict
+
+    :returns: dict of column name to read only np.memmap
+
+    """
+    meta = meta or ensure_cache(path)
+    cache_dir = cache_path(path)
+    columns = {}
+    for name, dtype in COLUMNS:
+        if meta['rows']:
+            columns[name] = np.memmap(os.path.join(cache_dir, name + '.bin'), dtype=dtype, mode='r',
+                                      shape=(meta['rows'],))
+        else:
+            columns[name] = np.empty(0, dtype=dtype)
+    return columns
+
+
+def ms_to_num(ms):
+    """Convert an array of epoch milliseconds to backtrader float dates
+
+    Performs the same arithmetic as bt.date2num so the values match the ones
+    produced by the csv feeds.
+
+    """
+    ms = np.asarray(ms, dtype=np.int64)
+    days, rem = np.divmod(ms, 86400000)
+    hours, rem = np.divmod(rem, 3600000)
+    minutes, rem = np.divmod(rem, 60000)
+    seconds, millis = np.divmod(rem, 1000)
+    num = (days + _EPOCH.toordinal()).astype(np.float64)
+    num += hours / 24.0 + minutes / 1440.0 + seconds / 86400.0 + (millis * 1000) / 86400000000.0
+    return num
+
+
+_dataset_keys = itertools.count()
+
+
+class Dataset(object):
+    """Decoded columns of one market_data file shared by every feed built on it
+
+    :param columns: dict of column name to array as returned by load
+    :type columns: dict
+    :param datetime: optional - backtrader float dates of the bars, computed from the columns if not passed
+    :type datetime: np.ndarray
+    :param key: optional - stable identity of the data e.g its path, a unique one is generated if not passed
+    :type key: hashable
+    :param meta: optional - meta dictionary of the cache the columns were loaded from
+    :type meta: dict
+
+    """
+
+    def __init__(self, columns, datetime=None, key=None, meta=None):
+        self.key = key if key is not None else next(_dataset_keys)
+        self.meta = meta
+        self.columns = columns
+        self.datetime = ms_to_num(columns['datetime']) if datetime is None else datetime
+        self.size = len(self.datetime)
+
+    def __len__(self):
+        return self.size
+
+
+_datasets = {}
+
+
+def get_dataset(path):
+    """Return the process wide Dataset of a market_data file, loading it on first use
+
+    Every later call for the same path returns the same object, so a parameter
+    sweep pays for the file once no matter how many Cerebro runs it makes. The
+    source is stat'ed on every call and the dataset reloaded once its content
+    changed, with a new key so no indicator memoized on the old data is reused.
+
+    :param path: path of the source .txt file
+    :type path: str
+
+    """
+    dataset = _datasets.get(path)
+    if dataset is not None and dataset.meta is not None:
+        stat = os.stat(path)
+        if (stat.st_mtime, stat.st_size) != (dataset.meta['source_mtime'], dataset.meta['source_size']):
+            meta = ensure_cache(path)
+            if meta['source_hash'] == dataset.meta['source_hash']:
+                # only touched
+                dataset.meta = meta
+            else:
+                dataset = None
+    if dataset is None:
+        meta = ensure_cache(path)
+        dataset = _datasets[path] = Dataset(load(path, meta), key=(path, meta['source_hash']), meta=meta)
+    return dataset
+
+
+def register_dataset(path, dataset):
+    """Make get_dataset return an already built Dataset for path"""
+    _datasets[path] = dataset
+
+
+def clear_datasets():
+    """Drop every dataset held by the registry"""
+    _datasets.clear()
+
+
+class ArrayData(bt.feed.DataBase):
+    """Backtrader feed replaying the arrays of a Dataset
+
+    The arrays of the dataset are shared by every run and never modified.
+    When cerebro preloads, each run copies the columns into its lines with one
+    bulk copy per line instead of parsing the CSV row by row.
+
+    """
+
+    params = (
+        ('dataset', None),
+    )
+
+    _price_lines = ('open', 'high', 'low', 'close', 'volume')
+
+    def _get_dataset(self):
+        return self.p.dataset
+
+    def start(self):
+        super(ArrayData, self).start()
+        self._dataset = self._get_dataset()
+        self._idx = 0
+
+    def _load(self):
+        i = self._idx
+        if i >= self._dataset.size:
+            return False
+
+        columns = self._dataset.columns
+        self.lines.datetime[0] = self._dataset.datetime[i]
+        self.lines.open[0] = columns['open'][i]
+        self.lines.high[0] = columns['high'][i]
+        self.lines.low[0] = columns['low'][i]
+        self.lines.close[0] = columns['close'][i]
+        self.lines.volume[0] = columns['volume'][i]
+        self.lines.openinterest[0] = 0.0
+        self._idx = i + 1
+        return True
+
+    def preload(self):
+        if self._filters or self._tzinput:
+            # filters and timezone conversions need the bar by bar path
+            return super(ArrayData, self).preload()
+
+        dt = self._dataset.datetime
+        start = np.searchsorted(dt, self.fromdate, side='left')
+        end = np.searchsorted(dt, self.todate, side='right')
+        size = max(end - start, 0)
+
+        values = [('datetime', dt)] + [(name, self._dataset.columns[name]) for name in self._price_lines]
+        for name, column in values:
+            line = getattr(self.lines, name)
+            line.array.frombytes(np.ascontiguousarray(column[start:end], dtype=np.float64).data.cast('B'))
+        self.lines.openinterest.array.frombytes(bytes(8 * size))
+        for line in self.lines:
+            line.idx += size
+            line.lencount += size
+
+        self._idx = end
+        self._last()
+        self.home()
+
+
+class BinaryData(ArrayData):
+    """Backtrader feed reading a market_data file through its binary column cache
+
+    Drop-in replacement for the GenericCSVData set up in backtest.py, the text
+    file is only parsed when its cache is missing or out of date and only
+    loaded once per process thanks to the dataset registry.
+
+    """
+
+    params = (
+        ('dataname', None),
+    )
+
+    def _get_dataset(self):
+        return get_dataset(self.p.dataname)
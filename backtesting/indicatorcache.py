@@ -0,0 +1,164 @@
+import array
+import collections
+
+import backtrader as bt
+
+
+class IndicatorCache(object):
+    """Bounded LRU store of computed indicator series
+
+    :param max_bytes: optional - memory budget of the stored series, least recently used ones are evicted past it
+    :type max_bytes: int
+
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the (values, minperiod) stored for key or None, counting the hit or miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, values, minperiod):
+        """Store the values of a series
+
+        :param values: array('d') of the whole series
+        :type values: array.array
+        :param minperiod: minimum period of the indicator that computed it
+        :type minperiod: int
+
+        """
+        size = values.itemsize * len(values)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[0].itemsize * len(old[0])
+        self._entries[key] = (values, minperiod)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.nbytes -= evicted.itemsize * len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every stored series and reset the counters"""
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return the counters as a dict"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# process wide cache shared by every strategy run
+indicator_cache = IndicatorCache()
+
+
+def _data_key(data):
+    # only feeds replaying a Dataset have an identity that outlives a run
+    dataset = getattr(data, '_dataset', None)
+    if dataset is None:
+        return None
+    return (dataset.key, data.buflen(), data.fromdate, data.todate)
+
+
+class CachedIndicator(bt.Indicator):
+    """Single line indicator served from the indicator cache
+
+    On a miss the wrapped indicator is built and computed as usual and its
+    series is stored once runonce finishes. On a hit the wrapped indicator is
+    not built at all and the stored series is copied in.
+
+    """
+
+    lines = ('cached',)
+
+    params = (
+        ('indicator', None),
+        ('kwargs', None),
+        ('key', None),
+        ('cache', None),
+    )
+
+    def __init__(self):
+        self._entry = self.p.cache.get(self.p.key)
+        if self._entry is None:
+            self._ind = self.p.indicator(self.data, **self.p.kwargs)
+        else:
+            self._ind = None
+            self.addminperiod(self._entry[1])
+
+    def next(self):
+        if self._entry is None:
+            self.lines.cached[0] = self._ind.lines[0][0]
+        else:
+            self.lines.cached[0] = self._entry[0][len(self) - 1]
+
+    def oncestart(self, start, end):
+        self.once(start, end)
+
+    def once(self, start, end):
+        dst = self.lines.cached.array
+        if self._entry is not None:
+            dst[start:end] = self._entry[0][start:end]
+            return
+
+        src = self._ind.lines[0].array
+        dst[start:end] = src[start:end]
+        if end == self.buflen():
+            # last once call of the run, the wrapped series is complete
+            self.p.cache.put(self.p.key, array.array('d', src[:end]), self._ind._minperiod)
+
+
+def cached_indicator(indicator, data, cache=None, **kwargs):
+    """Build a single line indicator, reusing its series if it was computed before
+
+    The series is looked up by (data identity, indicator class, params). Data
+    without a stable identity, unhashable params or multi line indicators get
+    the plain indicator.
+
+    .. code-block:: python
+
+        self.ma1 = cached_indicator(btind.SmoothedMovingAverage, self.datas[0], period=14)
+
+    :param indicator: indicator class e.g btind.MovingAverageSimple
+    :type indicator: bt.Indicator
+    :param data: feed the indicator is computed on
+    :type data: bt.feed.DataBase
+    :param cache: optional - IndicatorCache to use, default the process wide indicator_cache
+    :type cache: IndicatorCache
+
+    """
+    cache = cache if cache is not None else indicator_cache
+    data_key = _data_key(data)
+    if data_key is None or len(indicator.lines._getlines()) != 1:
+        return indicator(data, **kwargs)
+    key = (data_key, indicator, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return indicator(data, **kwargs)
+    return CachedIndicator(data, indicator=indicator, kwargs=kwargs, key=key, cache=cache)
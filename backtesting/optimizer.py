@@ -0,0 +1,135 @@
+import itertools
+import math
+import multiprocessing
+
+import backtrader as bt
+
+from backtesting.datacache import BinaryData, ensure_cache
+from backtesting.shareddata import SharedDataStore, attach
+
+DATA_PATH = "market_data/{coin}/{interval}?{start}?{end}.txt"
+SYNC_DATA_PATH = "market_data/{coin}/{interval}.txt"
+
+
+def data_path(coin, interval='1h', start='09-01-2017', end='01-01-2018'):
+    """Path of a market_data file in the layout written by market_data/datagenerator"""
+    return DATA_PATH.format(coin=coin, interval=interval, start=start, end=end)
+
+
+def sync_data_path(coin, interval='1h'):
+    """Path of a market_data file kept current by binance.downloader.sync_klines, e.g optimize(path=sync_data_path)"""
+    return SYNC_DATA_PATH.format(coin=coin, interval=interval)
+
+
+def param_grid(condition=None, **values):
+    """Expand lists of parameter values into every combination
+
+    Combinations are produced in the same order as nested for loops over the
+    keyword arguments, e.g param_grid(ma1=[5, 7], ma2=[8, 11]) gives
+    {ma1: 5, ma2: 8}, {ma1: 5, ma2: 11}, {ma1: 7, ma2: 8}, {ma1: 7, ma2: 11}
+
+    :param condition: optional - function receiving a combination, those it returns False for are skipped
+    :type condition: function
+
+    :returns: list of dicts
+
+    """
+    names = list(values.keys())
+    grid = []
+    for combo in itertools.product(*[values[name] for name in names]):
+        params = dict(zip(names, combo))
+        if condition is None or condition(params):
+            grid.append(params)
+    return grid
+
+
+def run_backtest(strategy, params, dataname, cash=1000000.0, percents=99, commission=0.001):
+    """Run one strategy on one market_data file with the backtest.py broker setup
+
+    :returns: final broker value
+
+    """
+    cerebro = bt.Cerebro()
+    cerebro.addstrategy(strategy, **params)
+    cerebro.broker.setcash(cash)
+    cerebro.adddata(BinaryData(dataname=dataname, timeframe=bt.TimeFrame.Ticks))
+    cerebro.addsizer(bt.sizers.PercentSizer, percents=percents)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.run()
+    return cerebro.broker.getvalue()
+
+
+def _run_job(job):
+    combo_idx, coin_idx, strategy, params, dataname, broker = job
+    return combo_idx, coin_idx, run_backtest(strategy, params, dataname, **broker)
+
+
+def optimize(strategy, grid, coins, processes=None, chunksize=None, callback=None, path=data_path, **broker):
+    """Run every (parameter combination, coin) pair over a process pool
+
+    The per coin values of a combination are summed in coin order once all of
+    them arrived, so the totals are bit for bit the ones of a serial loop.
+
+    :param strategy: Strategy class e.g Strategy.AtrCrossStrategy
+    :type strategy: bt.Strategy
+    :param grid: list of parameter dicts, see param_grid
+    :type grid: list
+    :param coins: list of symbols e.g ['ETHBTC', 'LTCBTC']
+    :type coins: list
+    :param processes: optional - number of worker processes, default cpu count. 1 runs in process
+    :type processes: int
+    :param chunksize: optional - number of jobs handed to a worker at once
+    :type chunksize: int
+    :param callback: optional - function called with (params, coin, value) as every job finishes
+    :type callback: function
+    :param path: optional - function mapping a coin to its market_data file
+    :type path: function
+    :param broker: optional - cash, percents and commission passed to run_backtest
+
+    :returns: list of (params, total value) in grid order
+
+    """
+    datanames = [path(coin) for coin in coins]
+    # build the binary caches up front so workers never race converting the same file
+    for dataname in datanames:
+        ensure_cache(dataname)
+
+    jobs = [(combo_idx, coin_idx, strategy, params, datanames[coin_idx], broker)
+            for combo_idx, params in enumerate(grid)
+            for coin_idx in range(len(coins))]
+    values = [[None] * len(coins) for _ in grid]
+
+    processes = processes or multiprocessing.cpu_count()
+    pool = store = None
+    if processes == 1:
+        results = map(_run_job, jobs)
+    else:
+        if not chunksize:
+            chunksize = max(1, int(math.ceil(len(jobs) / float(processes * 4))))
+        # decode the data once here, the workers attach to it instead of loading their own copy
+        store = SharedDataStore(datanames)
+        pool = multiprocessing.Pool(processes, initializer=attach, initargs=(store.manifest,))
+        results = pool.imap_unordered(_run_job, jobs, chunksize)
+
+    try:
+        for combo_idx, coin_idx, value in results:
+            values[combo_idx][coin_idx] = value
+            if callback:
+                callback(grid[combo_idx], coins[coin_idx], value)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if store is not None:
+            store.close()
+
+    return [(params, sum(coin_values)) for params, coin_values in zip(grid, values)]
+
+
+def best(results):
+    """Return the (params, total value) with the highest value, the earliest one on ties"""
+    top = None
+    for params, value in results:
+        if top is None or value > top[1]:
+            top = (params, value)
+    return top
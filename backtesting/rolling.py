@@ -0,0 +1,169 @@
+import bisect
+import collections
+import math
+import statistics
+import sys
+
+# bits kept of a square root before its rounding to a float, two more than twice the float precision
+_SQRT_BITS = 2 * sys.float_info.mant_dig + 3
+
+
+def _isqrt_rto(numerator, denominator):
+    # integer square root of numerator / denominator, rounded to odd: an inexact result gets its last bit set
+    root = math.isqrt(numerator // denominator)
+    return root | (root * root * denominator != numerator)
+
+
+def _sqrt_of_frac(numerator, denominator):
+    """Correctly rounded square root of a fraction of non negative integers
+
+    The root is computed exactly on _SQRT_BITS bits, rounded to odd, so the
+    single rounding to a float is the correct one. This is what
+    statistics.stdev returns since Python 3.11.
+
+    """
+    shift = (numerator.bit_length() - denominator.bit_length() - _SQRT_BITS) // 2
+    if shift >= 0:
+        return float(_isqrt_rto(numerator, denominator << 2 * shift) << shift)
+    return _isqrt_rto(numerator << -2 * shift, denominator) / (1 << -shift)
+
+
+class RollingExtreme(object):
+    """Maximum or minimum of the last period values in O(1) amortized per value
+
+    Keeps a monotonic deque of the values that can still become the extreme.
+    Before period values were pushed the extreme of all of them is returned.
+
+    :param period: window length
+    :type period: int
+    :param maximum: optional - False for the minimum
+    :type maximum: bool
+
+    """
+
+    def __init__(self, period, maximum=True):
+        self.period = period
+        self.maximum = maximum
+        self._window = collections.deque()
+        self._count = 0
+
+    def push(self, value):
+        """Add a value and return the extreme of the window"""
+        window = self._window
+        if self.maximum:
+            while window and window[-1][1] <= value:
+                window.pop()
+        else:
+            while window and window[-1][1] >= value:
+                window.pop()
+        window.append((self._count, value))
+        self._count += 1
+        if window[0][0] <= self._count - 1 - self.period:
+            window.popleft()
+        return window[0][1]
+
+    def __len__(self):
+        return min(self._count, self.period)
+
+
+class RollingMoments(object):
+    """Exact running sum and sample standard deviation of the last period values
+
+    Every float is an integer multiple of a power of two, so the sums of the
+    values and of their squares are kept as exact integers scaled by the finest
+    power seen so far. sum and stdev then return the correctly rounded sum and
+    sample standard deviation of the window, exactly what math.fsum and
+    statistics.stdev (Python 3.11 and later) do, in O(1) per value.
+
+    :param period: window length
+    :type period: int
+
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self._window = collections.deque()
+        self._bits = 0
+        self._sum = 0
+        self._sum_sq = 0
+
+    def _rescale(self, bits):
+        shift = bits - self._bits
+        self._window = collections.deque(value << shift for value in self._window)
+        self._sum <<= shift
+        self._sum_sq <<= 2 * shift
+        self._bits = bits
+
+    def push(self, value):
+        """Add a value, dropping the oldest one once the window is full"""
+        numerator, denominator = value.as_integer_ratio()
+        bits = denominator.bit_length() - 1
+        if bits > self._bits:
+            self._rescale(bits)
+        scaled = numerator << (self._bits - bits)
+        self._window.append(scaled)
+        self._sum += scaled
+        self._sum_sq += scaled * scaled
+        if len(self._window) > self.period:
+            old = self._window.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+    def sum(self):
+        """Correctly rounded sum of the window, same as math.fsum"""
+        return self._sum / (1 << self._bits)
+
+    def stdev(self):
+        """Sample standard deviation of the window, same as statistics.stdev"""
+        n = len(self._window)
+        if n < 2:
+            raise statistics.StatisticsError('stdev requires at least two data points')
+        numerator = n * self._sum_sq - self._sum * self._sum
+        return _sqrt_of_frac(numerator, (n * (n - 1)) << (2 * self._bits))
+
+    def __len__(self):
+        return len(self._window)
+
+
+class RollingRank(object):
+    """Sorted window of the last period values answering rank queries in O(log n)
+
+    Values are inserted into and removed from a sorted list with bisect, so
+    counting the values below a given one is a binary search instead of a scan
+    of the window. NaN values take a place in the window but, as with the
+    comparison operators, are never counted.
+
+    :param period: window length
+    :type period: int
+
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self._window = collections.deque()
+        self._sorted = []
+
+    def push(self, value):
+        """Add a value, dropping the oldest one once the window is full"""
+        self._window.append(value)
+        if value == value:
+            bisect.insort(self._sorted, value)
+        if len(self._window) > self.period:
+            old = self._window.popleft()
+            if old == old:
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+
+    def count_below(self, value):
+        """Number of values of the window strictly lower than value"""
+        if value != value:
+            return 0
+        return bisect.bisect_left(self._sorted, value)
+
+    def count_at_most(self, value):
+        """Number of values of the window lower than or equal to value"""
+        if value != value:
+            return 0
+        return bisect.bisect_right(self._sorted, value)
+
+    def __len__(self):
+        return len(self._window)
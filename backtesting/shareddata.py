@@ -0,0 +1,101 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtesting.datacache import COLUMNS, Dataset, get_dataset, register_dataset
+
+_ALIGN = 64
+
+# shared memory blocks attached by this process, kept referenced so the views stay valid
+_attached = {}
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SharedDataStore(object):
+    """Publish the decoded columns of many market_data files in one shared memory block
+
+    The owner process decodes every file once and copies its columns into the
+    block. Worker processes only receive the small manifest and attach to the
+    block with attach, which maps views and never copies or parses anything.
+
+    .. code-block:: python
+
+        with SharedDataStore(paths) as store:
+            pool = multiprocessing.Pool(initializer=attach, initargs=(store.manifest,))
+
+    :param paths: list of market_data .txt files
+    :type paths: list
+
+    """
+
+    def __init__(self, paths):
+        arrays = []
+        datasets = {}
+        offset = 0
+        for path in paths:
+            dataset = get_dataset(path)
+            layout = {}
+            for name, column in [('_num', dataset.datetime)] + [(name, dataset.columns[name]) for name, _ in COLUMNS]:
+                column = np.ascontiguousarray(column)
+                layout[name] = [offset, column.dtype.str]
+                arrays.append((offset, column))
+                offset = _aligned(offset + column.nbytes)
+            datasets[path] = {'rows': dataset.size, 'columns': layout}
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for start, column in arrays:
+            np.ndarray(column.shape, dtype=column.dtype, buffer=self._shm.buf, offset=start)[:] = column
+
+        self.manifest = {
+            'name': self._shm.name,
+            'datasets': datasets,
+        }
+
+    def close(self):
+        """Release and destroy the shared memory block
+
+        Workers must be done with it, their views become invalid.
+        """
+        if self._shm is None:
+            return
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def attach(manifest):
+    """Attach to a SharedDataStore and register its datasets in this process
+
+    Suitable as a multiprocessing.Pool initializer. Afterwards BinaryData and
+    get_dataset serve the registered paths straight from shared memory.
+
+    :param manifest: SharedDataStore.manifest
+    :type manifest: dict
+
+    :returns: dict of path to Dataset
+
+    """
+    shm = _attached.get(manifest['name'])
+    if shm is None:
+        shm = _attached[manifest['name']] = shared_memory.SharedMemory(name=manifest['name'])
+
+    datasets = {}
+    for path, info in manifest['datasets'].items():
+        views = {}
+        for name, (offset, dtype) in info['columns'].items():
+            view = np.ndarray((info['rows'],), dtype=dtype, buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            views[name] = view
+        num = views.pop('_num')
+        datasets[path] = Dataset(views, datetime=num, key=path)
+        register_dataset(path, datasets[path])
+    return datasets
@@ -0,0 +1,450 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import backtrader.indicators as btind
+
+from backtesting import Strategy
+from backtesting.datacache import get_dataset
+from backtesting.optimizer import data_path, run_backtest
+
+
+def _window_sum(x, period):
+    # summing in extended precision and rounding once gives the correctly rounded
+    # result math.fsum returns, which is what the backtrader indicators use
+    return sliding_window_view(np.asarray(x, dtype=np.longdouble), period).sum(axis=1).astype(np.float64)
+
+
+def sma(x, period):
+    """Simple moving average matching btind.MovingAverageSimple"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        out[period - 1:] = _window_sum(x, period) / period
+    return out
+
+
+def wma(x, period):
+    """Weighted moving average matching btind.WeightedMovingAverage"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        coef = 2.0 / (period * (period + 1.0))
+        weights = np.arange(1, period + 1, dtype=np.longdouble)
+        windows = sliding_window_view(np.asarray(x, dtype=np.longdouble), period)
+        out[period - 1:] = coef * (windows * weights).sum(axis=1).astype(np.float64)
+    return out
+
+
+def smoothing(x, period, alpha, start=0):
+    """Exponential smoothing seeded with the average of the first period values
+
+    Matches btind.ExponentialSmoothing, which EMA and SMMA are built on.
+
+    :param start: optional - index of the first valid value of x
+    :type start: int
+
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    first = start + period - 1
+    if n <= first:
+        return out
+
+    out[first] = prev = float(_window_sum(x[start:first + 1], period)[0] / period)
+    alpha1 = 1.0 - alpha
+    values = []
+    for value in x[first + 1:].tolist():
+        prev = prev * alpha1 + value * alpha
+        values.append(prev)
+    out[first + 1:] = values
+    return out
+
+
+def ema(x, period):
+    """Exponential moving average matching btind.ExponentialMovingAverage"""
+    return smoothing(x, period, 2.0 / (1.0 + period))
+
+
+def smma(x, period):
+    """Smoothed moving average matching btind.SmoothedMovingAverage"""
+    return smoothing(x, period, 1.0 / period)
+
+
+def atr(high, low, close, period=14):
+    """Average true range matching btind.AverageTrueRange"""
+    prev_close = np.empty(len(close))
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    tr = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    return smoothing(tr, period, 1.0 / period, start=1)
+
+
+# moving average indicator classes with a vectorized counterpart
+MOVING_AVERAGES = {
+    btind.MovingAverageSimple: sma,
+    btind.ExponentialMovingAverage: ema,
+    btind.SmoothedMovingAverage: smma,
+    btind.WeightedMovingAverage: wma,
+}
+
+
+def _ma_function(ma_type):
+    # backtrader aliases such as btind.EMA or btind.SMA are direct subclasses of the
+    # indicator, unlike the Envelope and Oscillator variants which change the output
+    for base, function in MOVING_AVERAGES.items():
+        if ma_type is base:
+            return function
+        if getattr(ma_type, '__bases__', None) == (base,) and ma_type.__name__ in base.alias:
+            return function
+    return None
+
+
+def _moving_average(ma_type, x, period):
+    function = _ma_function(ma_type)
+    if function is None:
+        raise ValueError('No vectorized implementation of %s' % ma_type.__name__)
+    return function(x, period)
+
+
+class _Series(object):
+    # price arrays of one data and the indicator series computed on them, each
+    # distinct series is computed once however many parameter sets ask for it
+
+    def __init__(self, columns):
+        self.o, self.h, self.l, self.c = [np.asarray(columns[name], dtype=np.float64)
+                                          for name in ('open', 'high', 'low', 'close')]
+        self._memo = {}
+
+    def ma(self, ma_type, period):
+        key = ('ma', _ma_function(ma_type), period)
+        if key not in self._memo:
+            self._memo[key] = _moving_average(ma_type, self.c, period)
+        return self._memo[key]
+
+    def atr(self, period=14):
+        key = ('atr', period)
+        if key not in self._memo:
+            self._memo[key] = atr(self.h, self.l, self.c, period)
+        return self._memo[key]
+
+
+def _cross_signals(p, d):
+    ma1 = d.ma(p['ma1_type'], p['ma1_period'])
+    ma2 = d.ma(p['ma2_type'], p['ma2_period'])
+    first = max(p['ma1_period'], p['ma2_period']) - 1
+    return ma1 > ma2, ma1 < ma2, None, first
+
+
+def _atr_cross_signals(p, d):
+    ma1 = d.ma(p['ma1_type'], p['ma1_period'])
+    ma2 = d.ma(p['ma2_type'], p['ma2_period'])
+    band = p['atr'] * d.atr(p['period'])
+    first = max(p['ma1_period'], p['ma2_period'], p['period'] + 1) - 1
+    return ma1 > (ma2 + band), ma1 < (ma2 - band), None, first
+
+
+def _above_ma_signals(p, d):
+    ma1 = d.ma(p['ma1_type'], p['ma1_period'])
+    first = p['ma1_period'] - 1
+    return d.c > ma1, d.c < ma1, None, first
+
+
+def _limit_cross_signals(p, d):
+    ma1 = d.ma(p['ma1_type'], p['ma1_period'])
+    ma2 = d.ma(p['ma2_type'], p['ma2_period'])
+    # the stop is fixed when the buy is created, close - atr_mult * atr of that bar
+    stop = d.c - (p['atr_mult'] * d.atr())
+    first = max(p['ma1_period'], p['ma2_period'], 15) - 1
+    return ma1 > ma2, ma1 < ma2, stop, first
+
+
+# strategies with a vectorized fast path, subclasses are not covered as they may change the logic
+SIGNALS = {
+    Strategy.CrossStrategy: _cross_signals,
+    Strategy.AtrCrossStrategy: _atr_cross_signals,
+    Strategy.AboveMA: _above_ma_signals,
+    Strategy.LimitCrossStrategy: _limit_cross_signals,
+}
+
+
+def is_supported(strategy, params=None):
+    """Whether run_vectorized can evaluate a strategy with the given parameters"""
+    if strategy not in SIGNALS:
+        return False
+    p = dict(strategy.params._getitems())
+    p.update(params or {})
+    return all(_ma_function(p[key]) is not None for key in ('ma1_type', 'ma2_type') if key in p)
+
+
+def _next_true(mask):
+    # index of the first True at or after every position, len(mask) when there is none
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1].tolist()
+
+
+def _next_true_columns(mask):
+    # _next_true of every column of a (bars x candidates) matrix
+    n = len(mask)
+    idx = np.where(mask, np.arange(n, dtype=np.int32)[:, None], np.int32(n))
+    return np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+
+
+def _next_lower(x):
+    # index of the next value strictly below every value, len(x) when there is none
+    values = x.tolist()
+    nxt = np.full(len(values), len(values), dtype=np.int64)
+    stack = []
+    for t, value in enumerate(values):
+        while stack and values[stack[-1]] > value:
+            nxt[stack.pop()] = t
+        stack.append(t)
+    return nxt
+
+
+class VectorResult(object):
+    """Outcome of run_vectorized
+
+    :ivar value: final broker value
+    :ivar cash: final cash
+    :ivar size: size of the position held at the end
+    :ivar equity: broker value at the close of every bar
+    :ivar trades: list of (entry bar, exit bar or None, size, entry price, exit price or None)
+
+    """
+
+    def __init__(self, value, cash, size, equity, trades):
+        self.value = value
+        self.cash = cash
+        self.size = size
+        self.equity = equity
+        self.trades = trades
+
+
+def run_vectorized(strategy, columns, params=None, cash=1000000.0, percents=99, commission=0.001):
+    """Evaluate a long-only crossover strategy on whole arrays instead of through Cerebro
+
+    Models the backtest.py broker: market orders created on a bar fill at the
+    next bar open, buys are sized with PercentSizer on the creating bar close,
+    a percentage commission is paid on both legs and a buy that the cash
+    cannot cover at the fill price is rejected like a margin call.
+
+    :param strategy: one of CrossStrategy, AtrCrossStrategy, AboveMA, LimitCrossStrategy
+    :type strategy: bt.Strategy
+    :param columns: dict with open, high, low, close arrays e.g Dataset.columns
+    :type columns: dict
+    :param params: optional - strategy parameters overriding its defaults
+    :type params: dict
+
+    :returns: VectorResult
+
+    """
+    if strategy not in SIGNALS:
+        raise ValueError('No vectorized implementation of %s' % strategy.__name__)
+    p = dict(strategy.params._getitems())
+    p.update(params or {})
+
+    d = columns if isinstance(columns, _Series) else _Series(columns)
+    c = d.c
+    buy, sell, stop, first = SIGNALS[strategy](p, d)
+
+    n = len(c)
+    opens = d.o.tolist()
+    closes = c.tolist()
+    next_buy = _next_true(buy)
+    next_sell = _next_true(sell)
+    pct = percents / 100
+
+    initial_cash = cash
+    size = 0.0
+    trades = []
+    fills = []
+    i = first
+    # an order created on the last bar never fills
+    while i < n - 1:
+        if not size:
+            j = next_buy[i]
+            if j >= n - 1:
+                break
+            s = cash / closes[j] * pct
+            price = opens[j + 1]
+            left = cash - abs(s) * price
+            left -= abs(s) * commission * price
+            if left >= 0.0:
+                cash = left
+                size = s
+                entry, entry_price = j + 1, price
+                fills.append((j + 1, cash, size))
+                if stop is not None:
+                    stop_price = stop[j]
+                    next_stop = _next_true(c < stop_price)
+            # a rejected buy leaves the strategy flat to try again on the fill bar
+            i = j + 1
+        else:
+            j = next_sell[i]
+            if stop is not None:
+                j = min(j, next_stop[i])
+            if j >= n - 1:
+                break
+            price = opens[j + 1]
+            cash += abs(size) * entry_price + size * (price - entry_price) * 1.0
+            cash -= abs(size) * commission * price
+            trades.append((entry, j + 1, size, entry_price, price))
+            fills.append((j + 1, cash, 0.0))
+            size = 0.0
+            i = j + 1
+
+    if size:
+        trades.append((entry, None, size, entry_price, None))
+
+    # cash and position are constant between fills, so the equity path is piecewise
+    cash_path = np.empty(n)
+    size_path = np.empty(n)
+    bars = [0] + [bar for bar, _, _ in fills] + [n]
+    states = [(initial_cash, 0.0)] + [(fill_cash, fill_size) for _, fill_cash, fill_size in fills]
+    for lo, hi, (state_cash, state_size) in zip(bars[:-1], bars[1:], states):
+        cash_path[lo:hi] = state_cash
+        size_path[lo:hi] = state_size
+    equity = cash_path + size_path * c
+
+    value = cash + size * closes[-1] if n else cash
+    return VectorResult(value, cash, size, equity, trades)
+
+
+def run_batch(strategy, columns, grid, cash=1000000.0, percents=99, commission=0.001):
+    """Evaluate many parameter sets of one strategy together, trade by trade
+
+    Every distinct indicator series is computed once and shared. The signals
+    of the candidates are stacked as the columns of (bars x candidates)
+    matrices, turned into the index of the next signal from every bar. The
+    broker of run_vectorized then moves every candidate to its next fill at
+    once, so the loop runs once per trade of the busiest candidate instead of
+    once per bar, and the values are exactly the ones of run_vectorized.
+
+    .. code-block:: python
+
+        grid = optimizer.param_grid(ma1_period=range(5, 25, 2), ma2_period=range(8, 50, 3))
+        values = run_batch(Strategy.CrossStrategy, get_dataset(path).columns, grid)
+
+    :param strategy: one of CrossStrategy, AtrCrossStrategy, AboveMA, LimitCrossStrategy
+    :type strategy: bt.Strategy
+    :param columns: dict with open, high, low, close arrays e.g Dataset.columns
+    :type columns: dict
+    :param grid: list of parameter dicts overriding the strategy defaults, see optimizer.param_grid
+    :type grid: list
+
+    :returns: np.ndarray of the final broker values in grid order
+
+    """
+    if strategy not in SIGNALS:
+        raise ValueError('No vectorized implementation of %s' % strategy.__name__)
+    defaults = dict(strategy.params._getitems())
+
+    d = columns if isinstance(columns, _Series) else _Series(columns)
+    n, k = len(d.c), len(grid)
+    buy = np.zeros((n, k), dtype=bool)
+    sell = np.zeros((n, k), dtype=bool)
+    stop = np.full((n, k), -np.inf)
+    first = np.empty(k, dtype=np.int64)
+    for col, params in enumerate(grid):
+        p = dict(defaults)
+        p.update(params)
+        buy[:, col], sell[:, col], col_stop, first[col] = SIGNALS[strategy](p, d)
+        if col_stop is not None:
+            stop[:, col] = col_stop
+
+    pct = percents / 100
+    cash = np.full(k, float(cash))
+    size = np.zeros(k)
+    entry_price = np.zeros(k)
+    stop_price = np.full(k, -np.inf)
+    next_buy = _next_true_columns(buy)
+    next_sell = _next_true_columns(sell)
+    has_stop = bool(np.isfinite(stop).any())
+    if has_stop:
+        next_lower = _next_lower(d.c)
+
+    # bar every candidate looks for its next signal from, an order created on the last bar never fills
+    i = first.copy()
+    done = i >= n - 1
+    while not done.all():
+        cols = np.flatnonzero(~done)
+        flat = size[cols] == 0.0
+
+        # flat candidates buy at the open after their next buy signal
+        b = cols[flat]
+        j = next_buy[i[b], b]
+        done[b[j >= n - 1]] = True
+        b, j = b[j < n - 1], j[j < n - 1]
+        s = cash[b] / d.c[j] * pct
+        price = d.o[j + 1]
+        left = cash[b] - np.abs(s) * price
+        left -= np.abs(s) * commission * price
+        # a rejected buy leaves the candidate flat to try again on the fill bar
+        ok = left >= 0.0
+        filled = b[ok]
+        cash[filled] = left[ok]
+        size[filled] = s[ok]
+        entry_price[filled] = price[ok]
+        stop_price[filled] = stop[j[ok], filled]
+        i[b] = j + 1
+
+        # the others sell at the open after their next sell signal or close below the stop
+        q = cols[~flat]
+        j = next_sell[i[q], q].astype(np.int64)
+        if has_stop:
+            # walk down the closes lower than every one before them until one is below the stop
+            t = i[q].astype(np.int64)
+            walk = (t < j) & ~(d.c[np.minimum(t, n - 1)] < stop_price[q])
+            while walk.any():
+                t[walk] = next_lower[t[walk]]
+                walk &= (t < j) & ~(d.c[np.minimum(t, n - 1)] < stop_price[q])
+            j = np.minimum(j, t)
+        done[q[j >= n - 1]] = True
+        q, j = q[j < n - 1], j[j < n - 1]
+        price = d.o[j + 1]
+        s = size[q]
+        entry = entry_price[q]
+        paid = cash[q] + (np.abs(s) * entry + s * (price - entry) * 1.0)
+        cash[q] = paid - np.abs(s) * commission * price
+        size[q] = 0.0
+        i[q] = j + 1
+
+    return cash + size * d.c[-1] if n else cash
+
+
+def run_vectorized_backtest(strategy, params, dataname, **broker):
+    """run_vectorized on a market_data file, same signature as optimizer.run_backtest
+
+    :returns: final broker value
+
+    """
+    return run_vectorized(strategy, get_dataset(dataname).columns, params, **broker).value
+
+
+def conformance(strategy, params, dataname, **broker):
+    """Run a strategy through both Cerebro and run_vectorized on the same file
+
+    :returns: tuple of (backtrader value, vectorized value, relative difference)
+
+    """
+    expected = run_backtest(strategy, params, dataname, **broker)
+    value = run_vectorized_backtest(strategy, params, dataname, **broker)
+    return expected, value, abs(value - expected) / abs(expected)
+
+
+def run_batch_backtest(strategy, grid, dataname, **broker):
+    """run_batch on a market_data file
+
+    :returns: list of the final broker values in grid order
+
+    """
+    return run_batch(strategy, get_dataset(dataname).columns, grid, **broker).tolist()
+
+
+def optimize_batch(strategy, grid, coins, path=data_path, **broker):
+    """Batched counterpart of optimizer.optimize, one run_batch per coin
+
+    :returns: list of (params, total value) in grid order
+
+    """
+    values = [run_batch_backtest(strategy, grid, path(coin), **broker) for coin in coins]
+    return [(params, sum(coin_values)) for params, coin_values in zip(grid, zip(*values))]
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import asyncio
+import json
+
+import aiohttp
+
+from .client import Client
+from .exceptions import BinanceAPIException, BinanceRequestException, BinanceWithdrawException
+from .exchangeinfo import ExchangeInfoCache
+from .helpers import date_to_milliseconds, interval_to_milliseconds
+from .klines import KlineBuffer, KlineFile
+from .ratelimit import weight_limiter
+
+
+class AsyncClient(Client):
+
+    def __init__(self, api_key, api_secret, requests_params=None, limiter=None, retries=2,
+                 exchange_info_ttl=60 * 60, stale_while_revalidate=False, connections=100):
+        """Binance API Client for asyncio
+
+        Has the methods of Client, which return coroutines to await instead of
+        results. Calls share one pooled aiohttp session, so hundreds of them can
+        be in flight from one event loop, and are signed, ordered and throttled
+        exactly like Client does.
+
+        .. code-block:: python
+
+            client = await AsyncClient.create(api_key, api_secret)
+            books = await asyncio.gather(*[client.get_order_book(symbol=s) for s in symbols])
+            await client.close()
+
+        :param api_key: Api Key
+        :type api_key: str.
+        :param api_secret: Api Secret
+        :type api_secret: str.
+        :param requests_params: optional - Dictionary of aiohttp request params to use for all calls
+        :type requests_params: dict.
+        :param limiter: optional - TokenBucket of request weight throttling the calls, default the process wide
+            binance.ratelimit.weight_limiter. False disables throttling
+        :type limiter: TokenBucket
+        :param retries: optional - number of times an unsigned call answered with 429 is retried after Retry-After
+        :type retries: int
+        :param exchange_info_ttl: optional - seconds get_symbol_info and get_symbol_filters reuse exchangeInfo for
+        :type exchange_info_ttl: int
+        :param stale_while_revalidate: optional - answer from the expired exchangeInfo while it is refetched
+        :type stale_while_revalidate: bool
+        :param connections: optional - maximum number of simultaneous connections
+        :type connections: int
+
+        """
+
+        self.API_KEY = api_key
+        self.API_SECRET = api_secret
+        self._requests_params = requests_params
+        self.limiter = weight_limiter if limiter is None else limiter
+        self._retries = retries
+        self.exchange_info = ExchangeInfoCache(exchange_info_ttl, stale_while_revalidate)
+        self._connections = connections
+        # the aiohttp session has to be created inside the running event loop
+        self.session = None
+
+    @classmethod
+    async def create(cls, api_key, api_secret, **kwargs):
+        """Create a client and ping the server, the asyncio counterpart of Client()"""
+        self = cls(api_key, api_secret, **kwargs)
+        await self.ping()
+        return self
+
+    def _init_session(self):
+        connector = aiohttp.TCPConnector(limit=self._connections)
+        return aiohttp.ClientSession(connector=connector,
+                                     headers={'Accept': 'application/json',
+                                              'User-Agent': 'binance/python',
+                                              'X-MBX-APIKEY': self.API_KEY})
+
+    async def _request(self, method, uri, signed, force_params=False, weight=1, **kwargs):
+        kwargs = self._prepare_request(method, signed, force_params, kwargs)
+        # requests leaves out params set to None, aiohttp refuses them
+        for key in ('params', 'data'):
+            if isinstance(kwargs.get(key), list):
+                kwargs[key] = [(name, value) for name, value in kwargs[key] if value is not None]
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=kwargs['timeout'])
+        if self.session is None:
+            self.session = self._init_session()
+
+        attempt = 0
+        while True:
+            if self.limiter and weight:
+                await self.limiter.acquire_async(weight)
+            async with self.session.request(method, uri, **kwargs) as response:
+                text = await response.text()
+
+            if self._should_retry(response.status, response.headers, signed, attempt):
+                attempt += 1
+                continue
+            return self._handle_text(response, text)
+
+    def _handle_text(self, response, text):
+        if not str(response.status).startswith('2'):
+            raise BinanceAPIException(response, response.status, text)
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise BinanceRequestException('Invalid Response: %s' % text)
+
+    async def close(self):
+        """Close the session and its connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    # Methods of Client that process the response before returning it, the
+    # others return the coroutine of the request as is
+
+    async def _ensure_exchange_info(self):
+        cache = self.exchange_info
+        if not cache.expired:
+            return
+        if cache.loaded and cache.stale_while_revalidate:
+            if cache.start_refresh():
+                asyncio.ensure_future(self._background_refresh())
+            return
+        await self.refresh_exchange_info()
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh_exchange_info()
+        finally:
+            self.exchange_info.end_refresh()
+
+    async def get_symbol_info(self, symbol):
+        """Return information about a symbol, see Client.get_symbol_info"""
+        await self._ensure_exchange_info()
+        return self.exchange_info.symbol(symbol)
+
+    async def get_symbol_filters(self, symbol):
+        """Return the trading filters of a symbol, see Client.get_symbol_filters"""
+        await self._ensure_exchange_info()
+        return self.exchange_info.filters(symbol)
+
+    async def refresh_exchange_info(self):
+        """Fetch exchangeInfo into the cache now, see Client.refresh_exchange_info"""
+        info = await self.get_exchange_info()
+        self.exchange_info.update(info)
+        return info
+
+    async def _historical_kline_pages(self, symbol, interval, start_str, end_str=None):
+        # async generator of the pages of at most 500 klines between the two dates, see
+        # Client._historical_kline_pages
+        limit = 500
+        timeframe = interval_to_milliseconds(interval)
+        start_ts = date_to_milliseconds(start_str)
+        end_ts = None
+        if end_str:
+            end_ts = date_to_milliseconds(end_str)
+
+        idx = 0
+        # it can be difficult to know when a symbol was listed on Binance so allow start time to be before list date
+        symbol_existed = False
+        while True:
+            temp_data = await self.get_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=limit,
+                startTime=start_ts,
+                endTime=end_ts
+            )
+
+            if not symbol_existed and len(temp_data):
+                symbol_existed = True
+
+            if symbol_existed:
+                yield temp_data
+                start_ts = temp_data[len(temp_data) - 1][0] + timeframe
+            else:
+                start_ts += timeframe
+
+            idx += 1
+            if len(temp_data) < limit:
+                break
+
+            # without the weight limiter sleep after every 3rd call to be kind to the API
+            if not self.limiter and idx % 3 == 0:
+                await asyncio.sleep(1)
+
+    async def get_historical_klines(self, symbol, interval, start_str, end_str=None, as_array=False):
+        """Get Historical Klines from Binance, see Client.get_historical_klines"""
+        if as_array:
+            output_data = KlineBuffer()
+            async for page in self._historical_kline_pages(symbol, interval, start_str, end_str):
+                output_data.append(page)
+            return output_data.array
+        output_data = []
+        async for page in self._historical_kline_pages(symbol, interval, start_str, end_str):
+            output_data += page
+        return output_data
+
+    async def download_historical_klines(self, path, symbol, interval, start_str, end_str=None):
+        """Stream Historical Klines from Binance to a binary file, see Client.download_historical_klines"""
+        with KlineFile(path) as f:
+            async for page in self._historical_kline_pages(symbol, interval, start_str, end_str):
+                f.append(page)
+        return f.size
+
+    async def get_asset_balance(self, asset, **params):
+        """Get current asset balance, see Client.get_asset_balance"""
+        res = await self.get_account(**params)
+        # find asset balance in list of balances
+        if "balances" in res:
+            for bal in res['balances']:
+                if bal['asset'].lower() == asset.lower():
+                    return bal
+        return None
+
+    async def get_account_status(self, **params):
+        """Get account status detail, see Client.get_account_status"""
+        res = await self._request_withdraw_api('get', 'accountStatus.html', True, data=params)
+        if not res['success']:
+            raise BinanceWithdrawException(res['msg'])
+        return res
+
+    async def withdraw(self, **params):
+        """Submit a withdraw request, see Client.withdraw"""
+        res = await self._request_withdraw_api('post', 'withdraw.html', True, data=params)
+        if not res['success']:
+            raise BinanceWithdrawException(res['msg'])
+        return res
+
+    async def stream_get_listen_key(self):
+        """Start a new user data stream and return the listen key, see Client.stream_get_listen_key"""
+        res = await self._post('userDataStream', False, data={})
+        return res['listenKey']
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import asyncio
+import functools
+import inspect
+import logging
+import random
+import time
+
+import websockets
+
+from .client import Client
+from .decoders import StreamStats, default_decoder
+
+log = logging.getLogger(__name__)
+
+# marks the end of a SocketStream
+_CLOSED = object()
+
+
+class SocketStream(object):
+
+    def __init__(self, maxsize=1000):
+        """Async iterator over the messages of a socket started without callback
+
+        Holds at most maxsize messages, the oldest one is dropped when a reader
+        falls further behind. The iteration ends when the socket is stopped or
+        gives up reconnecting, after the error message. A user data stream
+        carries on over the socket of a new listen key.
+
+        :param maxsize: optional - number of messages held, 0 for no limit
+        :type maxsize: int
+
+        """
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._queue = asyncio.Queue()
+
+    def put(self, msg):
+        if self.maxsize and self._queue.qsize() >= self.maxsize:
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(msg)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._queue.put_nowait(_CLOSED)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        msg = await self._queue.get()
+        if msg is _CLOSED:
+            # stay ended for any other reader
+            self._queue.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+        return msg
+
+
+class AsyncSocketManager(object):
+
+    STREAM_URL = 'wss://stream.binance.com:9443/'
+
+    WEBSOCKET_DEPTH_5 = '5'
+    WEBSOCKET_DEPTH_10 = '10'
+    WEBSOCKET_DEPTH_20 = '20'
+
+    _user_timeout = 30 * 60  # 30 minutes
+
+    # reconnection backoff, the same as the twisted factory of BinanceSocketManager
+    initial_delay = 0.1
+    max_delay = 10
+    max_retries = 5
+
+    _reconnect_error_payload = {
+        'e': 'error',
+        'm': 'Max reconnect retries reached'
+    }
+
+    def __init__(self, client, decoder=None, stream_url=None, queue_size=1000, ping_interval=20, recorder=None):
+        """Websocket manager for asyncio, the counterpart of BinanceSocketManager
+
+        Has the start_*_socket methods of BinanceSocketManager but every
+        socket is a task of the running event loop instead of a twisted
+        connection, so thousands of streams share one loop and no thread.
+        The start methods have to be called from a coroutine. A callback may
+        be a function or a coroutine function, without callback the messages
+        are read with ``async for msg in bm.stream(conn_key)``.
+
+        .. code-block:: python
+
+            bm = AsyncSocketManager(client)
+            conn_key = bm.start_aggtrade_socket('BNBBTC')
+            async for msg in bm.stream(conn_key):
+                print(msg['p'])
+
+        :param client: Binance API client, AsyncClient or Client, used for the user stream listen key
+        :type client: binance.Client
+        :param decoder: optional - binance.decoders.MessageDecoder of the messages, default decodes them to dicts
+        :type decoder: MessageDecoder
+        :param stream_url: optional - base url of the streams, e.g a local test server
+        :type stream_url: str
+        :param queue_size: optional - number of messages a stream read with async for holds
+        :type queue_size: int
+        :param ping_interval: optional - seconds between keepalive pings, None to disable
+        :type ping_interval: float
+        :param recorder: optional - binance.recorder.StreamRecorder writing the payloads of every socket to disk
+        :type recorder: StreamRecorder
+
+        """
+        self._client = client
+        self._decoder = decoder or default_decoder
+        self.stream_url = stream_url or self.STREAM_URL
+        self._queue_size = queue_size
+        self._ping_interval = ping_interval
+        self._recorder = recorder
+        self._conns = {}
+        self._streams = {}
+        self._stats = {}
+        self._user_listen_key = None
+        self._user_callback = None
+        self._user_task = None
+        self._user_close = None
+
+    async def _call_client(self, name, **params):
+        method = getattr(self._client, name)
+        if inspect.iscoroutinefunction(self._client._request):
+            return await method(**params)
+        # keep the blocking calls of a Client off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, **params))
+
+    def _start_socket(self, path, callback, prefix='ws/', stream=None):
+        if path in self._conns:
+            return False
+
+        if callback is None:
+            stream = stream or SocketStream(self._queue_size)
+            self._streams[path] = stream
+            callback = stream.put
+        stats = self._stats[path] = StreamStats()
+        self._conns[path] = asyncio.ensure_future(
+            self._run_socket(path, self.stream_url + prefix + path, callback, stats, stream))
+        return path
+
+    async def _deliver(self, callback, msg):
+        # a failing callback is logged and the socket carries on with the next message
+        try:
+            result = callback(msg)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            log.exception('Socket callback failed')
+
+    async def _run_socket(self, path, url, callback, stats, stream):
+        retries = 0
+        try:
+            while True:
+                try:
+                    async with websockets.connect(url, ping_interval=self._ping_interval, max_size=None) as ws:
+                        retries = 0
+                        async for payload in ws:
+                            if isinstance(payload, bytes):
+                                continue
+                            start = time.perf_counter()
+                            try:
+                                msg = self._decoder.decode(payload)
+                            except ValueError:
+                                stats.add_error()
+                                continue
+                            decoded = time.perf_counter()
+                            # the frame as received, websockets hands text frames over decoded
+                            frame = payload.encode()
+                            if self._recorder is not None:
+                                self._recorder.record(path, frame, msg)
+                            await self._deliver(callback, msg)
+                            stats.add(len(frame), decoded - start, time.perf_counter() - decoded)
+                except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException):
+                    pass
+
+                # closed by the server or failed, reconnect after a growing delay
+                retries += 1
+                if retries > self.max_retries:
+                    await self._deliver(callback, dict(self._reconnect_error_payload))
+                    return
+                delay = min(self.initial_delay * 2 ** (retries - 1), self.max_delay)
+                await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+        finally:
+            if self._conns.get(path) is asyncio.current_task():
+                # the socket ended by itself, stop listing it
+                self._conns.pop(path)
+                self._stats.pop(path, None)
+                self._streams.pop(path, None)
+            # a stream moved to the socket of a new listen key carries on
+            if stream is not None and all(moved is not stream for moved in self._streams.values()):
+                stream.close()
+
+    def stream(self, conn_key):
+        """Get the async iterator over the messages of a socket started without callback
+
+        :param conn_key: Socket connection key
+        :type conn_key: string
+
+        :returns: SocketStream
+
+        """
+        return self._streams[conn_key]
+
+    def start_depth_socket(self, symbol, callback=None, depth=None):
+        """Start a websocket for symbol market depth, see BinanceSocketManager.start_depth_socket"""
+        socket_name = symbol.lower() + '@depth'
+        if depth and depth != '1':
+            socket_name = '{}{}'.format(socket_name, depth)
+        return self._start_socket(socket_name, callback)
+
+    def start_kline_socket(self, symbol, callback=None, interval=Client.KLINE_INTERVAL_1MINUTE):
+        """Start a websocket for symbol kline data, see BinanceSocketManager.start_kline_socket"""
+        socket_name = '{}@kline_{}'.format(symbol.lower(), interval)
+        return self._start_socket(socket_name, callback)
+
+    def start_trade_socket(self, symbol, callback=None):
+        """Start a websocket for symbol trade data, see BinanceSocketManager.start_trade_socket"""
+        return self._start_socket(symbol.lower() + '@trade', callback)
+
+    def start_aggtrade_socket(self, symbol, callback=None):
+        """Start a websocket for symbol aggregate trade data, see BinanceSocketManager.start_aggtrade_socket"""
+        return self._start_socket(symbol.lower() + '@aggTrade', callback)
+
+    def start_symbol_ticker_socket(self, symbol, callback=None):
+        """Start a websocket for a symbol's ticker data, see BinanceSocketManager.start_symbol_ticker_socket"""
+        return self._start_socket(symbol.lower() + '@ticker', callback)
+
+    def start_ticker_socket(self, callback=None):
+        """Start a websocket for all ticker data, see BinanceSocketManager.start_ticker_socket"""
+        return self._start_socket('!ticker@arr', callback)
+
+    def start_multiplex_socket(self, streams, callback=None):
+        """Start a multiplexed socket using a list of socket names, see BinanceSocketManager.start_multiplex_socket"""
+        stream_path = 'streams={}'.format('/'.join(streams))
+        return self._start_socket(stream_path, callback, 'stream?')
+
+    async def start_user_socket(self, callback=None):
+        """Start a websocket for user data, see BinanceSocketManager.start_user_socket
+
+        The listen key is kept alive by a task of the event loop.
+
+        """
+        if self._user_listen_key:
+            # cleanup any sockets with this key
+            self.stop_socket(self._user_listen_key)
+            if self._user_listen_key:
+                # its socket had already ended
+                self._stop_user_socket()
+        if self._user_close is not None:
+            # the old key has to be closed before asking for a new one, Binance returns the same key while it is active
+            close, self._user_close = self._user_close, None
+            await close
+        self._user_listen_key = await self._call_client('stream_get_listen_key')
+        self._user_callback = callback
+        conn_key = self._start_socket(self._user_listen_key, callback)
+        if conn_key:
+            # start task to keep socket alive
+            self._user_task = asyncio.ensure_future(self._keepalive_user_socket())
+        return conn_key
+
+    async def _keepalive_user_socket(self):
+        while True:
+            await asyncio.sleep(self._user_timeout)
+            listen_key = await self._call_client('stream_get_listen_key')
+            # check if they key changed and move the socket, and the stream read from it, to the new one
+            if listen_key != self._user_listen_key:
+                old_key, self._user_listen_key = self._user_listen_key, listen_key
+                task = self._conns.pop(old_key, None)
+                if task is not None:
+                    task.cancel()
+                self._stats.pop(old_key, None)
+                self._start_socket(listen_key, self._user_callback, stream=self._streams.pop(old_key, None))
+
+    def stop_socket(self, conn_key):
+        """Stop a websocket given the connection key
+
+        :param conn_key: Socket connection key
+        :type conn_key: string
+
+        """
+        task = self._conns.pop(conn_key, None)
+        if task is None:
+            return
+        task.cancel()
+        stream = self._streams.pop(conn_key, None)
+        if stream is not None:
+            stream.close()
+        self._stats.pop(conn_key, None)
+
+        # check if we have a user stream socket
+        if conn_key == self._user_listen_key:
+            self._stop_user_socket()
+
+    def _stop_user_socket(self):
+        if self._user_task is not None:
+            self._user_task.cancel()
+            self._user_task = None
+        # close the stream, awaited by the next start_user_socket or close
+        self._user_close = asyncio.ensure_future(self._call_client('stream_close', listenKey=self._user_listen_key))
+        self._user_listen_key = None
+
+    def get_stats(self):
+        """Get the message counts and per message decode and callback time of every socket, see
+        BinanceSocketManager.get_stats"""
+        return {conn_key: stats.stats() for conn_key, stats in self._stats.items()}
+
+    async def close(self):
+        """Close all connections and wait for their tasks to end"""
+        tasks = list(self._conns.values())
+        for conn_key in list(self._conns):
+            self.stop_socket(conn_key)
+        if self._user_close is not None:
+            tasks.append(self._user_close)
+            self._user_close = None
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -4,10 +4,14 @@
 import hashlib
 import hmac
 import requests
+import threading
 import time
 from operator import itemgetter
 from .helpers import date_to_milliseconds, interval_to_milliseconds
 from .exceptions import BinanceAPIException, BinanceRequestException, BinanceWithdrawException
+from .exchangeinfo import ExchangeInfoCache
+from .klines import KlineBuffer, KlineFile
+from .ratelimit import request_weight, retry_after, weight_limiter
 
 
 class Client(object):
@@ -64,7 +68,8 @@ class Client(object):
     ORDER_RESP_TYPE_RESULT = 'RESULT'
     ORDER_RESP_TYPE_FULL = 'FULL'
 
-    def __init__(self, api_key, api_secret, requests_params=None):
+    def __init__(self, api_key, api_secret, requests_params=None, limiter=None, retries=2,
+                 exchange_info_ttl=60 * 60, stale_while_revalidate=False, lazy=None, transport=None):
         """Binance API Client constructor
 
         :param api_key: Api Key
@@ -73,16 +78,61 @@ class Client(object):
         :type api_secret: str.
         :param requests_params: optional - Dictionary of requests params to use for all calls
         :type requests_params: dict.
+        :param limiter: optional - TokenBucket of request weight throttling the calls, default the process wide
+            binance.ratelimit.weight_limiter shared by all clients. False disables throttling
+        :type limiter: TokenBucket
+        :param retries: optional - number of times an unsigned call answered with 429 is retried after Retry-After
+        :type retries: int
+        :param exchange_info_ttl: optional - seconds get_symbol_info and get_symbol_filters reuse exchangeInfo for
+        :type exchange_info_ttl: int
+        :param stale_while_revalidate: optional - answer from the expired exchangeInfo while it is refetched
+        :type stale_while_revalidate: bool
+        :param lazy: optional - True to not touch the network until the first call, 'background' to warm the
+            connection in a thread instead of blocking, False to ping the server before returning. Default pings
+            unless a transport is given
+        :type lazy: bool or str
+        :param transport: optional - object sending the requests with the requests.Session.request signature,
+            see binance.transport. Default a requests.Session
+        :type transport: object
 
         """
 
         self.API_KEY = api_key
         self.API_SECRET = api_secret
-        self.session = self._init_session()
         self._requests_params = requests_params
+        self.limiter = weight_limiter if limiter is None else limiter
+        self._retries = retries
+        self.exchange_info = ExchangeInfoCache(exchange_info_ttl, stale_while_revalidate)
+        self.session = transport
 
-        # init DNS and SSL cert
-        self.ping()
+        if lazy is None:
+            # a given transport is usually offline or a stand-in, there is nothing to warm
+            lazy = transport is not None
+        if lazy == 'background':
+            self.warm(background=True)
+        elif not lazy:
+            self.warm()
+
+    def warm(self, background=False):
+        """Create the session and ping the server to init DNS and SSL cert
+
+        :param background: optional - ping from a daemon thread and ignore its errors
+        :type background: bool
+
+        """
+        if self.session is None:
+            self.session = self._init_session()
+        if not background:
+            self.ping()
+            return
+
+        def ping():
+            try:
+                self.ping()
+            except Exception:
+                # warming is best effort, the first real call reports the error
+                pass
+        threading.Thread(target=ping, daemon=True).start()
 
     def _init_session(self):
 
@@ -129,7 +179,8 @@ class Client(object):
             params.append(('signature', data['signature']))
         return params
 
-    def _request(self, method, uri, signed, force_params=False, **kwargs):
+    def _prepare_request(self, method, signed, force_params, kwargs):
+        """Sign and order the params of a call, shared by the sync and async clients"""
 
         # set default requests timeout
         kwargs['timeout'] = 10
@@ -162,24 +213,54 @@ class Client(object):
             kwargs['params'] = kwargs['data']
             del(kwargs['data'])
 
-        response = getattr(self.session, method)(uri, **kwargs)
-        return self._handle_response(response)
+        return kwargs
+
+    def _should_retry(self, status_code, headers, signed, attempt):
+        """Sync the limiter with a response and tell whether the call should be sent again"""
+        if not self.limiter:
+            return False
+        self.limiter.sync_headers(headers)
+        if status_code not in (418, 429):
+            return False
+        # hold back every call of the process for as long as the server asks
+        self.limiter.block(retry_after(headers))
+        # a signed call would have to be signed again, its timestamp gets stale
+        return status_code == 429 and not signed and attempt < self._retries
+
+    def _request(self, method, uri, signed, force_params=False, weight=1, **kwargs):
+        kwargs = self._prepare_request(method, signed, force_params, kwargs)
+
+        attempt = 0
+        while True:
+            # wait for enough request weight before sending rather than getting banned
+            if self.limiter and weight:
+                self.limiter.acquire(weight)
+            if self.session is None:
+                self.session = self._init_session()
+            response = self.session.request(method, uri, **kwargs)
+
+            if self._should_retry(response.status_code, response.headers, signed, attempt):
+                attempt += 1
+                continue
+            return self._handle_response(response)
 
     def _request_api(self, method, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
         uri = self._create_api_uri(path, signed, version)
+        weight = request_weight(path, kwargs.get('data'))
 
-        return self._request(method, uri, signed, **kwargs)
+        return self._request(method, uri, signed, weight=weight, **kwargs)
 
     def _request_withdraw_api(self, method, path, signed=False, **kwargs):
         uri = self._create_withdraw_api_uri(path)
 
-        return self._request(method, uri, signed, True, **kwargs)
+        # the withdraw api has its own limits, not counted in the request weight
+        return self._request(method, uri, signed, True, weight=0, **kwargs)
 
     def _request_website(self, method, path, signed=False, **kwargs):
 
         uri = self._create_website_uri(path)
 
-        return self._request(method, uri, signed, **kwargs)
+        return self._request(method, uri, signed, weight=0, **kwargs)
 
     def _handle_response(self, response):
         """Internal helper for handling API responses from the Binance server.
@@ -288,6 +369,9 @@ class Client(object):
     def get_symbol_info(self, symbol):
         """Return information about a symbol
 
+        Served from the exchangeInfo cache, which is fetched at most once per exchange_info_ttl.
+        The returned dict is shared with the cache and must not be modified.
+
         :param symbol: required e.g BNBBTC
         :type symbol: str
 
@@ -326,13 +410,40 @@ class Client(object):
 
         """
 
-        res = self._get('exchangeInfo')
+        self.exchange_info.ensure(self.get_exchange_info)
+        return self.exchange_info.symbol(symbol)
 
-        for item in res['symbols']:
-            if item['symbol'] == symbol.upper():
-                return item
+    def get_symbol_filters(self, symbol):
+        """Return the trading filters of a symbol parsed into Decimals
 
-        return None
+        Served from the exchangeInfo cache like get_symbol_info.
+
+        :param symbol: required e.g BNBBTC
+        :type symbol: str
+
+        :returns: SymbolFilters if found, None if not
+
+        .. code-block:: python
+
+            filters = client.get_symbol_filters('BNBBTC')
+            quantity = filters.round_quantity(quantity)
+            filters.tick_size, filters.step_size, filters.min_notional
+
+        :raises: BinanceResponseException, BinanceAPIException
+
+        """
+        self.exchange_info.ensure(self.get_exchange_info)
+        return self.exchange_info.filters(symbol)
+
+    def refresh_exchange_info(self):
+        """Fetch exchangeInfo into the cache now
+
+        :returns: the exchangeInfo response
+
+        """
+        info = self.get_exchange_info()
+        self.exchange_info.update(info)
+        return info
 
     # General Endpoints
 
@@ -608,27 +719,8 @@ class Client(object):
         """
         return self._get('klines', data=params)
 
-    def get_historical_klines(self, symbol, interval, start_str, end_str=None):
-        """Get Historical Klines from Binance
-
-        See dateparse docs for valid start and end string formats http://dateparser.readthedocs.io/en/latest/
-
-        If using offset strings for dates add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
-
-        :param symbol: Name of symbol pair e.g BNBBTC
-        :type symbol: str
-        :param interval: Biannce Kline interval
-        :type interval: str
-        :param start_str: Start date string in UTC format
-        :type start_str: str
-        :param end_str: optional - end date string in UTC format
-        :type end_str: str
-
-        :return: list of OHLCV values
-
-        """
-        # init our list
-        output_data = []
+    def _historical_kline_pages(self, symbol, interval, start_str, end_str=None):
+        # generator of the pages of at most 500 klines between the two dates
 
         # setup the max limit
         limit = 500
@@ -662,8 +754,7 @@ class Client(object):
                 symbol_existed = True
 
             if symbol_existed:
-                # append this loops data to our output data
-                output_data += temp_data
+                yield temp_data
 
                 # update our start timestamp using the last value in the array and add the interval timeframe
                 start_ts = temp_data[len(temp_data) - 1][0] + timeframe
@@ -677,12 +768,71 @@ class Client(object):
                 # exit the while loop
                 break
 
-            # sleep after every 3rd call to be kind to the API
-            if idx % 3 == 0:
+            # without the weight limiter sleep after every 3rd call to be kind to the API
+            if not self.limiter and idx % 3 == 0:
                 time.sleep(1)
 
+    def get_historical_klines(self, symbol, interval, start_str, end_str=None, as_array=False):
+        """Get Historical Klines from Binance
+
+        See dateparse docs for valid start and end string formats http://dateparser.readthedocs.io/en/latest/
+
+        If using offset strings for dates add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
+
+        :param symbol: Name of symbol pair e.g BNBBTC
+        :type symbol: str
+        :param interval: Biannce Kline interval
+        :type interval: str
+        :param start_str: Start date string in UTC format
+        :type start_str: str
+        :param end_str: optional - end date string in UTC format
+        :type end_str: str
+        :param as_array: optional - decode every page into a structured array of binance.klines.KLINE_DTYPE
+            instead of keeping the lists of strings, a fraction of the memory
+        :type as_array: bool
+
+        :return: list of OHLCV values or structured array
+
+        """
+        if as_array:
+            output_data = KlineBuffer()
+            for page in self._historical_kline_pages(symbol, interval, start_str, end_str):
+                output_data.append(page)
+            return output_data.array
+
+        # init our list
+        output_data = []
+        for page in self._historical_kline_pages(symbol, interval, start_str, end_str):
+            # append this loops data to our output data
+            output_data += page
+
         return output_data
 
+    def download_historical_klines(self, path, symbol, interval, start_str, end_str=None):
+        """Stream Historical Klines from Binance to a binary file
+
+        Every page is decoded and written as it arrives so memory stays at one
+        page however long the range. Read the file back with binance.klines.load_klines.
+
+        :param path: output path, replaced once the download completes
+        :type path: str
+        :param symbol: Name of symbol pair e.g BNBBTC
+        :type symbol: str
+        :param interval: Biannce Kline interval
+        :type interval: str
+        :param start_str: Start date string in UTC format
+        :type start_str: str
+        :param end_str: optional - end date string in UTC format
+        :type end_str: str
+
+        :return: number of klines written
+
+        """
+        with KlineFile(path) as f:
+            for page in self._historical_kline_pages(symbol, interval, start_str, end_str):
+                f.append(page)
+        return f.size
+
     def get_ticker(self, **params):
         """24 hour price change statistics.
 
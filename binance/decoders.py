@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from collections import namedtuple
+import json
+import threading
+
+try:
+    # several times faster than json and reads the payload bytes as they are
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+DepthUpdateRecord = namedtuple('DepthUpdateRecord', (
+    'event_time', 'symbol', 'first_update_id', 'final_update_id', 'bids', 'asks'))
+
+KlineRecord = namedtuple('KlineRecord', (
+    'event_time', 'symbol', 'interval', 'open_time', 'close_time', 'open', 'high', 'low', 'close', 'volume',
+    'quote_volume', 'trades', 'taker_base_volume', 'taker_quote_volume', 'closed'))
+
+AggTradeRecord = namedtuple('AggTradeRecord', (
+    'event_time', 'symbol', 'trade_id', 'price', 'quantity', 'first_trade_id', 'last_trade_id', 'trade_time',
+    'buyer_maker'))
+
+TradeRecord = namedtuple('TradeRecord', (
+    'event_time', 'symbol', 'trade_id', 'price', 'quantity', 'buyer_order_id', 'seller_order_id', 'trade_time',
+    'buyer_maker'))
+
+# record type and the key of every field after event_time and symbol, in the order of the record fields,
+# kline fields are read from the nested bar
+RECORD_TYPES = {
+    'depthUpdate': (DepthUpdateRecord, None, ('U', 'u', 'b', 'a')),
+    'kline': (KlineRecord, 'k', ('i', 't', 'T', 'o', 'h', 'l', 'c', 'v', 'q', 'n', 'V', 'Q', 'x')),
+    'aggTrade': (AggTradeRecord, None, ('a', 'p', 'q', 'f', 'l', 'T', 'm')),
+    'trade': (TradeRecord, None, ('t', 'p', 'q', 'b', 'a', 'T', 'm')),
+}
+
+# the bids and asks of a depth update are lists of [price, quantity]
+_LEVEL_FIELDS = ('bids', 'asks')
+
+
+class MessageDecoder(object):
+
+    def __init__(self, records=False, numeric=(), loads=loads):
+        """Decoder of the websocket payloads
+
+        By default a payload becomes the same dict json.loads returns, parsed
+        by orjson when it is installed. With records the depthUpdate, kline,
+        aggTrade and trade events become namedtuples instead and only the
+        fields listed in numeric are converted from strings to floats, other
+        events stay dicts. The events of a multiplexed socket keep their
+        {"stream": ..., "data": ...} wrapper around the record.
+
+        .. code-block:: python
+
+            bm = BinanceSocketManager(client, decoder=MessageDecoder(records=True, numeric=('price', 'quantity')))
+            bm.start_aggtrade_socket('BNBBTC', process_message)
+
+        :param records: optional - decode the hot event types into records
+        :type records: bool
+        :param numeric: optional - record fields to convert to floats e.g price, close or bids
+        :type numeric: tuple
+        :param loads: optional - function parsing the payload bytes
+        :type loads: function
+
+        """
+        self.records = records
+        self.numeric = frozenset(numeric)
+        self._loads = loads
+        self._converters = {}
+        for event, (record_type, nested, keys) in RECORD_TYPES.items():
+            convert = tuple(i for i, name in enumerate(record_type._fields) if name in self.numeric)
+            self._converters[event] = (record_type, nested, keys, convert)
+
+    def _to_record(self, msg):
+        converter = self._converters.get(msg.get('e'))
+        if converter is None:
+            return msg
+        record_type, nested, keys, convert = converter
+        source = msg[nested] if nested else msg
+        values = [msg['E'], msg['s']]
+        values += [source[key] for key in keys]
+        for i in convert:
+            if record_type._fields[i] in _LEVEL_FIELDS:
+                values[i] = [(float(level[0]), float(level[1])) for level in values[i]]
+            else:
+                values[i] = float(values[i])
+        return record_type._make(values)
+
+    def decode(self, payload):
+        """Decode a text payload
+
+        :param payload: utf8 encoded message
+        :type payload: bytes
+
+        :raises ValueError: if the payload is not valid json
+
+        """
+        msg = self._loads(payload)
+        if self.records and isinstance(msg, dict):
+            if 'stream' in msg and 'data' in msg:
+                if isinstance(msg['data'], dict):
+                    msg['data'] = self._to_record(msg['data'])
+            else:
+                msg = self._to_record(msg)
+        return msg
+
+
+class StreamStats(object):
+
+    def __init__(self):
+        """Message counts and CPU time of one socket, updated from the reactor thread"""
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+        self.decode_time = 0.0
+        self.callback_time = 0.0
+
+    def add(self, size, decode_time, callback_time):
+        """Count a message, size is the length in bytes of its frame as received"""
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+            self.decode_time += decode_time
+            self.callback_time += callback_time
+
+    def add_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def stats(self):
+        """Return the counters and the mean per message costs in microseconds as a dict"""
+        with self._lock:
+            messages = self.messages or 1
+            return {
+                'messages': self.messages,
+                'bytes': self.bytes,
+                'errors': self.errors,
+                'decode_time': self.decode_time,
+                'callback_time': self.callback_time,
+                'decode_us': self.decode_time / messages * 1e6,
+                'callback_us': self.callback_time / messages * 1e6,
+            }
+
+
+# payloads decoded to dicts, what every socket manager uses unless given another decoder
+default_decoder = MessageDecoder()
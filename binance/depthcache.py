@@ -1,51 +1,123 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import bisect
+from concurrent.futures import ThreadPoolExecutor
 from operator import itemgetter
+import threading
 import time
 
+import numpy as np
+
 from .websockets import BinanceSocketManager
 
 
+class _BookSide(object):
+    """One side of the book, price levels kept sorted by integer tick price
+
+    Updating the quantity of a known level is a dict lookup, adding or removing a
+    level is a binary search in the sorted tick list.
+
+    """
+
+    def __init__(self, precision, reverse):
+        self._precision = precision
+        self._scale = 10 ** precision
+        self._reverse = reverse
+        self._ticks = []      # ascending
+        self._quantities = {}
+
+    def to_ticks(self, price):
+        whole, _, frac = price.partition('.')
+        if len(frac) > self._precision and frac[self._precision:].strip('0'):
+            raise ValueError('Price {} has more than {} decimals'.format(price, self._precision))
+        return int(whole + frac[:self._precision].ljust(self._precision, '0'))
+
+    def update(self, price, quantity):
+        ticks = self.to_ticks(price)
+        quantity = float(quantity)
+        if quantity == 0.0:
+            if self._quantities.pop(ticks, None) is not None:
+                del self._ticks[bisect.bisect_left(self._ticks, ticks)]
+            return
+        if ticks not in self._quantities:
+            bisect.insort(self._ticks, ticks)
+        self._quantities[ticks] = quantity
+
+    def clear(self):
+        del self._ticks[:]
+        self._quantities.clear()
+
+    def _levels(self, n=None):
+        # best levels first, best bid is the highest price and best ask the lowest
+        if n is None:
+            return self._ticks[::-1] if self._reverse else self._ticks
+        if n <= 0:
+            return []
+        return self._ticks[:-n - 1:-1] if self._reverse else self._ticks[:n]
+
+    def best(self):
+        if not self._ticks:
+            return None
+        ticks = self._ticks[-1] if self._reverse else self._ticks[0]
+        return [ticks / self._scale, self._quantities[ticks]]
+
+    def top(self, n=None):
+        return [[ticks / self._scale, self._quantities[ticks]] for ticks in self._levels(n)]
+
+    def array(self, n=None):
+        levels = self._levels(n)
+        out = np.empty((len(levels), 2))
+        out[:, 0] = np.array(levels, dtype=np.int64) / self._scale
+        out[:, 1] = [self._quantities[ticks] for ticks in levels]
+        return out
+
+    def __len__(self):
+        return len(self._ticks)
+
+
 class DepthCache(object):
 
-    def __init__(self, symbol):
+    def __init__(self, symbol, precision=8):
         """Intialise the DepthCache
 
         :param symbol: Symbol to create depth cache for
         :type symbol: string
+        :param precision: Optional number of decimals of the prices, Binance quotes them with 8
+        :type precision: int
 
         """
         self.symbol = symbol
-        self._bids = {}
-        self._asks = {}
+        self._bids = _BookSide(precision, reverse=True)
+        self._asks = _BookSide(precision, reverse=False)
 
     def add_bid(self, bid):
-        """Add a bid to the cache
+        """Add a bid to the cache, a zero quantity removes the price level
 
-        :param bid:
+        :param bid: [price, quantity] as strings
         :return:
 
         """
-        self._bids[bid[0]] = float(bid[1])
-        if bid[1] == "0.00000000":
-            del self._bids[bid[0]]
+        self._bids.update(bid[0], bid[1])
 
     def add_ask(self, ask):
-        """Add an ask to the cache
+        """Add an ask to the cache, a zero quantity removes the price level
 
-        :param ask:
+        :param ask: [price, quantity] as strings
         :return:
 
         """
-        self._asks[ask[0]] = float(ask[1])
-        if ask[1] == "0.00000000":
-            del self._asks[ask[0]]
+        self._asks.update(ask[0], ask[1])
+
+    def clear(self):
+        """Remove every bid and ask from the cache"""
+        self._bids.clear()
+        self._asks.clear()
 
     def get_bids(self):
         """Get the current bids
 
-        :return: list of bids with price and quantity as floats
+        :return: list of bids with price and quantity as floats, highest price first
 
         .. code-block:: python
 
@@ -73,12 +145,12 @@ class DepthCache(object):
             ]
 
         """
-        return DepthCache.sort_depth(self._bids, reverse=True)
+        return self._bids.top()
 
     def get_asks(self):
         """Get the current asks
 
-        :return: list of asks with price and quantity as floats
+        :return: list of asks with price and quantity as floats, lowest price first
 
         .. code-block:: python
 
@@ -106,7 +178,56 @@ class DepthCache(object):
             ]
 
         """
-        return DepthCache.sort_depth(self._asks, reverse=False)
+        return self._asks.top()
+
+    def get_best_bid(self):
+        """Get the highest bid
+
+        :return: [price, quantity] as floats or None if there are no bids
+
+        """
+        return self._bids.best()
+
+    def get_best_ask(self):
+        """Get the lowest ask
+
+        :return: [price, quantity] as floats or None if there are no asks
+
+        """
+        return self._asks.best()
+
+    def get_top(self, n):
+        """Get the n best levels of each side without going through the whole book
+
+        :param n: number of price levels per side
+        :type n: int
+
+        :return: tuple of (bids, asks) in the get_bids and get_asks format
+
+        """
+        return self._bids.top(n), self._asks.top(n)
+
+    def get_bids_array(self, n=None):
+        """Get the bids as a NumPy array
+
+        :param n: Optional number of best levels, default all
+        :type n: int
+
+        :return: float64 array of shape (levels, 2) with price and quantity columns, highest price first
+
+        """
+        return self._bids.array(n)
+
+    def get_asks_array(self, n=None):
+        """Get the asks as a NumPy array
+
+        :param n: Optional number of best levels, default all
+        :type n: int
+
+        :return: float64 array of shape (levels, 2) with price and quantity columns, lowest price first
+
+        """
+        return self._asks.array(n)
 
     @staticmethod
     def sort_depth(vals, reverse=False):
@@ -117,64 +238,346 @@ class DepthCache(object):
         return lst
 
 
-class DepthCacheManager(object):
+class DepthDelta(object):
 
-    _default_refresh = 60 * 30  # 30 minutes
+    def __init__(self, depth_cache, bids, asks, update_id, updates, snapshot):
+        """Levels of a depth cache changed since the previous callback, with the top of the book
 
-    def __init__(self, client, symbol, callback=None, refresh_interval=_default_refresh):
-        """Initialise the DepthCacheManager
+        Passed to the callback of a coalescing depth cache manager instead of
+        the DepthCache, so consumers can follow the book without going
+        through every level of it.
+
+        :ivar symbol: symbol of the book
+        :ivar bids: dict of price to quantity of the changed bids as floats, 0.0 when the level was removed
+        :ivar asks: dict of price to quantity of the changed asks as floats, 0.0 when the level was removed
+        :ivar best_bid: [price, quantity] of the highest bid, None if there are no bids
+        :ivar best_ask: [price, quantity] of the lowest ask, None if there are no asks
+        :ivar update_id: last update id applied
+        :ivar updates: number of diff events coalesced
+        :ivar snapshot: True if a snapshot replaced the book, only then the levels it dropped are not in bids
+            and asks, read depth_cache for the whole book
+        :ivar depth_cache: the DepthCache itself
+
+        """
+        self.symbol = depth_cache.symbol
+        self.bids = bids
+        self.asks = asks
+        self.best_bid = depth_cache.get_best_bid()
+        self.best_ask = depth_cache.get_best_ask()
+        self.update_id = update_id
+        self.updates = updates
+        self.snapshot = snapshot
+        self.depth_cache = depth_cache
+
+
+class _DepthBook(object):
+
+    def __init__(self, client, symbol, callback=None, refresh_interval=None, executor=None, coalesce_interval=None,
+                 coalesce_updates=None):
+        """Depth cache of one symbol kept in sync from a REST snapshot and the diff depth stream
+
+        Stream events are buffered until the snapshot is applied, then the ones
+        it already contains are dropped and the rest applied in sequence. A gap
+        in the update ids or a due refresh marks the book stale and a new
+        snapshot is fetched off the socket thread, events are buffered again
+        until it is applied so the other streams never wait on the REST call.
 
         :param client: Binance API client
         :type client: binance.Client
-        :param symbol: Symbol to create depth cache for
+        :param symbol: Symbol of the book
         :type symbol: string
         :param callback: Optional function to receive depth cache updates
         :type callback: function
         :param refresh_interval: Optional number of seconds between cache refresh, use 0 or None to disable
         :type refresh_interval: int
+        :param executor: Optional executor fetching the resync snapshots, default a thread per resync
+        :type executor: concurrent.futures.Executor
+        :param coalesce_interval: Optional minimum number of seconds between callbacks, which then receive a
+            DepthDelta of the diffs applied since the previous one
+        :type coalesce_interval: float
+        :param coalesce_updates: Optional number of diff events to coalesce into one DepthDelta callback
+        :type coalesce_updates: int
 
         """
         self._client = client
-        self._symbol = symbol
+        self.symbol = symbol
         self._callback = callback
+        self._refresh_interval = refresh_interval
+        self._refresh_time = None
+        self._executor = executor
+        self._lock = threading.RLock()
+        self._first_event = threading.Event()
         self._last_update_id = None
+        self._synced = False
         self._depth_message_buffer = []
-        self._bm = None
-        self._depth_cache = DepthCache(self._symbol)
-        self._refresh_interval = refresh_interval
+        self._closed = False
+        self._stale_since = None
+        self.depth_cache = DepthCache(symbol)
+
+        self._coalesce_interval = coalesce_interval
+        self._coalesce_updates = coalesce_updates
+        self._coalesce = bool(coalesce_interval or coalesce_updates)
+        self._pending_bids = {}
+        self._pending_asks = {}
+        self._pending_updates = 0
+        self._pending_snapshot = False
+        self._last_flush = 0.0
+        self._flush_timer = None
+
+        self.resyncs = 0
+        self.refreshes = 0
+        self.resync_errors = 0
+        self.resync_time = 0.0
+        self.last_resync_latency = None
+        self.max_resync_latency = 0.0
+
+    @property
+    def stale(self):
+        """Whether the book waits for a resync snapshot, its depth cache is then behind the stream"""
+        return self._stale_since is not None
+
+    def wait_first_event(self, timeout=None):
+        """Wait for the stream to deliver an event, so a snapshot fetched next overlaps it"""
+        return self._first_event.wait(timeout)
+
+    def _fetch_snapshot(self):
+        return self._client.get_order_book(symbol=self.symbol, limit=500)
+
+    def init_cache(self):
+        """Initialise the depth cache calling REST endpoint, blocking until it is applied
 
-        self._start_socket()
-        self._init_cache()
+        :return:
+        """
+        with self._lock:
+            # buffer the events arriving while the snapshot is fetched
+            self._last_update_id = None
+        self._apply_snapshot(self._fetch_snapshot())
+
+    def _apply_snapshot(self, res):
+        with self._lock:
+            self.depth_cache.clear()
+            # process bid and asks from the order book
+            for bid in res['bids']:
+                self.depth_cache.add_bid(bid)
+            for ask in res['asks']:
+                self.depth_cache.add_ask(ask)
+
+            # set first update id
+            self._last_update_id = res['lastUpdateId']
+            self._synced = False
+
+            # set a time to refresh the depth cache
+            if self._refresh_interval:
+                self._refresh_time = int(time.time()) + self._refresh_interval
+
+            if self._coalesce:
+                # the changes pending are part of the snapshot now
+                self._pending_bids.clear()
+                self._pending_asks.clear()
+                self._pending_snapshot = True
+                self._pending_updates += 1
+                self._maybe_flush()
+
+            # Apply any updates from the websocket
+            buffered, self._depth_message_buffer = self._depth_message_buffer, []
+            for msg in buffered:
+                if self._last_update_id is None:
+                    # stale again, keep the rest for the next snapshot
+                    self._depth_message_buffer.append(msg)
+                else:
+                    self._process_depth_message(msg)
+
+    def _resync(self, refresh=False):
+        # called with the lock held, the events are buffered from now on
+        if self._stale_since is not None or self._closed:
+            return
+        self._last_update_id = None
+        self._stale_since = time.time()
+        if refresh:
+            self.refreshes += 1
+        else:
+            self.resyncs += 1
+        if self._executor is None:
+            threading.Thread(target=self._run_resync, daemon=True).start()
+        else:
+            self._executor.submit(self._run_resync)
+
+    def _run_resync(self):
+        attempt = 0
+        while not self._closed:
+            try:
+                res = self._fetch_snapshot()
+            except Exception:
+                # stay stale and try again e.g after a network error or a rate limit
+                with self._lock:
+                    self.resync_errors += 1
+                time.sleep(min(2 ** attempt, 30))
+                attempt += 1
+                continue
+
+            with self._lock:
+                latency = time.time() - self._stale_since
+                self.last_resync_latency = latency
+                self.max_resync_latency = max(self.max_resync_latency, latency)
+                self.resync_time += latency
+                self._stale_since = None
+                self._apply_snapshot(res)
+            return
 
-    def _init_cache(self):
-        """Initialise the depth cache calling REST endpoint
+    def on_message(self, msg):
+        """Handle a depth update event of the symbol"""
+        self._first_event.set()
+        with self._lock:
+            if self._last_update_id is None:
+                # snapshot not applied yet, buffer messages
+                self._depth_message_buffer.append(msg)
+            else:
+                self._process_depth_message(msg)
+
+    def _process_depth_message(self, msg):
+        """Process a depth event message.
 
+        :param msg: Depth event message.
         :return:
+
         """
-        self._last_update_id = None
-        self._depth_message_buffer = []
+        if msg['u'] <= self._last_update_id:
+            # ignore any updates before the snapshot update id
+            return
+        if msg['U'] > self._last_update_id + 1 or (self._synced and msg['U'] != self._last_update_id + 1):
+            # the first event has to overlap the snapshot and the next ones follow
+            # each other, otherwise fetch a snapshot again
+            self._resync()
+            self._depth_message_buffer.append(msg)
+            return
+
+        # add any bid or ask values
+        for bid in msg['b']:
+            self.depth_cache.add_bid(bid)
+        for ask in msg['a']:
+            self.depth_cache.add_ask(ask)
+
+        self._last_update_id = msg['u']
+        self._synced = True
+
+        if self._coalesce:
+            for bid in msg['b']:
+                self._pending_bids[bid[0]] = bid[1]
+            for ask in msg['a']:
+                self._pending_asks[ask[0]] = ask[1]
+            self._pending_updates += 1
+            self._maybe_flush()
+        elif self._callback:
+            # call the callback with the updated depth cache
+            self._callback(self.depth_cache)
+
+        # after processing event see if we need to refresh the depth cache
+        if self._refresh_interval and int(time.time()) > self._refresh_time:
+            self._resync(refresh=True)
+
+    def _maybe_flush(self):
+        # called with the lock held, flush now if enough diffs or time went by, otherwise make sure a
+        # timer delivers them once the interval is over
+        if self._coalesce_updates and self._pending_updates >= self._coalesce_updates:
+            self._flush()
+        elif self._coalesce_interval:
+            wait = self._last_flush + self._coalesce_interval - time.monotonic()
+            if wait <= 0:
+                self._flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(wait, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._flush_timer = None
+            if not self._closed:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending_updates:
+            return
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        delta = DepthDelta(self.depth_cache,
+                           {float(price): float(quantity) for price, quantity in self._pending_bids.items()},
+                           {float(price): float(quantity) for price, quantity in self._pending_asks.items()},
+                           self._last_update_id, self._pending_updates, self._pending_snapshot)
+        self._pending_bids = {}
+        self._pending_asks = {}
+        self._pending_updates = 0
+        self._pending_snapshot = False
+        self._last_flush = time.monotonic()
+
+        if self._callback:
+            self._callback(delta)
+
+    def flush(self):
+        """Deliver the coalesced diffs now instead of waiting for the interval or the number of updates"""
+        with self._lock:
+            self._flush()
+
+    def stats(self):
+        """Return the resync state and counters as a dict"""
+        with self._lock:
+            return {
+                'stale': self.stale,
+                'stale_for': time.time() - self._stale_since if self.stale else 0.0,
+                'buffered': len(self._depth_message_buffer),
+                'last_update_id': self._last_update_id,
+                'resyncs': self.resyncs,
+                'refreshes': self.refreshes,
+                'resync_errors': self.resync_errors,
+                'resync_time': self.resync_time,
+                'last_resync_latency': self.last_resync_latency,
+                'max_resync_latency': self.max_resync_latency,
+            }
+
+    def close(self):
+        """Stop any pending resync or callback"""
+        with self._lock:
+            self._closed = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
 
-        res = self._client.get_order_book(symbol=self._symbol, limit=500)
 
-        # process bid and asks from the order book
-        for bid in res['bids']:
-            self._depth_cache.add_bid(bid)
-        for ask in res['asks']:
-            self._depth_cache.add_ask(ask)
+class DepthCacheManager(object):
 
-        # set first update id
-        self._last_update_id = res['lastUpdateId']
+    _default_refresh = 60 * 30  # 30 minutes
 
-        # set a time to refresh the depth cache
-        if self._refresh_interval:
-            self._refresh_time = int(time.time()) + self._refresh_interval
+    def __init__(self, client, symbol, callback=None, refresh_interval=_default_refresh, coalesce_interval=None,
+                 coalesce_updates=None):
+        """Initialise the DepthCacheManager
 
-        # Apply any updates from the websocket
-        for msg in self._depth_message_buffer:
-            self._process_depth_message(msg, buffer=True)
+        :param client: Binance API client
+        :type client: binance.Client
+        :param symbol: Symbol to create depth cache for
+        :type symbol: string
+        :param callback: Optional function to receive depth cache updates
+        :type callback: function
+        :param refresh_interval: Optional number of seconds between cache refresh, use 0 or None to disable
+        :type refresh_interval: int
+        :param coalesce_interval: Optional minimum number of seconds between callbacks, which then receive a
+            DepthDelta of the changed levels and the top of the book instead of the DepthCache
+        :type coalesce_interval: float
+        :param coalesce_updates: Optional number of diff events to coalesce into one DepthDelta callback
+        :type coalesce_updates: int
+
+        """
+        self._client = client
+        self._symbol = symbol
+        self._callback = callback
+        self._bm = None
+        self._book = _DepthBook(client, symbol, callback, refresh_interval, coalesce_interval=coalesce_interval,
+                                coalesce_updates=coalesce_updates)
+        self._depth_cache = self._book.depth_cache
 
-        # clear the depth buffer
-        del self._depth_message_buffer
+        self._start_socket()
+        self._book.init_cache()
 
     def _start_socket(self):
         """Start the depth cache socket
@@ -188,8 +591,7 @@ class DepthCacheManager(object):
         self._bm.start()
 
         # wait for some socket responses
-        while not len(self._depth_message_buffer):
-            time.sleep(1)
+        self._book.wait_first_event()
 
     def _depth_event(self, msg):
         """Handle a depth event
@@ -206,57 +608,179 @@ class DepthCacheManager(object):
             # notify the user by returning a None value
             if self._callback:
                 self._callback(None)
+            return
 
-        if self._last_update_id is None:
-            # Initial depth snapshot fetch not yet performed, buffer messages
-            self._depth_message_buffer.append(msg)
-        else:
-            self._process_depth_message(msg)
+        self._book.on_message(msg)
 
-    def _process_depth_message(self, msg, buffer=False):
-        """Process a depth event message.
+    def get_depth_cache(self):
+        """Get the current depth cache
+
+        :return: DepthCache object
+
+        """
+        return self._depth_cache
+
+    def flush(self):
+        """Deliver the coalesced diffs now instead of waiting for the interval or the number of updates"""
+        self._book.flush()
+
+    def is_stale(self):
+        """Whether the depth cache waits for a resync snapshot and is behind the stream"""
+        return self._book.stale
+
+    def get_stats(self):
+        """Get the resync state and counters of the depth cache
+
+        :return: dict with stale, stale_for, buffered, last_update_id, resyncs, refreshes, resync_errors,
+            resync_time, last_resync_latency and max_resync_latency
+
+        """
+        return self._book.stats()
+
+    def close(self):
+        """Close the open socket for this manager
 
-        :param msg: Depth event message.
         :return:
+        """
+        self._bm.close()
+        self._book.close()
+        self._depth_cache = None
+
+
+class MultiDepthCacheManager(object):
+
+    _default_refresh = 60 * 30  # 30 minutes
+
+    # seconds to wait for the first event of a symbol before fetching its snapshot anyway
+    _first_event_timeout = 10
+
+    def __init__(self, client, symbols, callback=None, refresh_interval=_default_refresh, workers=8,
+                 coalesce_interval=None, coalesce_updates=None):
+        """Depth caches of many symbols kept over a single multiplexed socket
+
+        Every symbol's diff depth stream comes through one connection and one
+        socket manager thread, events are routed to the symbol's DepthCache.
+        The initial snapshots are fetched concurrently, throttled by the
+        client's request weight limiter.
+
+        :param client: Binance API client
+        :type client: binance.Client
+        :param symbols: Symbols to create depth caches for
+        :type symbols: list
+        :param callback: Optional function to receive the depth cache of a symbol when it updates, None if the
+            socket failed
+        :type callback: function
+        :param refresh_interval: Optional number of seconds between cache refresh, use 0 or None to disable
+        :type refresh_interval: int
+        :param workers: Optional number of snapshots fetched at the same time, initial or resync ones
+        :type workers: int
+        :param coalesce_interval: Optional minimum number of seconds between callbacks of a symbol, which then
+            receive a DepthDelta of the changed levels and the top of the book instead of the DepthCache
+        :type coalesce_interval: float
+        :param coalesce_updates: Optional number of diff events of a symbol to coalesce into one DepthDelta callback
+        :type coalesce_updates: int
 
         """
+        self._client = client
+        self._callback = callback
+        self._bm = None
+        # fetches the initial snapshots then the resync ones, off the socket thread
+        self._pool = ThreadPoolExecutor(workers)
+        self._books = {}
+        for symbol in symbols:
+            symbol = symbol.upper()
+            self._books[symbol] = _DepthBook(client, symbol, callback, refresh_interval, self._pool,
+                                             coalesce_interval, coalesce_updates)
+        self._depth_caches = {symbol: book.depth_cache for symbol, book in self._books.items()}
 
-        if buffer and msg['u'] <= self._last_update_id:
-            # ignore any updates before the initial update id
+        self._start_socket()
+        self._init_caches()
+
+    def _start_socket(self):
+        """Start the multiplexed depth socket of every symbol
+
+        :return:
+        """
+        self._bm = BinanceSocketManager(self._client)
+
+        streams = ['{}@depth'.format(symbol.lower()) for symbol in self._books]
+        self._bm.start_multiplex_socket(streams, self._depth_event)
+
+        self._bm.start()
+
+    def _init_caches(self):
+        def init(book):
+            book.wait_first_event(self._first_event_timeout)
+            book.init_cache()
+
+        list(self._pool.map(init, self._books.values()))
+
+    def _depth_event(self, msg):
+        """Route a combined stream event to the book of its symbol
+
+        :param msg: {"stream": "<symbol>@depth", "data": <depth event>}
+        :return:
+
+        """
+
+        if 'e' in msg and msg['e'] == 'error':
+            # close the socket
+            self.close()
+
+            # notify the user by returning a None value
+            if self._callback:
+                self._callback(None)
             return
-        elif msg['U'] != self._last_update_id + 1:
-            # if not buffered check we get sequential updates
-            # otherwise init cache again
-            self._init_cache()
 
-        # add any bid or ask values
-        for bid in msg['b']:
-            self._depth_cache.add_bid(bid)
-        for ask in msg['a']:
-            self._depth_cache.add_ask(ask)
+        book = self._books.get(msg['stream'].split('@', 1)[0].upper())
+        if book is not None:
+            book.on_message(msg['data'])
 
-        # call the callback with the updated depth cache
-        if self._callback:
-            self._callback(self._depth_cache)
+    def get_depth_cache(self, symbol):
+        """Get the current depth cache of a symbol
 
-        self._last_update_id = msg['u']
+        :return: DepthCache object, None if the symbol is not tracked
 
-        # after processing event see if we need to refresh the depth cache
-        if self._refresh_interval and int(time.time()) > self._refresh_time:
-            self._init_cache()
+        """
+        return self._depth_caches.get(symbol.upper())
 
-    def get_depth_cache(self):
-        """Get the current depth cache
+    def get_depth_caches(self):
+        """Get the current depth cache of every symbol
 
-        :return: DepthCache object
+        :return: dict of symbol to DepthCache object
 
         """
-        return self._depth_cache
+        return dict(self._depth_caches)
+
+    def flush(self):
+        """Deliver the coalesced diffs of every symbol now instead of waiting for the interval or the number
+        of updates"""
+        for book in self._books.values():
+            book.flush()
+
+    def get_stale_symbols(self):
+        """Get the symbols whose depth cache waits for a resync snapshot and is behind the stream
+
+        :return: list of symbols
+
+        """
+        return [symbol for symbol, book in self._books.items() if book.stale]
+
+    def get_stats(self):
+        """Get the resync state and counters of every depth cache
+
+        :return: dict of symbol to dict, see DepthCacheManager.get_stats
+
+        """
+        return {symbol: book.stats() for symbol, book in self._books.items()}
 
     def close(self):
-        """Close the open socket for this manager
+        """Close the socket shared by every symbol
 
         :return:
         """
         self._bm.close()
-        self._depth_cache = None
+        for book in self._books.values():
+            book.close()
+        self._pool.shutdown(wait=False)
+        self._depth_caches = {}
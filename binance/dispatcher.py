@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import collections
+import itertools
+import queue
+import threading
+import time
+
+# what a full stream queue does with a new message
+DROP_OLDEST = 'drop_oldest'     # drop the oldest queued message
+COALESCE = 'coalesce'           # replace the queued message with the same key, drop the oldest if the key is new
+BLOCK = 'block'                 # wait for the consumer, holding back every socket of the reactor
+
+POLICIES = (DROP_OLDEST, COALESCE, BLOCK)
+
+# messages a worker delivers from one stream before giving the other streams a turn
+_BATCH = 100
+
+
+class StreamQueue(object):
+
+    def __init__(self, dispatcher, callback, name, maxsize, policy, key=None):
+        """Bounded queue of the messages of one stream, delivered in order to its callback
+
+        At most one worker drains a queue at a time so the callback is never
+        called concurrently for the same stream.
+
+        :param key: optional - function of a message returning its coalescing key, default every message
+            has the same key and only the latest one is kept
+        :type key: function
+
+        """
+        if policy not in POLICIES:
+            raise ValueError('Unknown overflow policy {}, use one of {}'.format(policy, ', '.join(POLICIES)))
+        self._dispatcher = dispatcher
+        self._callback = callback
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self._key = key or (lambda msg: None)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        # keyed by coalescing key or by arrival order, oldest first
+        self._messages = collections.OrderedDict()
+        self._scheduled = False
+
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.blocked_time = 0.0
+
+    def put(self, msg):
+        """Queue a message, what the socket calls instead of the callback"""
+        with self._cond:
+            key = self._key(msg) if self.policy == COALESCE else next(self._seq)
+            if key in self._messages:
+                self._messages[key] = msg
+                self.coalesced += 1
+            else:
+                if len(self._messages) >= self.maxsize:
+                    if self.policy == BLOCK:
+                        start = time.monotonic()
+                        while len(self._messages) >= self.maxsize and not self._dispatcher.closed:
+                            self._cond.wait()
+                        self.blocked_time += time.monotonic() - start
+                    else:
+                        self._messages.popitem(last=False)
+                        self.dropped += 1
+                self._messages[key] = msg
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._messages))
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            self._dispatcher._schedule(self)
+
+    def _drain(self):
+        for _ in range(_BATCH):
+            with self._cond:
+                if not self._messages:
+                    self._scheduled = False
+                    return
+                msg = self._messages.popitem(last=False)[1]
+                self._cond.notify()
+            try:
+                self._callback(msg)
+            except Exception:
+                # a failing callback must not stop the worker serving every other stream
+                self.errors += 1
+            self.delivered += 1
+        self._dispatcher._schedule(self)
+
+    def stats(self):
+        """Return the queue depth and counters as a dict"""
+        with self._cond:
+            return {
+                'policy': self.policy,
+                'maxsize': self.maxsize,
+                'depth': len(self._messages),
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'blocked_time': self.blocked_time,
+            }
+
+
+class Dispatcher(object):
+
+    def __init__(self, workers=4, maxsize=1000, policy=DROP_OLDEST, key=None, streams=None):
+        """Hand off websocket messages from the reactor thread to a pool of consumer threads
+
+        Each stream gets a bounded queue and its callback is called from a
+        worker thread, so a slow consumer only delays its own stream instead
+        of every socket of the reactor. Set it on a socket manager to queue
+        every socket, or wrap single callbacks.
+
+        .. code-block:: python
+
+            dispatcher = Dispatcher(workers=4, streams={'!ticker@arr': {'policy': COALESCE, 'maxsize': 1}})
+            bm = BinanceSocketManager(client, dispatcher=dispatcher)
+            bm.start_ticker_socket(process_tickers)
+
+            # or queue a single callback of a manager without dispatcher
+            other_bm.start_trade_socket('BNBBTC', dispatcher.wrap(process_trade, 'trades', policy=BLOCK))
+
+        :param workers: optional - number of consumer threads
+        :type workers: int
+        :param maxsize: optional - default number of messages a stream queue holds
+        :type maxsize: int
+        :param policy: optional - default overflow policy, DROP_OLDEST, COALESCE or BLOCK
+        :type policy: str
+        :param key: optional - default coalescing key function
+        :type key: function
+        :param streams: optional - dict of stream name, the socket path, to dict of maxsize, policy and key
+            overriding the defaults
+        :type streams: dict
+
+        """
+        if policy not in POLICIES:
+            raise ValueError('Unknown overflow policy {}, use one of {}'.format(policy, ', '.join(POLICIES)))
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key
+        self._streams = streams or {}
+        self._queues = {}
+        self._names = itertools.count()
+        self._ready = queue.Queue()
+        self.closed = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def wrap(self, callback, name=None, maxsize=None, policy=None, key=None):
+        """Give a callback its own stream queue
+
+        :param callback: function to call with the messages
+        :type callback: function
+        :param name: optional - stream name the options and stats are kept under
+        :type name: str
+
+        :returns: function queueing a message, to pass as the socket callback
+
+        """
+        if name is None:
+            name = 'stream-{}'.format(next(self._names))
+        options = self._streams.get(name, {})
+        stream = StreamQueue(self, callback, name,
+                             maxsize or options.get('maxsize', self.maxsize),
+                             policy or options.get('policy', self.policy),
+                             key or options.get('key', self.key))
+        self._queues[name] = stream
+        return stream.put
+
+    def _schedule(self, stream):
+        self._ready.put(stream)
+
+    def _run(self):
+        while True:
+            stream = self._ready.get()
+            if stream is None:
+                return
+            stream._drain()
+
+    def stats(self):
+        """Get the queue depth and counters of every stream
+
+        :returns: dict of stream name to dict with policy, maxsize, depth, max_depth, enqueued, delivered,
+            dropped, coalesced, errors and blocked_time
+
+        """
+        return {name: stream.stats() for name, stream in list(self._queues.items())}
+
+    def close(self):
+        """Stop the workers, releasing any socket blocked on a full queue"""
+        self.closed = True
+        for stream in list(self._queues.values()):
+            with stream._cond:
+                stream._cond.notify_all()
+        for _ in self._threads:
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join()
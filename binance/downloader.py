@@ -0,0 +1,495 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import requests
+
+from .client import Client
+from .exceptions import BinanceAPIException, BinanceRequestException
+from .helpers import date_to_milliseconds, interval_to_milliseconds
+from .ratelimit import request_weight, retry_after, weight_limiter
+
+# layout written by market_data/datagenerator
+MARKET_DATA_PATH = 'market_data/{symbol}/{interval}?{start}?{end}.txt'
+MARKET_DATA_HEADER = 'Date,Open,High,Low,Close,Volume\n'
+
+# open ended files kept current by sync, with the ranges the exchange has no klines for in a sidecar file
+SYNC_PATH = 'market_data/{symbol}/{interval}.txt'
+SYNC_STATE_SUFFIX = '.sync'
+
+KLINES_LIMIT = 500
+
+
+class KlineDownloader(object):
+
+    def __init__(self, api_url=Client.API_URL, workers=8, limiter=None, path=MARKET_DATA_PATH, retries=5,
+                 timeout=10, sync_path=SYNC_PATH):
+        """Download the klines of many symbols concurrently
+
+        Every symbol's date range is cut into pages of 500 klines which are all
+        requested in parallel over one pooled session. Requests are throttled by
+        a token bucket of request weight, kept in line with the used weight the
+        server reports, instead of fixed sleeps.
+
+        :param api_url: optional - base url of the REST api, e.g a local test server
+        :type api_url: str
+        :param workers: optional - number of requests in flight
+        :type workers: int
+        :param limiter: optional - TokenBucket throttling the requests, default the process wide weight_limiter.
+            False disables throttling
+        :type limiter: TokenBucket
+        :param path: optional - output file format with symbol, interval, start and end fields
+        :type path: str
+        :param retries: optional - number of retries of a page answered with 429 or 418
+        :type retries: int
+        :param sync_path: optional - format of the files kept current by sync, with symbol and interval fields
+        :type sync_path: str
+
+        """
+        self.api_url = api_url
+        self.workers = workers
+        self.limiter = weight_limiter if limiter is None else limiter
+        self.path = path
+        self.retries = retries
+        self.timeout = timeout
+        self.sync_path = sync_path
+        self.session = self._init_session()
+
+    def _init_session(self):
+        session = requests.session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept': 'application/json',
+                                'User-Agent': 'binance/python'})
+        return session
+
+    def _get_klines(self, symbol, interval, start_ts, end_ts, limit=KLINES_LIMIT):
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit, 'startTime': start_ts, 'endTime': end_ts}
+        uri = self.api_url + '/' + Client.PUBLIC_API_VERSION + '/klines'
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.acquire(request_weight('klines', params))
+            response = self.session.get(uri, params=params, timeout=self.timeout)
+            if self.limiter:
+                self.limiter.sync_headers(response.headers)
+
+            if response.status_code in (418, 429) and attempt < self.retries:
+                # rate limited or banned, hold every request back as long as the server asks
+                wait = retry_after(response.headers, 2 ** attempt)
+                if self.limiter:
+                    self.limiter.block(wait)
+                else:
+                    time.sleep(wait)
+                attempt += 1
+                continue
+            if not str(response.status_code).startswith('2'):
+                raise BinanceAPIException(response)
+            try:
+                return response.json()
+            except ValueError:
+                raise BinanceRequestException('Invalid Response: %s' % response.text)
+
+    def _first_open_time(self, symbol, interval, start_ts, end_ts):
+        # the symbol may have been listed after start_ts, ask for the first kline of the range
+        klines = self._get_klines(symbol, interval, start_ts, end_ts, limit=1)
+        return klines[0][0] if klines else None
+
+    @staticmethod
+    def _pages(start_ts, end_ts, timeframe):
+        span = KLINES_LIMIT * timeframe
+        return [(page, min(page + span - 1, end_ts)) for page in range(start_ts, end_ts + 1, span)]
+
+    def fetch(self, symbols, interval, start_str, end_str=None):
+        """Get the klines of every symbol
+
+        See dateparse docs for valid start and end string formats http://dateparser.readthedocs.io/en/latest/
+
+        :param symbols: list of symbols e.g ['ETHBTC', 'LTCBTC']
+        :type symbols: list
+        :param interval: Binance kline interval e.g 1h
+        :type interval: str
+        :param start_str: Start date string in UTC format
+        :type start_str: str
+        :param end_str: optional - end date string in UTC format, default now
+        :type end_str: str
+
+        :return: generator of (symbol, klines) in symbols order, klines in the get_historical_klines format
+
+        """
+        timeframe = interval_to_milliseconds(interval)
+        if timeframe is None:
+            raise ValueError('Unsupported interval {}'.format(interval))
+        start_ts = date_to_milliseconds(start_str)
+        end_ts = date_to_milliseconds(end_str) if end_str else int(time.time() * 1000)
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            firsts = pool.map(lambda symbol: self._first_open_time(symbol, interval, start_ts, end_ts), symbols)
+            pages = []
+            for symbol, first in zip(symbols, list(firsts)):
+                ranges = self._pages(first, end_ts, timeframe) if first is not None else []
+                pages.append([pool.submit(self._get_klines, symbol, interval, start, end)
+                              for start, end in ranges])
+
+            for symbol, futures in zip(symbols, pages):
+                yield symbol, [kline for future in futures for kline in future.result()]
+
+    def download(self, symbols, interval, start_str, end_str, callback=None):
+        """Download the klines of every symbol into the market_data layout
+
+        Each file is written to a temporary name and moved in place once complete.
+
+        :param callback: optional - function called with (symbol, path, number of klines) as every file is written
+        :type callback: function
+
+        :return: dict of symbol to written path
+
+        """
+        paths = {}
+        for symbol, klines in self.fetch(symbols, interval, start_str, end_str):
+            path = self.path.format(symbol=symbol, interval=interval, start=start_str, end=end_str)
+            write_klines(path, klines)
+            paths[symbol] = path
+            if callback:
+                callback(symbol, path, len(klines))
+        return paths
+
+    def _snapshot_paths(self, symbol, interval):
+        # the files of every date range download wrote for a symbol and interval
+        pattern = glob.escape(self.path.format(symbol=symbol, interval=interval, start='\0', end='\0'))
+        return sorted(path for path in glob.glob(pattern.replace('\0', '*'))
+                      if path != self.sync_path.format(symbol=symbol, interval=interval))
+
+    def _plan_sync(self, symbol, interval, start_ts, end_ts, timeframe):
+        # work out what a symbol's sync file lacks: the open time to extend it from and the gaps to backfill
+        path = self.sync_path.format(symbol=symbol, interval=interval)
+        holes = read_sync_state(path)
+        rows, first, last = scan_klines(path)
+        if not rows:
+            # carry on from the files download wrote rather than getting their klines again
+            snapshots = self._snapshot_paths(symbol, interval)
+            if snapshots:
+                seed_klines(path, snapshots)
+                rows, first, last = scan_klines(path)
+
+        if not rows:
+            first = self._first_open_time(symbol, interval, start_ts, end_ts)
+            if first is not None and first > start_ts:
+                # not listed yet at start_ts, don't look for klines there again
+                holes.append([start_ts, first - timeframe])
+            return path, holes, first, []
+
+        gaps = []
+        if first - timeframe >= start_ts:
+            gaps.append((start_ts, first - timeframe))
+        if rows != (last - first) // timeframe + 1:
+            gaps += find_gaps(read_open_times(path), timeframe)
+        gaps = [gap for gap in gaps if not any(hole[0] <= gap[0] and gap[1] <= hole[1] for hole in holes)]
+        tail = last + timeframe if last + timeframe <= end_ts else None
+        return path, holes, tail, gaps
+
+    def sync(self, symbols, interval, start_str, end_str=None, callback=None):
+        """Bring the sync file of every symbol up to date, fetching only the klines it lacks
+
+        A new sync file starts from the klines of the files download wrote
+        for the symbol and interval, if any. The last stored open time of each
+        file is read from its end, the klines after it are requested and
+        appended page by page. Only closed
+        klines are stored and a page is written in one flushed append, a file
+        cut short by a crash is trimmed to its last complete line and the next
+        sync carries on from there. Missing klines inside the file or before
+        its first one are requested too and merged into a rewritten copy which
+        replaces the file. Ranges the exchange has no klines for, e.g before
+        the listing or during maintenance, are remembered and not asked again.
+
+        Keeping a file current costs one request per 500 new klines.
+
+        :param symbols: list of symbols e.g ['ETHBTC', 'LTCBTC']
+        :type symbols: list
+        :param interval: Binance kline interval e.g 1h
+        :type interval: str
+        :param start_str: Start date string in UTC format, where a new file begins
+        :type start_str: str
+        :param end_str: optional - end date string in UTC format, default now
+        :type end_str: str
+        :param callback: optional - function called with (symbol, path, number of klines added) as every file
+            is synced
+        :type callback: function
+
+        :return: dict of symbol to number of klines added
+
+        """
+        timeframe = interval_to_milliseconds(interval)
+        if timeframe is None:
+            raise ValueError('Unsupported interval {}'.format(interval))
+        start_ts = date_to_milliseconds(start_str)
+        now = int(time.time() * 1000)
+        end_ts = min(date_to_milliseconds(end_str), now) if end_str else now
+
+        added = {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            plans = list(pool.map(lambda symbol: self._plan_sync(symbol, interval, start_ts, end_ts, timeframe),
+                                  symbols))
+            pending = []
+            for symbol, (path, holes, tail, gaps) in zip(symbols, plans):
+                ranges = self._pages(tail, end_ts, timeframe) if tail is not None else []
+                tail_pages = [pool.submit(self._get_klines, symbol, interval, start, end) for start, end in ranges]
+                gap_pages = [[pool.submit(self._get_klines, symbol, interval, start, end)
+                              for start, end in self._pages(gap[0], gap[1], timeframe)] for gap in gaps]
+                pending.append((tail_pages, gap_pages))
+
+            for symbol, (path, holes, tail, gaps), (tail_pages, gap_pages) in zip(symbols, plans, pending):
+                count = 0
+                for future in tail_pages:
+                    # the last kline is still open until its close time
+                    klines = [kline for kline in future.result() if kline[6] < now]
+                    append_klines(path, klines)
+                    count += len(klines)
+
+                backfill = []
+                for gap, futures in zip(gaps, gap_pages):
+                    klines = [kline for future in futures for kline in future.result()]
+                    if klines:
+                        backfill += klines
+                    else:
+                        holes.append(list(gap))
+                if backfill:
+                    merge_klines(path, backfill)
+                    count += len(backfill)
+                if len(holes) != len(read_sync_state(path)):
+                    write_sync_state(path, holes)
+
+                added[symbol] = count
+                if callback:
+                    callback(symbol, path, count)
+        return added
+
+    def close(self):
+        self.session.close()
+
+
+def format_kline(kline):
+    """Format a kline as a market_data line, open time as a UTC date followed by the other fields"""
+    date = datetime.utcfromtimestamp(kline[0] // 1000).strftime('%Y-%m-%d %H:%M:%S')
+    return date + ',' + ','.join(str(field) for field in kline[1:]) + '\n'
+
+
+def write_klines(path, klines):
+    """Write klines to a market_data file, atomically replacing any previous one"""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(MARKET_DATA_HEADER)
+        f.writelines(format_kline(kline) for kline in klines)
+    os.replace(tmp, path)
+
+
+def _line_open_time(line):
+    d = datetime.strptime(line[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    return int(d.timestamp()) * 1000
+
+
+def _repair_klines(path):
+    # drop the partial line a crash may have left at the end, an append never leaves more than one
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        offset = max(size - 4096, 0)
+        f.seek(offset)
+        tail = f.read()
+        if tail.endswith(b'\n'):
+            return
+        end = offset + tail.rfind(b'\n') + 1
+        if end >= len(MARKET_DATA_HEADER):
+            f.truncate(end)
+        else:
+            # not even the header made it
+            f.seek(0)
+            f.truncate()
+            f.write(MARKET_DATA_HEADER.encode())
+
+
+def scan_klines(path):
+    """Number of klines and first and last open time in ms of a market_data file, read from its ends
+
+    A partial last line left by an interrupted append is removed first.
+
+    :return: (rows, first, last), first and last None when there are no klines
+
+    """
+    if not os.path.exists(path):
+        return 0, None, None
+    _repair_klines(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        first = f.readline()
+        if not first:
+            return 0, None, None
+        rows = 1 + sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+        size = f.tell()
+        f.seek(max(size - 4096, start))
+        last = f.read().splitlines()[-1]
+    return rows, _line_open_time(first.decode()), _line_open_time(last.decode())
+
+
+def seed_klines(path, sources):
+    """Write the klines of market_data files into a new one, sorted and once each, atomically
+
+    :param path: file to write
+    :type path: str
+    :param sources: market_data files, e.g of overlapping date ranges
+    :type sources: list
+
+    """
+    lines = {}
+    for source in sources:
+        with open(source, 'r') as f:
+            next(f, None)
+            for line in f:
+                # a line cut short has no newline
+                if line.endswith('\n'):
+                    lines.setdefault(line[:19], line)
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(MARKET_DATA_HEADER)
+        f.writelines(lines[date] for date in sorted(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_open_times(path):
+    """Open times in ms of the klines of a market_data file as an int64 array"""
+    with open(path, 'r') as f:
+        next(f)
+        dates = [line[:19] for line in f]
+    return np.array(dates, dtype='datetime64[ms]').astype(np.int64)
+
+
+def find_gaps(open_times, timeframe):
+    """Ranges of missing open times (first, last) between sorted open times"""
+    steps = np.flatnonzero(np.diff(open_times) > timeframe)
+    return [(int(open_times[i]) + timeframe, int(open_times[i + 1]) - timeframe) for i in steps]
+
+
+def append_klines(path, klines):
+    """Append klines to a market_data file in one flushed write, creating it if needed"""
+    if not klines:
+        return
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    new = not os.path.exists(path)
+    with open(path, 'a') as f:
+        f.write((MARKET_DATA_HEADER if new else '') + ''.join(format_kline(kline) for kline in klines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def merge_klines(path, klines):
+    """Insert klines into a market_data file at their place, atomically replacing it
+
+    Klines already in the file are kept as they are.
+
+    """
+    klines = sorted(klines, key=lambda kline: kline[0])
+    tmp = path + '.tmp'
+    i = 0
+    with open(path, 'r') as src, open(tmp, 'w') as f:
+        f.write(next(src))
+        for line in src:
+            open_time = _line_open_time(line)
+            while i < len(klines) and klines[i][0] <= open_time:
+                if klines[i][0] < open_time:
+                    f.write(format_kline(klines[i]))
+                i += 1
+            f.write(line)
+        f.writelines(format_kline(kline) for kline in klines[i:])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_sync_state(path):
+    """Ranges [first, last] of open times the exchange has no klines for, recorded by sync for path"""
+    try:
+        with open(path + SYNC_STATE_SUFFIX, 'r') as f:
+            return json.load(f)['holes']
+    except (IOError, ValueError, KeyError):
+        return []
+
+
+def write_sync_state(path, holes):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp = path + SYNC_STATE_SUFFIX + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'holes': holes}, f)
+    os.replace(tmp, path + SYNC_STATE_SUFFIX)
+
+
+def download_klines(symbols, interval, start_str, end_str, callback=None, **kwargs):
+    """Download the klines of many symbols into the market_data layout
+
+    .. code-block:: python
+
+        download_klines(['ETHBTC', 'LTCBTC'], '1h', '09-01-2017', '01-01-2018')
+
+    :param callback: optional - function called with (symbol, path, number of klines) as every file is written
+    :type callback: function
+    :param kwargs: optional - KlineDownloader arguments
+
+    :return: dict of symbol to written path
+
+    """
+    downloader = KlineDownloader(**kwargs)
+    try:
+        return downloader.download(symbols, interval, start_str, end_str, callback)
+    finally:
+        downloader.close()
+
+
+def sync_klines(symbols, interval, start_str, end_str=None, callback=None, **kwargs):
+    """Bring the sync files of many symbols up to date, see KlineDownloader.sync
+
+    .. code-block:: python
+
+        sync_klines(['ETHBTC', 'LTCBTC'], '1h', '09-01-2017')
+
+    :param kwargs: optional - KlineDownloader arguments
+
+    :return: dict of symbol to number of klines added
+
+    """
+    downloader = KlineDownloader(**kwargs)
+    try:
+        return downloader.sync(symbols, interval, start_str, end_str, callback)
+    finally:
+        downloader.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bring market_data sync files up to date')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--interval', default='1h')
+    parser.add_argument('--start', default='09-01-2017', help='where new files begin')
+    parser.add_argument('--end', default=None, help='default now')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    sync_klines(args.symbols, args.interval, args.start, args.end, workers=args.workers,
+                callback=lambda symbol, path, count: print(symbol, path, count))
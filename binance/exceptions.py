@@ -1,21 +1,25 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import json
+
 
 class BinanceAPIException(Exception):
 
     LISTENKEY_NOT_EXIST = '-1125'
 
-    def __init__(self, response):
+    def __init__(self, response, status_code=None, text=None):
+        self.code = 0
         self.status_code = 0
+        text = response.text if text is None else text
         try:
-            json_res = response.json()
+            json_res = json.loads(text)
         except ValueError:
-            self.message = 'Invalid JSON error message from Binance: {}'.format(response.text)
+            self.message = 'Invalid JSON error message from Binance: {}'.format(text)
         else:
             self.code = json_res['code']
             self.message = json_res['msg']
-        self.status_code = response.status_code
+        self.status_code = response.status_code if status_code is None else status_code
         self.response = response
         self.request = getattr(response, 'request', None)
 
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from decimal import Decimal, ROUND_DOWN
+import threading
+import time
+
+
+class SymbolFilters(object):
+
+    def __init__(self, filters):
+        """Trading filters of a symbol parsed into Decimals
+
+        :param filters: filters list of the symbol in exchangeInfo
+        :type filters: list
+
+        """
+        self.raw = {f['filterType']: f for f in filters}
+
+        price = self.raw.get('PRICE_FILTER', {})
+        self.min_price = Decimal(price.get('minPrice', '0'))
+        self.max_price = Decimal(price.get('maxPrice', '0'))
+        self.tick_size = Decimal(price.get('tickSize', '0'))
+
+        lot = self.raw.get('LOT_SIZE', {})
+        self.min_qty = Decimal(lot.get('minQty', '0'))
+        self.max_qty = Decimal(lot.get('maxQty', '0'))
+        self.step_size = Decimal(lot.get('stepSize', '0'))
+
+        self.min_notional = Decimal(self.raw.get('MIN_NOTIONAL', {}).get('minNotional', '0'))
+
+    @staticmethod
+    def _round_down(value, step):
+        value = Decimal(str(value))
+        if not step:
+            return value
+        return (value / step).to_integral_value(ROUND_DOWN) * step
+
+    def round_price(self, price):
+        """Round a price down to the tick size"""
+        return self._round_down(price, self.tick_size)
+
+    def round_quantity(self, quantity):
+        """Round a quantity down to the step size"""
+        return self._round_down(quantity, self.step_size)
+
+    def price_ticks(self, price):
+        """Price as an integer number of ticks"""
+        return int(Decimal(str(price)) / self.tick_size)
+
+    def check(self, price, quantity):
+        """Whether an order of quantity at price passes the price, lot size and min notional filters"""
+        price, quantity = Decimal(str(price)), Decimal(str(quantity))
+        if price < self.min_price or (self.max_price and price > self.max_price):
+            return False
+        if self.tick_size and (price - self.min_price) % self.tick_size:
+            return False
+        if quantity < self.min_qty or (self.max_qty and quantity > self.max_qty):
+            return False
+        if self.step_size and (quantity - self.min_qty) % self.step_size:
+            return False
+        return price * quantity >= self.min_notional
+
+
+class ExchangeInfoCache(object):
+
+    def __init__(self, ttl=60 * 60, stale_while_revalidate=False, clock=time.monotonic):
+        """exchangeInfo held for ttl seconds with its symbols indexed by name
+
+        :param ttl: optional - seconds before the payload is fetched again, None keeps it until invalidated
+        :type ttl: int
+        :param stale_while_revalidate: optional - keep answering from the expired payload while it is
+            refetched in the background instead of waiting for the new one
+        :type stale_while_revalidate: bool
+
+        """
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.info = None
+        self.updated = None
+        self._symbols = {}
+        self._filters = {}
+
+    @property
+    def loaded(self):
+        return self.info is not None
+
+    @property
+    def expired(self):
+        if self.info is None:
+            return True
+        return self.ttl is not None and self._clock() - self.updated >= self.ttl
+
+    def update(self, info):
+        """Replace the cached payload with a freshly fetched exchangeInfo response"""
+        symbols = {item['symbol']: item for item in info['symbols']}
+        filters = {name: SymbolFilters(item.get('filters', [])) for name, item in symbols.items()}
+        with self._lock:
+            self.info = info
+            self._symbols = symbols
+            self._filters = filters
+            self.updated = self._clock()
+            self._refreshing = False
+
+    def invalidate(self):
+        """Drop the payload, the next lookup fetches it again"""
+        with self._lock:
+            self.info = None
+            self.updated = None
+            self._symbols = {}
+            self._filters = {}
+
+    def start_refresh(self):
+        """Claim the background refresh, False if one is already running"""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            return True
+
+    def end_refresh(self):
+        """Release the background refresh claim e.g after a failed fetch"""
+        with self._lock:
+            self._refreshing = False
+
+    def _background_refresh(self, fetch):
+        try:
+            self.update(fetch())
+        finally:
+            self.end_refresh()
+
+    def ensure(self, fetch):
+        """Make sure the payload is usable, fetching it with fetch if needed
+
+        :param fetch: function returning the exchangeInfo response e.g Client.get_exchange_info
+        :type fetch: function
+
+        """
+        if not self.expired:
+            return
+        if self.loaded and self.stale_while_revalidate:
+            if self.start_refresh():
+                threading.Thread(target=self._background_refresh, args=(fetch,), daemon=True).start()
+            return
+        self.update(fetch())
+
+    def symbol(self, symbol):
+        """Return the exchangeInfo entry of a symbol, None if unknown"""
+        return self._symbols.get(symbol.upper())
+
+    def filters(self, symbol):
+        """Return the SymbolFilters of a symbol, None if unknown"""
+        return self._filters.get(symbol.upper())
@@ -1,7 +1,40 @@
-import dateparser
-import pytz
+import re
+from datetime import datetime, timezone
 
-from datetime import datetime
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# dates datetime.fromisoformat reads the same way dateparser does, year first so the day and month can't be swapped
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:\d{2})?$')
+
+# base date to tell apart the phrases relative to now, which must not be cached
+RELATIVE_BASE = datetime(2000, 1, 1)
+
+_date_cache = {}
+# phrases found relative to now, parsed once per call without checking again
+_relative_dates = set()
+_DATE_CACHE_SIZE = 1024
+
+
+def _datetime_to_milliseconds(d):
+    # if the date is not timezone aware apply UTC timezone
+    if d.tzinfo is None or d.tzinfo.utcoffset(d) is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return int((d - EPOCH).total_seconds() * 1000.0)
+
+
+def _parse_date(date_str, relative=False):
+    if ISO_DATE.match(date_str):
+        return _datetime_to_milliseconds(datetime.fromisoformat(date_str)), True
+
+    # dateparser takes most of a second to import, only pay for it with free-form phrases
+    import dateparser
+    d = dateparser.parse(date_str)
+    if d is None:
+        raise ValueError('Unable to parse date {!r}'.format(date_str))
+    if relative:
+        return _datetime_to_milliseconds(d), False
+    absolute = d == dateparser.parse(date_str, settings={'RELATIVE_BASE': RELATIVE_BASE})
+    return _datetime_to_milliseconds(d), absolute
 
 
 def date_to_milliseconds(date_str):
@@ -9,21 +42,33 @@ def date_to_milliseconds(date_str):
 
     If using offset strings add "UTC" to date string e.g. "now UTC", "11 hours ago UTC"
 
-    See dateparse docs for formats http://dateparser.readthedocs.io/en/latest/
+    ISO 8601 dates e.g "2018-01-01" or "2018-01-01 12:00:00" are read directly, other strings are
+    parsed with dateparser, see its docs for formats http://dateparser.readthedocs.io/en/latest/
+    Strings naming a fixed date are converted once and cached, phrases relative to now are parsed again on
+    every call.
 
-    :param date_str: date in readable format, i.e. "January 01, 2018", "11 hours ago UTC", "now UTC"
-    :type date_str: str
+    :param date_str: date in readable format, i.e. "January 01, 2018", "11 hours ago UTC", "now UTC",
+        a datetime, UTC if not timezone aware, or milliseconds since epoch
+    :type date_str: str, datetime or int
     """
-    # get epoch value in UTC
-    epoch = datetime.utcfromtimestamp(0).replace(tzinfo=pytz.utc)
-    # parse our date string
-    d = dateparser.parse(date_str)
-    # if the date is not timezone aware apply UTC timezone
-    if d.tzinfo is None or d.tzinfo.utcoffset(d) is None:
-        d = d.replace(tzinfo=pytz.utc)
+    if isinstance(date_str, int):
+        return date_str
+    if isinstance(date_str, datetime):
+        return _datetime_to_milliseconds(date_str)
 
-    # return the difference in time
-    return int((d - epoch).total_seconds() * 1000.0)
+    ms = _date_cache.get(date_str)
+    if ms is None:
+        relative = date_str in _relative_dates
+        ms, absolute = _parse_date(date_str, relative)
+        if absolute:
+            if len(_date_cache) >= _DATE_CACHE_SIZE:
+                _date_cache.clear()
+            _date_cache[date_str] = ms
+        elif not relative:
+            if len(_relative_dates) >= _DATE_CACHE_SIZE:
+                _relative_dates.clear()
+            _relative_dates.add(date_str)
+    return ms
 
 
 def interval_to_milliseconds(interval):
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import os
+
+import numpy as np
+
+# one record per kline, the fields of the REST response without the trailing "ignore", named as the columns of
+# backtesting.datacache so a decoded array can back a Dataset as is
+KLINE_DTYPE = np.dtype([
+    ('datetime', '<i8'),            # open time in ms
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('close_time', '<i8'),          # close time in ms
+    ('quote_volume', '<f8'),
+    ('trades', '<i8'),
+    ('taker_base_volume', '<f8'),
+    ('taker_quote_volume', '<f8'),
+])
+
+
+def decode_klines(klines):
+    """Decode a page of klines as returned by get_klines into a structured array of KLINE_DTYPE
+
+    The numeric strings are converted by NumPy column by column, no Python float is created.
+
+    :param klines: list of klines
+    :type klines: list
+
+    """
+    records = np.empty(len(klines), dtype=KLINE_DTYPE)
+    if klines:
+        fields = list(zip(*klines))
+        for i, name in enumerate(KLINE_DTYPE.names):
+            records[name] = fields[i]
+    return records
+
+
+class KlineBuffer(object):
+
+    def __init__(self, capacity=1024):
+        """Growable structured array of klines
+
+        Pages are decoded into a preallocated array which doubles when full, so
+        appending stays amortized O(1) and no list of Python objects is kept.
+
+        :param capacity: optional - number of klines to allocate up front
+        :type capacity: int
+
+        """
+        self._records = np.empty(capacity, dtype=KLINE_DTYPE)
+        self.size = 0
+
+    def append(self, klines):
+        """Decode a page of klines at the end of the buffer"""
+        self.extend(decode_klines(klines))
+
+    def extend(self, records):
+        """Copy structured records of KLINE_DTYPE at the end of the buffer"""
+        end = self.size + len(records)
+        if end > len(self._records):
+            grown = np.empty(max(end, 2 * len(self._records)), dtype=KLINE_DTYPE)
+            grown[:self.size] = self._records[:self.size]
+            self._records = grown
+        self._records[self.size:end] = records
+        self.size = end
+
+    @property
+    def array(self):
+        """Klines appended so far, a view on the buffer"""
+        return self._records[:self.size]
+
+    def __len__(self):
+        return self.size
+
+
+class KlineFile(object):
+
+    def __init__(self, path):
+        """Binary file of KLINE_DTYPE records written page by page
+
+        Records go to a temporary file which replaces path on close, an
+        interrupted download never leaves a partial file behind. Read it back
+        with load_klines.
+
+        .. code-block:: python
+
+            with KlineFile('market_data/ETHBTC/1m.klines') as f:
+                for page in pages:
+                    f.append(page)
+
+        :param path: output path
+        :type path: str
+
+        """
+        self.path = path
+        self.size = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._tmp = path + '.tmp'
+        self._file = open(self._tmp, 'wb')
+
+    def append(self, klines):
+        """Decode a page of klines and write it out"""
+        self.extend(decode_klines(klines))
+
+    def extend(self, records):
+        """Write structured records of KLINE_DTYPE"""
+        records.tofile(self._file)
+        self.size += len(records)
+
+    def close(self):
+        """Flush the records and move the file in place"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Drop the records written so far"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def load_klines(path):
+    """Memory-map a file written by KlineFile
+
+    :return: read only structured array of KLINE_DTYPE
+
+    """
+    if not os.path.getsize(path):
+        return np.empty(0, dtype=KLINE_DTYPE)
+    return np.memmap(path, dtype=KLINE_DTYPE, mode='r')
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import asyncio
+import threading
+import time
+
+
+def _depth_weight(params):
+    limit = int(params.get('limit', 100))
+    if limit <= 100:
+        return 1
+    return 5 if limit <= 500 else 10
+
+
+def _all_symbols_weight(params):
+    # the endpoint returns every symbol when none is given
+    return 1 if params.get('symbol') else 40
+
+
+# request weight of the REST endpoints, a number or a function of the request params, 1 when not listed
+ENDPOINT_WEIGHTS = {
+    'depth': _depth_weight,
+    'historicalTrades': 5,
+    'ticker/24hr': _all_symbols_weight,
+    'openOrders': _all_symbols_weight,
+    'allOrders': 5,
+    'account': 5,
+    'myTrades': 5,
+}
+
+USED_WEIGHT_HEADERS = ('X-MBX-USED-WEIGHT-1M', 'X-MBX-USED-WEIGHT')
+
+
+def request_weight(path, params=None):
+    """Weight Binance counts for a request
+
+    :param path: endpoint path after the version e.g depth or ticker/24hr
+    :type path: str
+    :param params: optional - request params
+    :type params: dict
+
+    """
+    weight = ENDPOINT_WEIGHTS.get(path, 1)
+    if callable(weight):
+        weight = weight(dict(params or {}))
+    return weight
+
+
+def retry_after(headers, default=1.0):
+    """Seconds a 429 or 418 response asks to wait before the next request"""
+    try:
+        return float(headers['Retry-After'])
+    except (KeyError, ValueError):
+        return default
+
+
+class TokenBucket(object):
+
+    def __init__(self, capacity=1200, period=60.0, clock=time.monotonic, sleep=time.sleep):
+        """Thread safe token bucket of Binance request weight
+
+        The bucket holds capacity weight and refills it evenly over period
+        seconds, by default the 1200 weight per minute Binance allows.
+
+        :param capacity: optional - weight available per period
+        :type capacity: int
+        :param period: optional - seconds for the bucket to refill completely
+        :type period: float
+
+        """
+        self.capacity = capacity
+        self.period = period
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.blocks = 0
+        self.used_weight = None
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.capacity / self.period)
+            self._updated = now
+
+    def _take(self, weight):
+        # take weight if available, otherwise return the seconds to wait before trying again
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now >= self._blocked_until and self._tokens >= weight:
+                self._tokens -= weight
+                self.acquired += weight
+                return None
+            return max(self._blocked_until - now, (weight - self._tokens) * self.period / self.capacity)
+
+    def _waited(self, waited):
+        if waited:
+            with self._lock:
+                self.waits += 1
+                self.wait_time += waited
+        return waited
+
+    def acquire(self, weight=1):
+        """Take weight from the bucket, waiting until it is available
+
+        :param weight: weight of the request about to be sent
+        :type weight: int
+
+        :return: seconds spent waiting
+
+        """
+        weight = min(weight, self.capacity)
+        waited = 0.0
+        wait = self._take(weight)
+        while wait is not None:
+            self._sleep(wait)
+            waited += wait
+            wait = self._take(weight)
+        return self._waited(waited)
+
+    async def acquire_async(self, weight=1):
+        """acquire for asyncio code, waits without blocking the event loop"""
+        weight = min(weight, self.capacity)
+        waited = 0.0
+        wait = self._take(weight)
+        while wait is not None:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self._take(weight)
+        return self._waited(waited)
+
+    def sync(self, used_weight):
+        """Align the bucket with the weight the server reports as used in the current window
+
+        :param used_weight: value of the X-MBX-USED-WEIGHT response header
+        :type used_weight: int
+
+        """
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, max(self.capacity - used_weight, 0))
+            self.used_weight = used_weight
+
+    def sync_headers(self, headers):
+        """Sync with the used weight header of a response if it has one"""
+        for name in USED_WEIGHT_HEADERS:
+            if name in headers:
+                self.sync(int(headers[name]))
+                return
+
+    def block(self, seconds):
+        """Refuse every acquire for the next seconds e.g after a 429 with Retry-After"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+            self.blocks += 1
+
+    @property
+    def available(self):
+        """Weight that can be acquired right now"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return 0.0 if now < self._blocked_until else self._tokens
+
+    def stats(self):
+        """Return the headroom and counters as a dict"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return {
+                'capacity': self.capacity,
+                'available': 0.0 if now < self._blocked_until else self._tokens,
+                'blocked_for': max(self._blocked_until - now, 0.0),
+                'used_weight': self.used_weight,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'blocks': self.blocks,
+            }
+
+
+# process wide bucket shared by every client, Binance counts the weight per IP
+weight_limiter = TokenBucket()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from collections import namedtuple
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from .decoders import loads
+
+# a record is its length then receive time in ns, exchange event time in ms (-1 if the message has none),
+# the length of the stream name, the stream name and the raw message
+RECORD_HEADER = struct.Struct('<IqqH')
+
+# records are compressed in blocks, each one preceded by its compressed length, uncompressed length,
+# number of records and first and last receive time
+BLOCK_HEADER = struct.Struct('<IIIqq')
+
+# one entry per block in the index of the directory: segment, offset of the block, number of records and first
+# and last receive time
+INDEX_ENTRY = struct.Struct('<qqIqq')
+
+INDEX_FILE = 'index.bin'
+SEGMENT_FORMAT = '{:020d}.seg'
+
+Record = namedtuple('Record', ('recv_time', 'stream', 'event_time', 'payload'))
+
+
+def _event_time(msg):
+    # exchange event time of a decoded message, of the first event of an array
+    if isinstance(msg, dict):
+        if 'data' in msg and 'stream' in msg:
+            msg = msg['data']
+        if isinstance(msg, dict):
+            return msg.get('E', -1)
+        return getattr(msg, 'event_time', -1)
+    if isinstance(msg, list):
+        return _event_time(msg[0]) if msg else -1
+    return getattr(msg, 'event_time', -1)
+
+
+class StreamRecorder(object):
+
+    def __init__(self, directory, block_size=256 * 1024, segment_size=256 * 1024 * 1024, segment_seconds=60 * 60,
+                 flush_interval=1.0, level=1):
+        """Append-only recorder of websocket messages
+
+        Every message is kept as received with its receive time, stream name
+        and exchange event time. Records are gathered into blocks which a
+        background thread compresses with zlib and appends to the current
+        segment file, a new segment is started once it is segment_size bytes
+        or segment_seconds old. Every block is listed in an index of the
+        directory by time, so read_records seeks straight to a time range.
+        The socket thread only copies the message into the current block.
+
+        .. code-block:: python
+
+            recorder = StreamRecorder('recordings/depth')
+            bm = BinanceSocketManager(client, recorder=recorder)
+            bm.start_multiplex_socket(['bnbbtc@depth', 'ethbtc@depth'], process_depth)
+            ...
+            bm.close()
+            recorder.close()
+
+        :param directory: directory of the segment and index files, created if needed
+        :type directory: str
+        :param block_size: optional - uncompressed bytes of records compressed together
+        :type block_size: int
+        :param segment_size: optional - compressed bytes after which a new segment file is started
+        :type segment_size: int
+        :param segment_seconds: optional - seconds after which a new segment file is started
+        :type segment_seconds: int
+        :param flush_interval: optional - seconds after which a partial block is written out anyway
+        :type flush_interval: float
+        :param level: optional - zlib compression level
+        :type level: int
+
+        """
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.block_size = block_size
+        self.segment_size = segment_size
+        self.segment_seconds = segment_seconds
+        self.flush_interval = flush_interval
+        self.level = level
+
+        self._lock = threading.Lock()
+        self._block = bytearray()
+        self._count = 0
+        self._first = None
+        self._last = None
+        self._blocks = queue.Queue()
+        self._segment = None
+        self._segment_file = None
+        self._index = open(os.path.join(directory, INDEX_FILE), 'ab')
+        # drop an entry cut short by a crash so the new entries stay aligned
+        self._index.truncate(self._index.tell() - self._index.tell() % INDEX_ENTRY.size)
+        self.closed = False
+
+        self.records = 0
+        self.bytes = 0
+        self.compressed_bytes = 0
+        self.blocks = 0
+        self.segments = 0
+        self.write_time = 0.0
+
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+
+    def record(self, stream, payload, msg=None):
+        """Record a message
+
+        :param stream: stream name e.g bnbbtc@depth, the stream of a multiplexed event is used instead
+        :type stream: str
+        :param payload: message as received
+        :type payload: bytes
+        :param msg: optional - decoded message the event time is read from
+        :type msg: dict
+
+        """
+        now = time.time_ns()
+        if isinstance(msg, dict) and 'stream' in msg and 'data' in msg:
+            stream = msg['stream']
+        name = stream.encode()
+        header = RECORD_HEADER.pack(RECORD_HEADER.size - 4 + len(name) + len(payload), now,
+                                    _event_time(msg) if msg is not None else -1, len(name))
+        with self._lock:
+            if self.closed:
+                return
+            self._block += header
+            self._block += name
+            self._block += payload
+            self._count += 1
+            if self._first is None:
+                self._first = now
+            self._last = now
+            if len(self._block) >= self.block_size:
+                self._hand_off()
+
+    def wrap(self, callback, stream):
+        """Record the messages of a callback before passing them on, for sockets of a manager without recorder
+
+        The decoded message is serialized back to json.
+
+        :param callback: function to call with the messages, None to only record them
+        :type callback: function
+        :param stream: stream name to record them under
+        :type stream: str
+
+        :returns: function to pass as the socket callback
+
+        """
+        def record(msg):
+            self.record(stream, json.dumps(msg, separators=(',', ':')).encode(), msg)
+            if callback:
+                callback(msg)
+        return record
+
+    def _hand_off(self):
+        # called with the lock held, queue the current block for the writer thread
+        if self._count:
+            self._blocks.put((bytes(self._block), self._count, self._first, self._last))
+            self._block = bytearray()
+            self._count = 0
+            self._first = None
+            self._last = None
+
+    def flush(self):
+        """Queue the records of the current block to be written out"""
+        with self._lock:
+            self._hand_off()
+
+    def _open_segment(self, first):
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._segment = first
+        self._segment_file = open(os.path.join(self.directory, SEGMENT_FORMAT.format(first)), 'ab')
+        self.segments += 1
+
+    def _write_block(self, data, count, first, last):
+        start = time.perf_counter()
+        if (self._segment_file is None or self._segment_file.tell() >= self.segment_size or
+                first - self._segment >= self.segment_seconds * 10 ** 9):
+            self._open_segment(first)
+        compressed = zlib.compress(data, self.level)
+        offset = self._segment_file.tell()
+        self._segment_file.write(BLOCK_HEADER.pack(len(compressed), len(data), count, first, last))
+        self._segment_file.write(compressed)
+        self._segment_file.flush()
+        # the block is complete before the index points to it
+        self._index.write(INDEX_ENTRY.pack(self._segment, offset, count, first, last))
+        self._index.flush()
+
+        self.records += count
+        self.bytes += len(data)
+        self.compressed_bytes += len(compressed)
+        self.blocks += 1
+        self.write_time += time.perf_counter() - start
+
+    def _run(self):
+        while True:
+            try:
+                block = self._blocks.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+                continue
+            if block is None:
+                return
+            self._write_block(*block)
+
+    def stats(self):
+        """Return the counters of the records written so far as a dict"""
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'compressed_bytes': self.compressed_bytes,
+            'blocks': self.blocks,
+            'segments': self.segments,
+            'pending_blocks': self._blocks.qsize(),
+            'write_time': self.write_time,
+        }
+
+    def close(self):
+        """Write out every record and close the files"""
+        with self._lock:
+            self._hand_off()
+            self.closed = True
+        self._blocks.put(None)
+        self._writer.join()
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._index.close()
+
+
+def read_index(directory):
+    """Blocks listed in the index of a recording directory
+
+    :returns: list of (segment, offset, records, first receive time, last receive time)
+
+    """
+    with open(os.path.join(directory, INDEX_FILE), 'rb') as f:
+        data = f.read()
+    # an entry cut short by a crash is ignored
+    end = len(data) - len(data) % INDEX_ENTRY.size
+    return list(INDEX_ENTRY.iter_unpack(data[:end]))
+
+
+def _read_block(f, offset):
+    f.seek(offset)
+    compressed_size, size, count, first, last = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+    data = zlib.decompress(f.read(compressed_size))
+    pos = 0
+    while pos < size:
+        length, recv_time, event_time, name_size = RECORD_HEADER.unpack_from(data, pos)
+        name_start = pos + RECORD_HEADER.size
+        payload_start = name_start + name_size
+        pos += 4 + length
+        yield Record(recv_time, data[name_start:payload_start].decode(), event_time, data[payload_start:pos])
+
+
+def read_records(directory, start=None, end=None, streams=None, decode=False):
+    """Replay the records of a recording directory in receive order
+
+    Only the blocks overlapping the time range are read, found with the index.
+
+    :param directory: recording directory
+    :type directory: str
+    :param start: optional - first receive time in ns
+    :type start: int
+    :param end: optional - last receive time in ns
+    :type end: int
+    :param streams: optional - stream names to keep
+    :type streams: list
+    :param decode: optional - yield the payloads parsed from json
+    :type decode: bool
+
+    :returns: generator of Record
+
+    """
+    streams = set(streams) if streams else None
+    files = {}
+    try:
+        for segment, offset, count, first, last in read_index(directory):
+            if (start is not None and last < start) or (end is not None and first > end):
+                continue
+            f = files.get(segment)
+            if f is None:
+                f = files[segment] = open(os.path.join(directory, SEGMENT_FORMAT.format(segment)), 'rb')
+            for record in _read_block(f, offset):
+                if (start is not None and record.recv_time < start) or (end is not None and record.recv_time > end):
+                    continue
+                if streams is not None and record.stream not in streams:
+                    continue
+                if decode:
+                    record = record._replace(payload=loads(record.payload))
+                yield record
+    finally:
+        for f in files.values():
+            f.close()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import BinanceRequestException
+
+
+class TransportResponse(object):
+
+    def __init__(self, status_code, text, headers=None):
+        """Response of a transport with the parts of requests.Response the clients use
+
+        :param status_code: HTTP status
+        :type status_code: int
+        :param text: body of the response
+        :type text: str
+        :param headers: optional - response headers
+        :type headers: dict
+
+        """
+        self.status_code = status_code
+        self.text = text
+        self.headers = CaseInsensitiveDict(headers or {})
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class CallableTransport(object):
+
+    def __init__(self, handler):
+        """Transport answering every request with a function instead of the network
+
+        .. code-block:: python
+
+            def handler(method, url, params):
+                if url.endswith('/klines'):
+                    return 200, klines
+                return 200, {}
+
+            client = Client('', '', transport=CallableTransport(handler))
+
+        :param handler: function called with (method, url, params) returning (status_code, body) or
+            (status_code, body, headers), body a str or any json serializable object
+        :type handler: function
+
+        """
+        self.handler = handler
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        # signed POST/PUT/DELETE calls send the params as form data
+        result = self.handler(method.upper(), url, dict(params or data or []))
+        status_code, body = result[:2]
+        headers = result[2] if len(result) > 2 else None
+        text = body if isinstance(body, str) else json.dumps(body)
+        return TransportResponse(status_code, text, headers)
+
+    def close(self):
+        pass
+
+
+class OfflineTransport(object):
+    """Transport refusing every request, for code that must not reach the network e.g backtests
+
+    .. code-block:: python
+
+        client = Client('', '', transport=OfflineTransport())
+
+    The client is built without pinging, unless lazy=False is passed.
+
+    """
+
+    def request(self, method, url, **kwargs):
+        raise BinanceRequestException('Offline transport, no {} {}'.format(method.upper(), url))
+
+    def close(self):
+        pass
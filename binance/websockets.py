@@ -1,8 +1,8 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-import json
 import threading
+import time
 
 from autobahn.twisted.websocket import WebSocketClientFactory, \
     WebSocketClientProtocol, \
@@ -12,6 +12,7 @@ from twisted.internet.protocol import ReconnectingClientFactory
 from twisted.internet.error import ReactorAlreadyRunning
 
 from binance.client import Client
+from binance.decoders import StreamStats, default_decoder
 
 
 class BinanceClientProtocol(WebSocketClientProtocol):
@@ -22,12 +23,18 @@ class BinanceClientProtocol(WebSocketClientProtocol):
 
     def onMessage(self, payload, isBinary):
         if not isBinary:
+            factory = self.factory
+            start = time.perf_counter()
             try:
-                payload_obj = json.loads(payload.decode('utf8'))
+                payload_obj = factory.decoder.decode(payload)
             except ValueError:
-                pass
+                factory.stats.add_error()
             else:
-                self.factory.callback(payload_obj)
+                decoded = time.perf_counter()
+                if factory.recorder is not None:
+                    factory.recorder.record(factory.path, payload, payload_obj)
+                factory.callback(payload_obj)
+                factory.stats.add(len(payload), decoded - start, time.perf_counter() - decoded)
 
 
 class BinanceReconnectingClientFactory(ReconnectingClientFactory):
@@ -69,14 +76,25 @@ class BinanceSocketManager(threading.Thread):
 
     _user_timeout = 30 * 60  # 30 minutes
 
-    def __init__(self, client):
+    def __init__(self, client, decoder=None, dispatcher=None, recorder=None):
         """Initialise the BinanceSocketManager
 
         :param client: Binance API client
         :type client: binance.Client
+        :param decoder: optional - binance.decoders.MessageDecoder of the messages of every socket, default
+            decodes them to dicts
+        :type decoder: MessageDecoder
+        :param dispatcher: optional - binance.dispatcher.Dispatcher queueing the messages of every socket for its
+            worker threads instead of calling the callbacks from the reactor thread
+        :type dispatcher: Dispatcher
+        :param recorder: optional - binance.recorder.StreamRecorder writing the payloads of every socket to disk
+        :type recorder: StreamRecorder
 
         """
         threading.Thread.__init__(self)
+        self._decoder = decoder or default_decoder
+        self._dispatcher = dispatcher
+        self._recorder = recorder
         self._conns = {}
         self._user_timer = None
         self._user_listen_key = None
@@ -87,10 +105,17 @@ class BinanceSocketManager(threading.Thread):
         if path in self._conns:
             return False
 
+        if self._dispatcher is not None:
+            callback = self._dispatcher.wrap(callback, path)
+
         factory_url = self.STREAM_URL + prefix + path
         factory = BinanceClientFactory(factory_url)
         factory.protocol = BinanceClientProtocol
         factory.callback = callback
+        factory.decoder = self._decoder
+        factory.recorder = self._recorder
+        factory.path = path
+        factory.stats = StreamStats()
         factory.reconnect = True
         context_factory = ssl.ClientContextFactory()
 
@@ -429,6 +454,15 @@ class BinanceSocketManager(threading.Thread):
             self.start_user_socket(self._user_callback)
         self._start_user_timer()
 
+    def get_stats(self):
+        """Get the message counts and per message decode and callback time of every socket
+
+        :returns: dict of connection key to dict with messages, bytes, errors, decode_time, callback_time,
+            decode_us and callback_us
+
+        """
+        return {conn_key: conn.factory.stats.stats() for conn_key, conn in self._conns.items()}
+
     def stop_socket(self, conn_key):
         """Stop a websocket given the connection key
 
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the packages are imported from the tree, as the scripts do
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _repository_root(monkeypatch):
+    # market_data paths are relative to the repository root
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import asyncio
+
+from aiohttp import web
+
+from binance.async_client import AsyncClient
+from binance.klines import load_klines
+
+HOUR = 60 * 60 * 1000
+# the stand-in server has hourly klines from 2018-01-01 until 1200 hours later
+FIRST = 1514764800000
+LAST = FIRST + 1199 * HOUR
+
+
+def kline(open_time):
+    return [open_time, '1.0', '2.0', '0.5', '1.5', '10.0', open_time + HOUR - 1, '15.0', 7, '5.0', '7.5', '0']
+
+
+async def klines(request):
+    query = request.query
+    start = max(int(query['startTime']), FIRST)
+    end = min(int(query.get('endTime', LAST)), LAST)
+    limit = int(query['limit'])
+    open_times = range(-(-start // HOUR) * HOUR, end + 1, HOUR)[:limit]
+    return web.json_response([kline(t) for t in open_times])
+
+
+def run_with_server(test):
+    # run test(client) against a local stand-in of the klines endpoint
+    async def main():
+        app = web.Application()
+        app.router.add_get('/api/v1/klines', klines)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        client = AsyncClient('', '', limiter=False)
+        client.API_URL = 'http://127.0.0.1:%d/api' % port
+        try:
+            return await test(client)
+        finally:
+            await client.close()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_historical_klines_without_end_date():
+    async def test(client):
+        return await client.get_historical_klines('ETHBTC', AsyncClient.KLINE_INTERVAL_1HOUR, '2018-01-01')
+
+    result = run_with_server(test)
+    assert len(result) == 1200
+    assert result[0][0] == FIRST
+    assert result[-1][0] == LAST
+
+
+def test_historical_klines_with_end_date():
+    async def test(client):
+        return await client.get_historical_klines('ETHBTC', AsyncClient.KLINE_INTERVAL_1HOUR, '2018-01-01',
+                                                  '2018-01-02')
+
+    result = run_with_server(test)
+    assert [k[0] for k in result] == list(range(FIRST, FIRST + 25 * HOUR, HOUR))
+
+
+def test_historical_klines_as_array():
+    async def test(client):
+        return await client.get_historical_klines('ETHBTC', AsyncClient.KLINE_INTERVAL_1HOUR, '2018-01-01',
+                                                  as_array=True)
+
+    result = run_with_server(test)
+    assert len(result) == 1200
+    assert result['datetime'][-1] == LAST
+    assert result['trades'][0] == 7
+
+
+def test_download_historical_klines(tmp_path):
+    path = str(tmp_path / 'ETHBTC' / '1h.klines')
+
+    async def test(client):
+        return await client.download_historical_klines(path, 'ETHBTC', AsyncClient.KLINE_INTERVAL_1HOUR,
+                                                       '2018-01-01')
+
+    assert run_with_server(test) == 1200
+    records = load_klines(path)
+    assert list(records['datetime']) == list(range(FIRST, LAST + 1, HOUR))
+    assert records['close'][0] == 1.5
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import asyncio
+import json
+import socket
+
+import websockets
+
+from binance.async_websockets import AsyncSocketManager
+
+
+class StubClient(object):
+    """Stand-in for AsyncClient, logs the user stream calls"""
+
+    def __init__(self):
+        self.calls = []
+        self.active = False
+
+    async def _request(self, *args, **kwargs):
+        pass
+
+    async def stream_get_listen_key(self):
+        await asyncio.sleep(0)
+        self.calls.append(('get', self.active))
+        self.active = True
+        return 'listen-key'
+
+    async def stream_close(self, listenKey):
+        await asyncio.sleep(0.05)
+        self.calls.append(('close', listenKey))
+        self.active = False
+
+
+def run_with_server(test, messages=10):
+    # run test(url) against a local websocket server sending messages numbered trade events on every connection
+    async def handler(ws):
+        for i in range(messages):
+            await ws.send(json.dumps({'e': 'trade', 'E': i}))
+        await ws.close()
+
+    async def main():
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            return await asyncio.wait_for(test('ws://127.0.0.1:%d/' % port), 10)
+    return asyncio.run(main())
+
+
+def test_failing_callback_does_not_stop_the_socket():
+    received = []
+
+    def callback(msg):
+        received.append(msg)
+        if msg.get('E') == 3:
+            raise RuntimeError('bad message')
+
+    async def test(url):
+        async with AsyncSocketManager(StubClient(), stream_url=url) as bm:
+            bm.start_trade_socket('BNBBTC', callback)
+            while len(received) < 10:
+                await asyncio.sleep(0.01)
+            return bm.get_stats()
+
+    stats = run_with_server(test)
+    assert [msg['E'] for msg in received[:10]] == list(range(10))
+    assert stats['bnbbtc@trade']['messages'] >= 10
+
+
+def test_stats_count_the_frame_bytes():
+    # not ascii, the frame is longer than the text
+    frame = json.dumps({'e': 'trade', 's': 'BNB€'}, ensure_ascii=False)
+
+    async def handler(ws):
+        for _ in range(3):
+            await ws.send(frame)
+        await ws.close()
+
+    async def test():
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            url = 'ws://127.0.0.1:%d/' % server.sockets[0].getsockname()[1]
+            async with AsyncSocketManager(StubClient(), stream_url=url) as bm:
+                bm.start_trade_socket('BNBBTC', lambda msg: None)
+                while bm.get_stats()['bnbbtc@trade']['messages'] < 3:
+                    await asyncio.sleep(0.01)
+                return bm.get_stats()['bnbbtc@trade']
+
+    stats = asyncio.run(asyncio.wait_for(test(), 10))
+    assert len(frame.encode()) == len(frame) + 2
+    assert stats['bytes'] == stats['messages'] * len(frame.encode())
+
+
+def test_stream_ends_after_giving_up():
+    # a port nothing listens on
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    async def test():
+        bm = AsyncSocketManager(StubClient(), stream_url='ws://127.0.0.1:%d/' % port)
+        bm.initial_delay = 0.01
+        bm.max_retries = 2
+        conn_key = bm.start_trade_socket('BNBBTC')
+        messages = [msg async for msg in bm.stream(conn_key)]
+        stats = bm.get_stats()
+        await bm.close()
+        return messages, stats
+
+    messages, stats = asyncio.run(asyncio.wait_for(test(), 10))
+    assert messages == [AsyncSocketManager._reconnect_error_payload]
+    assert stats == {}
+
+
+def test_user_socket_closes_the_old_key_first():
+    client = StubClient()
+
+    async def test(url):
+        async with AsyncSocketManager(client, stream_url=url) as bm:
+            await bm.start_user_socket(lambda msg: None)
+            await bm.start_user_socket(lambda msg: None)
+
+    run_with_server(test)
+    assert client.calls[:3] == [('get', False), ('close', 'listen-key'), ('get', False)]
+    assert client.calls[-1] == ('close', 'listen-key')
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import pytest
+
+from binance.client import Client
+from binance.exceptions import BinanceRequestException
+from binance.transport import CallableTransport, OfflineTransport
+
+
+def test_offline_client_builds_without_network():
+    client = Client('', '', transport=OfflineTransport())
+    with pytest.raises(BinanceRequestException):
+        client.ping()
+
+
+def test_transport_pings_when_asked():
+    calls = []
+
+    def handler(method, url, params):
+        calls.append((method, url))
+        return 200, {}
+
+    Client('', '', transport=CallableTransport(handler))
+    assert calls == []
+    Client('', '', transport=CallableTransport(handler), lazy=False)
+    assert calls == [('GET', Client.API_URL + '/v1/ping')]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import os
+
+import backtrader as bt
+import backtrader.feeds as btfeeds
+import pytest
+
+from backtesting import Strategy
+from backtesting.datacache import ArrayData, BinaryData, cache_path, clear_datasets, get_dataset
+from backtesting.optimizer import data_path
+
+ROWS = 600
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    # the first bars of a market_data file
+    path = str(tmp_path / '1h?09-01-2017?01-01-2018.txt')
+    with open(data_path('ETHBTC')) as source, open(path, 'w') as f:
+        for _ in range(ROWS + 1):
+            f.write(next(source))
+    yield path
+    clear_datasets()
+
+
+def csv_feed(path):
+    # the feed backtest.py used before the binary cache
+    return btfeeds.GenericCSVData(dataname=path, datetime=0, open=1, high=2, low=3, close=4, volume=5,
+                                  openinterest=-1, dtformat='%Y-%m-%d %H:%M:%S', timeframe=bt.TimeFrame.Ticks,
+                                  nullvalue=0.0)
+
+
+def run(data, runonce=True, preload=True):
+    cerebro = bt.Cerebro(runonce=runonce, preload=preload)
+    cerebro.addstrategy(Strategy.CrossStrategy, ma1_period=5, ma2_period=20)
+    cerebro.broker.setcash(1000000.0)
+    cerebro.adddata(data)
+    cerebro.addsizer(bt.sizers.PercentSizer, percents=99)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.run()
+    lines = {name: list(getattr(data.lines, name).array)
+             for name in ('datetime', 'open', 'high', 'low', 'close', 'volume', 'openinterest')}
+    return lines, cerebro.broker.getvalue()
+
+
+@pytest.mark.parametrize('runonce,preload', [(True, True), (False, True), (False, False)])
+def test_binary_feed_matches_csv(csv_path, runonce, preload):
+    expected_lines, expected_value = run(csv_feed(csv_path), runonce, preload)
+    lines, value = run(BinaryData(dataname=csv_path, timeframe=bt.TimeFrame.Ticks), runonce, preload)
+    assert len(lines['close']) == ROWS
+    assert lines == expected_lines
+    assert value == expected_value
+
+
+def test_array_feed_matches_csv(csv_path):
+    expected_lines, expected_value = run(csv_feed(csv_path))
+    lines, value = run(ArrayData(dataset=get_dataset(csv_path), timeframe=bt.TimeFrame.Ticks))
+    assert lines == expected_lines
+    assert value == expected_value
+
+
+def rewrite(path, transform, mtime):
+    with open(path) as f:
+        text = f.read()
+    with open(path, 'w') as f:
+        f.write(transform(text))
+    os.utime(path, (mtime, mtime))
+
+
+def test_get_dataset_follows_the_source(csv_path):
+    mtime = os.stat(csv_path).st_mtime
+    dataset = get_dataset(csv_path)
+    assert get_dataset(csv_path) is dataset
+    assert os.path.isdir(cache_path(csv_path))
+
+    # touched only, the hash is unchanged and the same dataset is kept
+    os.utime(csv_path, (mtime + 10, mtime + 10))
+    assert get_dataset(csv_path) is dataset
+
+    # same size, different content
+    close = '%.8f' % dataset.columns['close'][0]
+    rewrite(csv_path, lambda text: text.replace(close, close[:-1] + '9', 1), mtime + 20)
+    changed = get_dataset(csv_path)
+    assert changed is not dataset
+    assert changed.key != dataset.key
+    assert changed.columns['close'][0] == float(close[:-1] + '9')
+    assert changed.columns['close'][1] == dataset.columns['close'][1]
+
+    # a bar less
+    rewrite(csv_path, lambda text: text[:text.rindex('\n', 0, -1) + 1], mtime + 30)
+    shorter = get_dataset(csv_path)
+    assert len(shorter) == ROWS - 1
+    assert get_dataset(csv_path) is shorter
+
+    # a new process finds the cache up to date
+    clear_datasets()
+    assert len(get_dataset(csv_path)) == ROWS - 1
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from binance import depthcache
+from binance.depthcache import DepthCache, MultiDepthCacheManager, _DepthBook
+
+
+class ReferenceDepthCache(object):
+    """DepthCache as it was before the integer tick book, a dict sorted on every read"""
+
+    def __init__(self):
+        self._bids = {}
+        self._asks = {}
+
+    def add_bid(self, bid):
+        self._bids[bid[0]] = float(bid[1])
+        if bid[1] == '0.00000000':
+            del self._bids[bid[0]]
+
+    def add_ask(self, ask):
+        self._asks[ask[0]] = float(ask[1])
+        if ask[1] == '0.00000000':
+            del self._asks[ask[0]]
+
+    def get_bids(self):
+        return DepthCache.sort_depth(self._bids, reverse=True)
+
+    def get_asks(self):
+        return DepthCache.sort_depth(self._asks, reverse=False)
+
+
+def level(r, low, high):
+    price = '%.8f' % (r.randint(low, high) / 1e6)
+    # a third of the updates remove the level
+    quantity = '0.00000000' if r.random() < 0.33 else '%.8f' % (r.randint(1, 10 ** 6) / 1e3)
+    return [price, quantity]
+
+
+def test_book_matches_sorted_dict():
+    r = random.Random(0)
+    cache = DepthCache('BNBBTC')
+    reference = ReferenceDepthCache()
+    for step in range(3000):
+        bid = level(r, 1, 400)
+        ask = level(r, 401, 800)
+        cache.add_bid(bid)
+        reference.add_bid(bid)
+        cache.add_ask(ask)
+        reference.add_ask(ask)
+        if step % 50:
+            continue
+
+        bids, asks = reference.get_bids(), reference.get_asks()
+        assert cache.get_bids() == bids
+        assert cache.get_asks() == asks
+        assert cache.get_best_bid() == (bids[0] if bids else None)
+        assert cache.get_best_ask() == (asks[0] if asks else None)
+        for n in (0, 1, 5, 1000):
+            assert cache.get_top(n) == (bids[:n], asks[:n])
+            np.testing.assert_array_equal(cache.get_bids_array(n), np.array(bids[:n]).reshape(-1, 2))
+        np.testing.assert_array_equal(cache.get_asks_array(), np.array(asks).reshape(-1, 2))
+
+
+def test_zero_quantity_removes_the_level():
+    cache = DepthCache('BNBBTC')
+    cache.add_bid(['0.00019460', '45.00000000'])
+    cache.add_bid(['0.00019459', '2384.00000000'])
+    cache.add_bid(['0.0001946', '10.0'])
+    assert cache.get_bids() == [[0.0001946, 10.0], [0.00019459, 2384.0]]
+    # any spelling of zero, and removing a missing level is a no-op
+    cache.add_bid(['0.00019460', '0'])
+    cache.add_bid(['0.00019000', '0.00000000'])
+    assert cache.get_bids() == [[0.00019459, 2384.0]]
+    assert cache.get_best_ask() is None
+    assert cache.get_asks_array().shape == (0, 2)
+
+
+def test_price_finer_than_the_precision_is_refused():
+    cache = DepthCache('BNBBTC', precision=2)
+    cache.add_ask(['1.50', '1'])
+    cache.add_ask(['1.5000', '2'])
+    assert cache.get_asks() == [[1.5, 2.0]]
+    with pytest.raises(ValueError):
+        cache.add_ask(['1.505', '1'])
+
+
+class SnapshotClient(object):
+    """Client serving queued order book snapshots, each held until released"""
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.release = threading.Event()
+        self.release.set()
+        self.threads = []
+
+    def get_order_book(self, symbol, limit):
+        self.threads.append(threading.get_ident())
+        assert self.release.wait(5)
+        return self.snapshots.pop(0)
+
+
+def snapshot(last_update_id, bids=(), asks=()):
+    return {'lastUpdateId': last_update_id, 'bids': [list(level) for level in bids],
+            'asks': [list(level) for level in asks]}
+
+
+def diff(first, last, bids=(), asks=()):
+    return {'e': 'depthUpdate', 's': 'BNBBTC', 'U': first, 'u': last, 'b': [list(level) for level in bids],
+            'a': [list(level) for level in asks]}
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_buffered_events_overlapping_the_snapshot():
+    client = SnapshotClient(snapshot(100, bids=[('0.10', '1')], asks=[('0.20', '1')]))
+    book = _DepthBook(client, 'BNBBTC')
+    # arriving before the snapshot, the first ones it already contains
+    book.on_message(diff(90, 95, bids=[('0.09', '5')]))
+    book.on_message(diff(96, 100, bids=[('0.10', '7')]))
+    book.on_message(diff(98, 102, bids=[('0.11', '2')]))
+    book.on_message(diff(103, 104, asks=[('0.20', '0')]))
+    assert book.stats()['buffered'] == 4
+    book.init_cache()
+
+    assert book.depth_cache.get_bids() == [[0.11, 2.0], [0.1, 1.0]]
+    assert book.depth_cache.get_asks() == []
+    assert book.stats()['last_update_id'] == 104
+    assert book.stats()['buffered'] == 0
+    assert book.resyncs == 0
+
+
+def test_stale_events_are_dropped():
+    calls = []
+    book = _DepthBook(SnapshotClient(snapshot(100, bids=[('0.10', '1')])), 'BNBBTC', calls.append)
+    book.init_cache()
+    book.on_message(diff(101, 103, bids=[('0.10', '2')]))
+    book.on_message(diff(99, 102, bids=[('0.10', '9')]))
+    book.on_message(diff(103, 103, bids=[('0.10', '9')]))
+    assert book.depth_cache.get_bids() == [[0.1, 2.0]]
+    assert book.stats()['last_update_id'] == 103
+    assert len(calls) == 1
+    assert book.resyncs == 0
+
+
+def test_gap_resyncs_off_the_socket_thread():
+    calls = []
+    client = SnapshotClient(snapshot(100, bids=[('0.10', '1')]),
+                            snapshot(111, bids=[('0.10', '3'), ('0.12', '1')], asks=[('0.30', '1')]))
+    book = _DepthBook(client, 'BNBBTC', calls.append)
+    book.init_cache()
+    book.on_message(diff(101, 102, bids=[('0.11', '1')]))
+
+    client.release.clear()
+    # a missed event, the fetch is held so the book has to stay stale while the stream goes on
+    book.on_message(diff(110, 112, bids=[('0.12', '4')]))
+    book.on_message(diff(113, 113, asks=[('0.30', '0')]))
+    stats = book.stats()
+    assert book.stale and stats['stale']
+    assert stats['resyncs'] == 1 and stats['buffered'] == 2 and stats['last_update_id'] is None
+    # the cache keeps the last good state meanwhile
+    assert book.depth_cache.get_bids() == [[0.11, 1.0], [0.1, 1.0]]
+    assert len(calls) == 1
+    wait_for(lambda: len(client.threads) == 2)
+    assert client.threads[1] != threading.get_ident()
+
+    client.release.set()
+    wait_for(lambda: not book.stale)
+    stats = book.stats()
+    assert book.depth_cache.get_bids() == [[0.12, 4.0], [0.1, 3.0]]
+    assert book.depth_cache.get_asks() == []
+    assert stats['last_update_id'] == 113 and stats['buffered'] == 0
+    assert stats['resyncs'] == 1 and stats['refreshes'] == 0 and stats['resync_errors'] == 0
+    assert 0 < stats['last_resync_latency'] == stats['max_resync_latency'] == stats['resync_time']
+    assert len(calls) == 3
+
+
+def test_coalesced_deltas_and_resync_stats():
+    deltas = []
+    client = SnapshotClient(snapshot(100, bids=[('0.10', '1')], asks=[('0.20', '1')]),
+                            snapshot(120, bids=[('0.10', '5')], asks=[('0.20', '1')]))
+    executor = ThreadPoolExecutor(1)
+    book = _DepthBook(client, 'BNBBTC', deltas.append, executor=executor, coalesce_updates=3)
+    book.init_cache()
+    book.on_message(diff(101, 101, bids=[('0.11', '1')]))
+    assert deltas == []
+    book.on_message(diff(102, 102, bids=[('0.11', '2'), ('0.10', '0')], asks=[('0.19', '1')]))
+    delta, = deltas
+    # the snapshot and both diffs, the last quantity of each level
+    assert delta.snapshot and delta.updates == 3 and delta.update_id == 102
+    assert delta.bids == {0.11: 2.0, 0.1: 0.0} and delta.asks == {0.19: 1.0}
+    assert delta.best_bid == [0.11, 2.0] and delta.best_ask == [0.19, 1.0]
+    assert delta.depth_cache is book.depth_cache
+
+    book.on_message(diff(103, 103, bids=[('0.11', '3')]))
+    book.on_message(diff(105, 106, bids=[('0.11', '4')]))
+    wait_for(lambda: not book.stale and book.resyncs == 1)
+    executor.shutdown()
+    # the diff before the gap is replaced by the snapshot, the one after it is older than the snapshot
+    book.flush()
+    assert len(deltas) == 2
+    delta = deltas[1]
+    assert delta.snapshot and delta.updates == 2 and delta.update_id == 120
+    assert delta.bids == {} and delta.asks == {}
+    assert delta.best_bid == [0.1, 5.0]
+    book.flush()
+    assert len(deltas) == 2
+
+    stats = book.stats()
+    assert stats['resyncs'] == 1 and not stats['stale'] and stats['stale_for'] == 0.0
+    assert stats['last_update_id'] == 120
+    assert stats['last_resync_latency'] > 0
+    book.close()
+
+
+class FakeSocketManager(object):
+    """BinanceSocketManager holding the callback of the one multiplexed socket"""
+
+    instances = []
+
+    def __init__(self, client):
+        self.streams = None
+        self.callback = None
+        self.closed = False
+        FakeSocketManager.instances.append(self)
+
+    def start_multiplex_socket(self, streams, callback):
+        self.streams = streams
+        self.callback = callback
+        return 'multiplex'
+
+    def start(self):
+        # the first event of each stream, sent before the snapshots
+        self.callback({'stream': 'bnbbtc@depth', 'data': diff(99, 101, bids=[('0.10', '2')])})
+        self.callback({'stream': 'ethbtc@depth', 'data': diff(500, 501, asks=[('0.05', '3')])})
+
+    def close(self):
+        self.closed = True
+
+
+class SymbolClient(object):
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.requests = []
+
+    def get_order_book(self, symbol, limit):
+        self.requests.append((symbol, threading.get_ident()))
+        return self.snapshots[symbol]
+
+
+def test_multiplexed_events_are_routed_by_symbol(monkeypatch):
+    monkeypatch.setattr(depthcache, 'BinanceSocketManager', FakeSocketManager)
+    client = SymbolClient({'BNBBTC': snapshot(100, bids=[('0.10', '1')]),
+                           'ETHBTC': snapshot(500, asks=[('0.05', '1'), ('0.06', '1')])})
+    updates = []
+    manager = MultiDepthCacheManager(client, ['bnbbtc', 'ETHBTC'], callback=updates.append, workers=2)
+    socket = FakeSocketManager.instances[-1]
+    assert len(FakeSocketManager.instances) == 1
+    assert socket.streams == ['bnbbtc@depth', 'ethbtc@depth']
+    assert sorted(symbol for symbol, _ in client.requests) == ['BNBBTC', 'ETHBTC']
+    assert threading.get_ident() not in [thread for _, thread in client.requests]
+
+    bnb, eth = manager.get_depth_cache('BNBBTC'), manager.get_depth_cache('ethbtc')
+    assert bnb.symbol == 'BNBBTC' and eth.symbol == 'ETHBTC'
+    assert manager.get_depth_caches() == {'BNBBTC': bnb, 'ETHBTC': eth}
+    assert bnb.get_bids() == [[0.1, 2.0]] and bnb.get_asks() == []
+    assert eth.get_bids() == [] and eth.get_asks() == [[0.05, 3.0], [0.06, 1.0]]
+
+    socket.callback({'stream': 'ethbtc@depth', 'data': diff(502, 502, bids=[('0.04', '1')])})
+    socket.callback({'stream': 'bnbbtc@depth', 'data': diff(102, 102, asks=[('0.20', '1')])})
+    # a stream no book tracks
+    socket.callback({'stream': 'ltcbtc@depth', 'data': diff(1, 1, bids=[('0.01', '1')])})
+    assert eth.get_bids() == [[0.04, 1.0]] and bnb.get_bids() == [[0.1, 2.0]]
+    assert bnb.get_best_ask() == [0.2, 1.0]
+    # the snapshots are applied concurrently, in either order
+    assert sorted(updates[:2], key=id) == sorted([bnb, eth], key=id) and updates[2:] == [eth, bnb]
+    assert manager.get_stale_symbols() == []
+    stats = manager.get_stats()
+    assert stats['BNBBTC']['last_update_id'] == 102 and stats['ETHBTC']['last_update_id'] == 502
+
+    socket.callback({'e': 'error', 'm': 'closed'})
+    assert socket.closed and updates[-1] is None
+    assert manager.get_depth_caches() == {}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import threading
+import time
+
+import pytest
+
+from binance.dispatcher import BLOCK, COALESCE, DROP_OLDEST, Dispatcher
+
+
+class Consumer(object):
+    """Callback held on its first message until released, so the messages after it stay queued"""
+
+    def __init__(self):
+        self.received = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, msg):
+        self.received.append(msg)
+        self.started.set()
+        assert self.release.wait(5)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = Dispatcher(workers=1)
+    yield dispatcher
+    if not dispatcher.closed:
+        dispatcher.close()
+
+
+def blocked(dispatcher, **options):
+    # a stream whose consumer holds the first message
+    consumer = Consumer()
+    put = dispatcher.wrap(consumer, 'stream', **options)
+    put(0)
+    assert consumer.started.wait(5)
+    return consumer, put
+
+
+def test_drop_oldest(dispatcher):
+    consumer, put = blocked(dispatcher, maxsize=3, policy=DROP_OLDEST)
+    for i in range(1, 7):
+        put(i)
+    stats = dispatcher.stats()['stream']
+    assert stats['depth'] == 3 and stats['dropped'] == 3 and stats['max_depth'] == 3
+
+    consumer.release.set()
+    wait_for(lambda: dispatcher.stats()['stream']['delivered'] == 4)
+    assert consumer.received == [0, 4, 5, 6]
+    stats = dispatcher.stats()['stream']
+    assert stats['enqueued'] == 7 and stats['depth'] == 0 and stats['coalesced'] == 0
+
+
+def test_coalesce(dispatcher):
+    consumer = Consumer()
+    put = dispatcher.wrap(consumer, 'stream', maxsize=2, policy=COALESCE, key=lambda msg: msg[0])
+    put('A1')
+    assert consumer.started.wait(5)
+    for msg in ('B1', 'A2', 'B2', 'A3'):
+        put(msg)
+    stats = dispatcher.stats()['stream']
+    assert stats['depth'] == 2 and stats['coalesced'] == 2 and stats['dropped'] == 0
+    # a new key on a full queue drops the oldest key
+    put('C1')
+    assert dispatcher.stats()['stream']['dropped'] == 1
+
+    consumer.release.set()
+    wait_for(lambda: dispatcher.stats()['stream']['delivered'] == 3)
+    assert consumer.received == ['A1', 'A3', 'C1']
+
+
+def test_block_holds_the_socket_until_there_is_room(dispatcher):
+    consumer, put = blocked(dispatcher, maxsize=2, policy=BLOCK)
+    put(1)
+    put(2)
+    socket = threading.Thread(target=put, args=(3,))
+    socket.start()
+    socket.join(0.1)
+    assert socket.is_alive()
+    assert dispatcher.stats()['stream']['depth'] == 2
+
+    consumer.release.set()
+    socket.join(5)
+    assert not socket.is_alive()
+    wait_for(lambda: dispatcher.stats()['stream']['delivered'] == 4)
+    assert consumer.received == [0, 1, 2, 3]
+    stats = dispatcher.stats()['stream']
+    assert stats['dropped'] == 0 and stats['blocked_time'] >= 0.1
+
+
+def test_close_releases_a_blocked_socket_and_stops_the_workers(dispatcher):
+    consumer, put = blocked(dispatcher, maxsize=1, policy=BLOCK)
+    put(1)
+    socket = threading.Thread(target=put, args=(2,))
+    socket.start()
+    socket.join(0.1)
+    assert socket.is_alive()
+
+    # the workers are joined, close waits for the consumer to return
+    closing = threading.Thread(target=dispatcher.close)
+    closing.start()
+    socket.join(5)
+    assert not socket.is_alive()
+    assert closing.is_alive()
+
+    consumer.release.set()
+    closing.join(5)
+    assert not closing.is_alive()
+    assert not any(thread.is_alive() for thread in dispatcher._threads)
+    # what was queued before closing is still delivered
+    assert consumer.received == [0, 1, 2]
+
+
+def test_callback_errors_are_counted(dispatcher):
+    def callback(msg):
+        raise RuntimeError(msg)
+
+    put = dispatcher.wrap(callback)
+    put(1)
+    put(2)
+    name, = dispatcher.stats()
+    wait_for(lambda: dispatcher.stats()[name]['delivered'] == 2)
+    assert dispatcher.stats()[name]['errors'] == 2
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Dispatcher(workers=0, policy='drop_newest')
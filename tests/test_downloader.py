@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from binance import downloader
+from binance.downloader import MARKET_DATA_HEADER, KlineDownloader, format_kline, read_sync_state
+from binance.ratelimit import TokenBucket
+
+HOUR = 60 * 60 * 1000
+# the stand-in server has hourly klines from 2018-01-01 until 1200 hours later, LTCBTC listed 700 hours in
+FIRST = 1514764800000
+LAST = FIRST + 1199 * HOUR
+LISTED = {'ETHBTC': FIRST, 'LTCBTC': FIRST + 700 * HOUR}
+PRICES = {'ETHBTC': '0.05', 'LTCBTC': '0.01'}
+
+
+def kline(symbol, open_time):
+    price = PRICES[symbol]
+    return [open_time, price, price, price, price, '10.0', open_time + HOUR - 1, '15.0', 7, '5.0', '7.5', '0']
+
+
+class Server(object):
+    """Local stand-in of the klines endpoint, optionally answering some requests with an error status"""
+
+    def __init__(self):
+        self.requests = []
+        self.errors = []
+        self.lock = threading.Lock()
+        self.delay = None
+        # open times the exchange has no klines for, e.g during maintenance
+        self.missing = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                with server.lock:
+                    server.requests.append((url.path, query))
+                    error = server.errors.pop(0) if server.errors else None
+                if error is not None:
+                    self.reply(error[0], {'code': -1003, 'msg': 'Too many requests.'}, error[1])
+                    return
+                symbol = query['symbol']
+                start = max(int(query['startTime']), LISTED[symbol])
+                end = min(int(query['endTime']), LAST)
+                open_times = range(-(-start // HOUR) * HOUR, end + 1, HOUR)[:int(query['limit'])]
+                if server.delay:
+                    time.sleep(server.delay(symbol, start))
+                self.reply(200, [kline(symbol, t) for t in open_times if t not in server.missing],
+                           {'X-MBX-USED-WEIGHT-1M': '10'})
+
+            def reply(self, status, body, headers):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d/api' % self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.close()
+
+
+def test_fetch_keeps_the_symbol_and_page_order(server):
+    # the first pages of the range are answered last
+    server.delay = lambda symbol, start: max(LAST - start, 0) / HOUR / 20000
+    loader = KlineDownloader(api_url=server.url, workers=6, limiter=False)
+    try:
+        result = list(loader.fetch(['LTCBTC', 'ETHBTC'], '1h', '2018-01-01', '2018-02-20'))
+    finally:
+        loader.close()
+
+    assert [symbol for symbol, _ in result] == ['LTCBTC', 'ETHBTC']
+    ltc, eth = result[0][1], result[1][1]
+    assert [k[0] for k in eth] == list(range(FIRST, LAST + 1, HOUR))
+    assert [k[0] for k in ltc] == list(range(LISTED['LTCBTC'], LAST + 1, HOUR))
+    assert {k[1] for k in eth} == {'0.05'} and {k[1] for k in ltc} == {'0.01'}
+    # each symbol is cut in pages from its first kline, asked for first
+    pages = [query for path, query in server.requests if query['limit'] == '500']
+    assert sorted((query['symbol'], int(query['startTime'])) for query in pages) == [
+        ('ETHBTC', FIRST), ('ETHBTC', FIRST + 500 * HOUR), ('ETHBTC', FIRST + 1000 * HOUR),
+        ('LTCBTC', LISTED['LTCBTC']), ('LTCBTC', LISTED['LTCBTC'] + 500 * HOUR)]
+    assert all(path == '/api/v1/klines' for path, _ in server.requests)
+
+
+def test_download_writes_the_market_data_layout(server, tmp_path):
+    path = str(tmp_path / 'market_data' / '{symbol}' / '{interval}?{start}?{end}.txt')
+    written = []
+    paths = downloader.download_klines(['ETHBTC', 'LTCBTC'], '1h', '01-01-2018', '01-02-2018',
+                                       callback=lambda *args: written.append(args), api_url=server.url,
+                                       path=path, limiter=False)
+
+    expected = {symbol: str(tmp_path / 'market_data' / symbol / '1h?01-01-2018?01-02-2018.txt')
+                for symbol in ('ETHBTC', 'LTCBTC')}
+    assert paths == expected
+    assert written == [('ETHBTC', expected['ETHBTC'], 25), ('LTCBTC', expected['LTCBTC'], 0)]
+    with open(expected['ETHBTC']) as f:
+        lines = f.readlines()
+    assert lines[0] == MARKET_DATA_HEADER
+    assert lines[1] == '2018-01-01 00:00:00,0.05,0.05,0.05,0.05,10.0,1514768399999,15.0,7,5.0,7.5,0\n'
+    assert lines[1:] == [format_kline(kline('ETHBTC', FIRST + i * HOUR)) for i in range(25)]
+    with open(expected['LTCBTC']) as f:
+        assert f.read() == MARKET_DATA_HEADER
+    # written in place of the temporary file
+    assert [p.name for p in (tmp_path / 'market_data' / 'ETHBTC').iterdir()] == ['1h?01-01-2018?01-02-2018.txt']
+
+
+class Clock(object):
+    """Time of a TokenBucket, moved on by its sleeps instead of waiting"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_rate_limited_pages_hold_back_the_shared_limiter(server, monkeypatch):
+    clock = Clock()
+    limiter = TokenBucket(clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(downloader, 'weight_limiter', limiter)
+    server.errors = [(429, {'Retry-After': '3'}), (418, {'Retry-After': '120'}), (429, {})]
+    loader = KlineDownloader(api_url=server.url, workers=1)
+    assert loader.limiter is limiter
+    try:
+        (symbol, klines), = loader.fetch(['ETHBTC'], '1h', '2018-01-01', '2018-01-02')
+    finally:
+        loader.close()
+
+    assert len(klines) == 25
+    # the same request is sent until it goes through, waiting as the server asks or 2 ** attempt without a header
+    assert len(server.requests) == 5
+    assert server.requests[0] == server.requests[3]
+    assert clock.sleeps == [3.0, 120.0, 4.0]
+    stats = limiter.stats()
+    assert stats['blocks'] == 3 and stats['waits'] == 3 and stats['wait_time'] == 127.0
+    assert stats['used_weight'] == 10 and stats['acquired'] == 5
+
+
+def test_rate_limited_page_gives_up_after_the_retries(server, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(downloader, 'weight_limiter', TokenBucket(clock=clock, sleep=clock.sleep))
+    server.errors = [(418, {'Retry-After': '1'})] * 3
+    loader = KlineDownloader(api_url=server.url, workers=1, retries=2)
+    try:
+        with pytest.raises(downloader.BinanceAPIException) as error:
+            list(loader.fetch(['ETHBTC'], '1h', '2018-01-01', '2018-01-02'))
+    finally:
+        loader.close()
+    assert error.value.status_code == 418
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_limiter_can_be_disabled(server, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(downloader.time, 'sleep', sleeps.append)
+    server.errors = [(429, {'Retry-After': '0.5'})]
+    loader = KlineDownloader(api_url=server.url, workers=1, limiter=False)
+    assert loader.limiter is False
+    try:
+        (symbol, klines), = loader.fetch(['ETHBTC'], '1h', '2018-01-01', '2018-01-02')
+    finally:
+        loader.close()
+    assert len(klines) == 25
+    assert sleeps == [0.5]
+
+
+@pytest.fixture
+def sync(server, tmp_path):
+    # sync_klines against the stand-in server, returning the klines added and the requests sent
+    def sync(symbols, start, end):
+        del server.requests[:]
+        added = downloader.sync_klines(symbols, '1h', start, end, api_url=server.url, limiter=False,
+                                       path=str(tmp_path / '{symbol}' / '{interval}?{start}?{end}.txt'),
+                                       sync_path=str(tmp_path / '{symbol}' / '{interval}.txt'))
+        return added, [query for _, query in server.requests]
+    return sync
+
+
+def read_lines(path):
+    with open(path) as f:
+        return f.readlines()
+
+
+def expected_lines(symbol, first, last):
+    return [MARKET_DATA_HEADER] + [format_kline(kline(symbol, t)) for t in range(first, last + 1, HOUR)]
+
+
+def test_sync_resumes_from_the_downloaded_files(server, sync, tmp_path):
+    path = str(tmp_path / '{symbol}' / '{interval}?{start}?{end}.txt')
+    downloader.download_klines(['ETHBTC'], '1h', '01-01-2018', '01-02-2018', api_url=server.url, path=path,
+                               limiter=False)
+    downloader.download_klines(['ETHBTC'], '1h', '01-02-2018', '01-03-2018', api_url=server.url, path=path,
+                               limiter=False)
+
+    added, requests = sync(['ETHBTC'], '2018-01-01', '2018-01-05')
+    # the 49 klines of the two overlapping files are kept, only the ones after them are requested
+    assert added == {'ETHBTC': 48}
+    assert [int(query['startTime']) for query in requests] == [FIRST + 49 * HOUR]
+    sync_path = str(tmp_path / 'ETHBTC' / '1h.txt')
+    assert read_lines(sync_path) == expected_lines('ETHBTC', FIRST, FIRST + 96 * HOUR)
+
+    # up to date, nothing to ask
+    assert sync(['ETHBTC'], '2018-01-01', '2018-01-05') == ({'ETHBTC': 0}, [])
+
+    # carries on from the last stored kline
+    added, requests = sync(['ETHBTC'], '2018-01-01', '2018-01-06')
+    assert added == {'ETHBTC': 24}
+    assert [int(query['startTime']) for query in requests] == [FIRST + 97 * HOUR]
+    assert read_lines(sync_path) == expected_lines('ETHBTC', FIRST, FIRST + 120 * HOUR)
+
+
+def test_sync_trims_a_partial_last_line(sync, tmp_path):
+    sync(['ETHBTC'], '2018-01-01', '2018-01-02')
+    path = str(tmp_path / 'ETHBTC' / '1h.txt')
+    # an append cut short by a crash
+    with open(path, 'a') as f:
+        f.write(format_kline(kline('ETHBTC', FIRST + 25 * HOUR))[:30])
+
+    added, requests = sync(['ETHBTC'], '2018-01-01', '2018-01-03')
+    assert added == {'ETHBTC': 24}
+    assert [int(query['startTime']) for query in requests] == [FIRST + 25 * HOUR]
+    assert read_lines(path) == expected_lines('ETHBTC', FIRST, FIRST + 48 * HOUR)
+
+
+def test_sync_backfills_missing_klines(sync, tmp_path):
+    sync(['ETHBTC'], '2018-01-01', '2018-01-05')
+    path = str(tmp_path / 'ETHBTC' / '1h.txt')
+    lines = read_lines(path)
+    # klines lost inside the file and before its first one
+    with open(path, 'w') as f:
+        f.writelines(lines[:1] + lines[4:30] + lines[40:])
+
+    added, requests = sync(['ETHBTC'], '2018-01-01', '2018-01-05')
+    assert added == {'ETHBTC': 13}
+    assert sorted((int(query['startTime']), int(query['endTime'])) for query in requests) == [
+        (FIRST, FIRST + 2 * HOUR), (FIRST + 29 * HOUR, FIRST + 38 * HOUR)]
+    assert read_lines(path) == lines
+
+
+def test_sync_remembers_ranges_without_klines(server, sync, tmp_path):
+    # LTCBTC is listed 700 hours in and has no klines for 5 hours after it
+    maintenance = [LISTED['LTCBTC'] + 10 * HOUR, LISTED['LTCBTC'] + 14 * HOUR]
+    server.missing = set(range(maintenance[0], maintenance[1] + 1, HOUR))
+    end = '2018-02-01'
+    last = FIRST + 31 * 24 * HOUR
+    path = str(tmp_path / 'LTCBTC' / '1h.txt')
+
+    added, requests = sync(['LTCBTC'], '2018-01-01', end)
+    assert added == {'LTCBTC': (last - LISTED['LTCBTC']) // HOUR + 1 - 5}
+    assert read_sync_state(path) == [[FIRST, LISTED['LTCBTC'] - HOUR]]
+    missing = [format_kline(kline('LTCBTC', t)) for t in server.missing]
+    assert read_lines(path) == [line for line in expected_lines('LTCBTC', LISTED['LTCBTC'], last)
+                                if line not in missing]
+
+    # the gap is asked for once, found empty and recorded
+    added, requests = sync(['LTCBTC'], '2018-01-01', end)
+    assert added == {'LTCBTC': 0}
+    assert [(int(query['startTime']), int(query['endTime'])) for query in requests] == [tuple(maintenance)]
+    assert read_sync_state(path) == [[FIRST, LISTED['LTCBTC'] - HOUR], maintenance]
+
+    assert sync(['LTCBTC'], '2018-01-01', end) == ({'LTCBTC': 0}, [])
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from datetime import datetime, timedelta, timezone
+
+import dateparser
+import pytest
+
+from binance import helpers
+from binance.helpers import date_to_milliseconds
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    # count the dateparser calls, with fresh caches
+    monkeypatch.setattr(helpers, '_date_cache', {})
+    monkeypatch.setattr(helpers, '_relative_dates', set())
+    calls = []
+    parse = dateparser.parse
+
+    def counted(*args, **kwargs):
+        calls.append(args[0])
+        return parse(*args, **kwargs)
+
+    monkeypatch.setattr(dateparser, 'parse', counted)
+    return calls
+
+
+def test_absolute_dates_are_cached(parses):
+    expected = int(datetime(2018, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    assert date_to_milliseconds('January 01, 2018') == expected
+    assert len(parses) == 2
+    assert date_to_milliseconds('January 01, 2018') == expected
+    assert len(parses) == 2
+    # read without dateparser
+    assert date_to_milliseconds('2018-01-01') == expected
+    assert len(parses) == 2
+
+
+def test_relative_phrases_cost_one_parse_once_classified(parses):
+    first = date_to_milliseconds('1 day ago UTC')
+    assert len(parses) == 2
+    for count in range(3, 6):
+        ms = date_to_milliseconds('1 day ago UTC')
+        assert len(parses) == count
+    now = datetime.now(timezone.utc)
+    assert first <= ms
+    assert abs(ms - (now - timedelta(days=1)).timestamp() * 1000) < 60 * 1000
+
+
+def test_unparsable_dates_raise(parses):
+    with pytest.raises(ValueError):
+        date_to_milliseconds('not a date at all')
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from backtesting import Strategy
+from backtesting import optimizer
+
+COINS = ['ETHBTC', 'ADABTC']
+
+
+def test_param_grid_order():
+    grid = optimizer.param_grid(condition=lambda p: p['ma1'] < p['ma2'], ma1=[5, 9], ma2=[8, 11])
+    assert grid == [{'ma1': 5, 'ma2': 8}, {'ma1': 5, 'ma2': 11}, {'ma1': 9, 'ma2': 11}]
+
+
+def test_best_keeps_the_earliest_on_ties():
+    results = [({'a': 1}, 5.0), ({'a': 2}, 7.0), ({'a': 3}, 7.0), ({'a': 4}, 6.0)]
+    assert optimizer.best(results) == ({'a': 2}, 7.0)
+    assert optimizer.best([]) is None
+
+
+def test_optimize_matches_serial_runs():
+    grid = optimizer.param_grid(ma1_period=[5, 9], ma2_period=[20])
+    expected = [(params, sum(optimizer.run_backtest(Strategy.CrossStrategy, params, optimizer.data_path(coin))
+                             for coin in COINS))
+                for params in grid]
+    finished = []
+    results = optimizer.optimize(Strategy.CrossStrategy, grid, COINS, processes=2,
+                                 callback=lambda params, coin, value: finished.append(coin))
+    assert results == expected
+    assert sorted(finished) == sorted(COINS * len(grid))
+    assert optimizer.best(results) == max(expected, key=lambda result: result[1])
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import backtrader as bt
+import backtrader.indicators as btind
+import numpy as np
+import pytest
+
+from backtesting import Strategy
+from backtesting.datacache import BinaryData
+from backtesting.optimizer import data_path
+
+
+class ReferenceLaguerre(Strategy.Laguerre):
+    """Laguerre ranking ppoT and ppoB by scanning the window, as before the sorted windows"""
+
+    def next(self):
+        super(ReferenceLaguerre, self).next()
+        ppoT_list = self.lines.ppoT.get(size=self.params.lkbT).tolist()
+        if len(ppoT_list) == self.params.lkbT:
+            self.lines.pctRankT[0] = sum(self.lines.ppoT[0] >= i for i in ppoT_list) / len(ppoT_list) * 100
+
+        ppoB_list = self.lines.ppoB.get(size=self.params.lkbB).tolist()
+        if len(ppoB_list) == self.params.lkbB:
+            self.lines.pctRankB[0] = sum(self.lines.ppoB[0] >= i for i in ppoB_list) / len(ppoB_list) * -100
+
+
+class Probe(bt.Strategy):
+    params = (('build', None),)
+
+    def __init__(self):
+        self.indicator = self.p.build(self.data)
+
+
+def run_indicator(build, runonce, coin='ETHBTC'):
+    cerebro = bt.Cerebro(runonce=runonce)
+    cerebro.adddata(BinaryData(dataname=data_path(coin), timeframe=bt.TimeFrame.Ticks))
+    cerebro.addstrategy(Probe, build=build)
+    lines = cerebro.run()[0].indicator.lines
+    return {name: np.array(getattr(lines, name).array) for name in lines.getlinealiases()}
+
+
+SOURCES = {
+    'close': lambda data: data.close,
+    'rsi': lambda data: btind.RSI(data, period=14),
+    # whole numbers, so the windows hold many ties
+    'rounded': lambda data: btind.RSI(data, period=14) // 5,
+}
+
+
+@pytest.mark.parametrize('runonce', [True, False])
+@pytest.mark.parametrize('period', [2, 14, 50])
+@pytest.mark.parametrize('source', sorted(SOURCES))
+def test_percent_rank_matches_backtrader(source, period, runonce):
+    expected = run_indicator(lambda data: btind.PercentRank(SOURCES[source](data), period=period), runonce)
+    lines = run_indicator(lambda data: Strategy.PercentRank(SOURCES[source](data), period=period), runonce)
+    np.testing.assert_array_equal(lines['pctrank'], expected['pctrank'])
+
+
+@pytest.mark.parametrize('runonce', [True, False])
+@pytest.mark.parametrize('params', [{}, dict(lkbT=20, lkbB=50), dict(short_gamma=0.2, long_gamma=0.9, lkbT=5, lkbB=5)])
+def test_laguerre_matches_reference(params, runonce):
+    expected = run_indicator(lambda data: ReferenceLaguerre(data, **params), runonce)
+    lines = run_indicator(lambda data: Strategy.Laguerre(data, **params), runonce)
+    assert not np.isnan(lines['pctRankT']).all()
+    for name, line in expected.items():
+        np.testing.assert_array_equal(lines[name], line, err_msg=name)
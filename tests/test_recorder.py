@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+import os
+
+from binance.recorder import INDEX_FILE, StreamRecorder, read_index, read_records
+
+
+def messages(first, count):
+    # trade events of two symbols, every third one as a multiplexed event
+    for i in range(first, first + count):
+        symbol = 'bnbbtc' if i % 2 else 'ethbtc'
+        msg = {'e': 'trade', 'E': 1514764800000 + i, 's': symbol.upper(), 'p': '0.00100000', 'q': str(i)}
+        stream = symbol + '@trade'
+        if i % 3 == 0:
+            msg = {'stream': stream, 'data': msg}
+        yield stream, json.dumps(msg, separators=(',', ':')).encode(), msg
+
+
+def record(directory, first, count):
+    # a small block and segment size, so the records span several of each
+    recorder = StreamRecorder(directory, block_size=300, segment_size=1000, flush_interval=0.05)
+    expected = []
+    for stream, payload, msg in messages(first, count):
+        recorder.record(stream, payload, msg)
+        expected.append((stream, msg['data']['E'] if 'data' in msg else msg['E'], payload))
+    recorder.close()
+    return recorder.stats(), expected
+
+
+def replayed(directory, **kwargs):
+    return [(record.stream, record.event_time, record.payload) for record in read_records(directory, **kwargs)]
+
+
+def test_round_trip_across_segments_and_reopening(tmp_path):
+    directory = str(tmp_path / 'trades')
+    stats, expected = record(directory, 0, 200)
+    segments = sorted(name for name in os.listdir(directory) if name.endswith('.seg'))
+    assert stats['records'] == 200 and stats['pending_blocks'] == 0
+    assert stats['segments'] == len(segments) > 2
+    assert stats['blocks'] == len(read_index(directory)) > stats['segments']
+    assert replayed(directory) == expected
+
+    # an index entry cut short by a crash is dropped when recording again
+    with open(os.path.join(directory, INDEX_FILE), 'ab') as f:
+        f.write(b'\0' * 7)
+    assert replayed(directory) == expected
+
+    stats, more = record(directory, 200, 100)
+    assert stats['records'] == 100
+    assert len(os.listdir(directory)) > len(segments) + 1
+    records = list(read_records(directory))
+    assert [(record.stream, record.event_time, record.payload) for record in records] == expected + more
+    receive_times = [record.recv_time for record in records]
+    assert receive_times == sorted(receive_times)
+
+    # a time range and stream filter, read through the index
+    start, end = receive_times[150], receive_times[250]
+    assert replayed(directory, start=start, end=end, streams=['bnbbtc@trade']) == [
+        item for item, recv_time in zip(expected + more, receive_times)
+        if start <= recv_time <= end and item[0] == 'bnbbtc@trade']
+
+    decoded = list(read_records(directory, streams=['ethbtc@trade'], decode=True))
+    assert [record.payload for record in decoded] == [json.loads(item[2]) for item in expected + more
+                                                      if item[0] == 'ethbtc@trade']
+
+
+def test_wrap_records_and_passes_on(tmp_path):
+    directory = str(tmp_path / 'depth')
+    received = []
+    recorder = StreamRecorder(directory)
+    callback = recorder.wrap(received.append, 'bnbbtc@depth')
+    msg = {'e': 'depthUpdate', 'E': 1514764800000, 'U': 1, 'u': 2, 'b': [['0.1', '1']], 'a': []}
+    callback(msg)
+    recorder.close()
+    # closed, nothing more is recorded
+    recorder.record('bnbbtc@depth', b'{}')
+
+    assert received == [msg]
+    record, = read_records(directory, decode=True)
+    assert record.stream == 'bnbbtc@depth' and record.event_time == 1514764800000 and record.payload == msg
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from fractions import Fraction
+import math
+import random
+import statistics
+
+import backtrader as bt
+import numpy as np
+import pytest
+
+from backtesting.datacache import BinaryData
+from backtesting.optimizer import data_path
+from backtesting.rolling import RollingExtreme, RollingMoments, _sqrt_of_frac
+from backtesting.Strategy import Vix_Fix_Indicator
+
+
+def values(seed, count=2000):
+    r = random.Random(seed)
+    # mixed magnitudes and repeated values, as a wvf series has
+    return [r.choice([0.0, r.random(), r.random() * 100, r.uniform(-1e-6, 1e-6), float(r.randint(0, 3))])
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize('period', [2, 5, 20])
+def test_rolling_moments_match_fsum_and_stdev(period):
+    moments = RollingMoments(period)
+    series = values(period)
+    for i, value in enumerate(series):
+        moments.push(value)
+        window = series[max(0, i - period + 1):i + 1]
+        assert moments.sum() == math.fsum(window)
+        if len(window) > 1:
+            assert moments.stdev() == statistics.stdev(window)
+
+
+def test_sqrt_of_frac_is_correctly_rounded():
+    r = random.Random(0)
+    for _ in range(2000):
+        numerator = r.getrandbits(r.randint(1, 300))
+        denominator = r.getrandbits(r.randint(1, 200)) or 1
+        root = Fraction(_sqrt_of_frac(numerator, denominator))
+        # the exact root lies between the midpoints to the neighbouring floats
+        below = (root + Fraction(math.nextafter(root, 0))) / 2
+        above = (root + Fraction(math.nextafter(root, math.inf))) / 2
+        assert below * below <= Fraction(numerator, denominator) <= above * above
+
+
+@pytest.mark.parametrize('period', [1, 3, 50])
+@pytest.mark.parametrize('maximum', [True, False])
+def test_rolling_extreme_matches_max_and_min(period, maximum):
+    extreme = RollingExtreme(period, maximum)
+    series = values(period)
+    function = max if maximum else min
+    for i, value in enumerate(series):
+        assert extreme.push(value) == function(series[max(0, i - period + 1):i + 1])
+
+
+class ReferenceVixFix(bt.Indicator):
+    """Vix_Fix_Indicator as it was before the rolling windows, recomputing every window from the lines"""
+
+    params = (('pd', 22), ('bbl', 20), ('mult', 2), ('lb', 50), ('ph', 0.85), ('pl', 1.01))
+
+    lines = ('wvf', 'bbands_top', 'bbands_bot', 'range_high', 'range_low')
+
+    def next(self):
+        self.lines.wvf[0] = 0.0
+        self.lines.bbands_top[0] = 0.0
+        self.lines.bbands_bot[0] = 0.0
+
+        close_list = self.datas[0].close.get(size=self.params.pd).tolist()
+        if len(close_list) == self.params.pd:
+            max_close_list = max(close_list)
+            self.lines.wvf[0] = ((max_close_list - self.datas[0].low[0]) / max_close_list) * 100
+
+            sdev = self.params.mult * statistics.stdev(self.lines.wvf.get(size=self.params.bbl))
+            datasum = math.fsum(self.lines.wvf.get(size=self.params.bbl))
+            midline = datasum / self.params.bbl
+
+            self.lines.bbands_top[0] = midline + sdev
+            self.lines.bbands_bot[0] = midline - sdev
+
+            window = self.lines.wvf.get(size=self.params.lb).tolist()
+            if len(window) == self.params.lb:
+                self.lines.range_high[0] = max(window) * self.params.ph
+                self.lines.range_low[0] = min(window) * self.params.pl
+
+
+class Probe(bt.Strategy):
+    params = (('indicator', None), ('kwargs', {}))
+
+    def __init__(self):
+        self.indicator = self.p.indicator(self.data, **self.p.kwargs)
+
+
+def run_indicator(indicator, kwargs, runonce):
+    cerebro = bt.Cerebro(runonce=runonce)
+    cerebro.adddata(BinaryData(dataname=data_path('ETHBTC'), timeframe=bt.TimeFrame.Ticks))
+    cerebro.addstrategy(Probe, indicator=indicator, kwargs=kwargs)
+    lines = cerebro.run()[0].indicator.lines
+    return {name: np.array(getattr(lines, name).array) for name in lines.getlinealiases()}
+
+
+@pytest.mark.parametrize('runonce', [True, False])
+@pytest.mark.parametrize('kwargs', [{}, dict(pd=10, bbl=10, lb=5, mult=1.5), dict(pd=30, bbl=4, lb=80)])
+def test_vix_fix_matches_reference(kwargs, runonce):
+    expected = run_indicator(ReferenceVixFix, kwargs, runonce)
+    lines = run_indicator(Vix_Fix_Indicator, kwargs, runonce)
+    assert len(lines['wvf']) == 2922
+    for name, line in expected.items():
+        np.testing.assert_array_equal(lines[name], line, err_msg=name)
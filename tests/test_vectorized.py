@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import backtrader.indicators as btind
+import pytest
+
+from backtesting import Strategy
+from backtesting.optimizer import data_path, param_grid
+from backtesting.vectorized import conformance, run_batch_backtest, run_vectorized_backtest
+
+COINS = ['ETHBTC', 'ADABTC']
+
+# largest relative difference allowed between the backtrader and vectorized final values
+TOLERANCE = 1e-9
+
+CASES = [
+    (Strategy.CrossStrategy, dict(ma1_period=14, ma2_period=30)),
+    (Strategy.CrossStrategy, dict(ma1_period=5, ma2_period=20, ma1_type=btind.EMA, ma2_type=btind.WMA)),
+    (Strategy.AtrCrossStrategy, dict(ma1_period=10, ma2_period=25, atr=0.5, period=14)),
+    (Strategy.AtrCrossStrategy, dict(ma1_period=8, ma2_period=21, ma1_type=btind.SMMA, atr=1, period=7)),
+    (Strategy.AboveMA, dict(ma1_period=5)),
+    (Strategy.AboveMA, dict(ma1_period=20, ma1_type=btind.EMA)),
+    (Strategy.LimitCrossStrategy, dict(ma1_period=14, ma2_period=30, atr_mult=1)),
+    (Strategy.LimitCrossStrategy, dict(ma1_period=7, ma2_period=25, ma2_type=btind.EMA, atr_mult=2)),
+]
+
+
+@pytest.mark.parametrize('coin', COINS)
+@pytest.mark.parametrize('strategy,params', CASES)
+def test_conformance(strategy, params, coin):
+    expected, value, difference = conformance(strategy, params, data_path(coin))
+    assert difference <= TOLERANCE, (expected, value)
+
+
+@pytest.mark.parametrize('coin', COINS)
+@pytest.mark.parametrize('strategy,values', [
+    (Strategy.CrossStrategy, dict(ma1_period=[3, 5, 14], ma2_period=[20, 30], ma2_type=[btind.SMA, btind.EMA])),
+    (Strategy.AtrCrossStrategy, dict(ma1_period=[3, 14], ma2_period=[20, 30], atr=[0, 0.5, 2], period=[7, 14])),
+    (Strategy.AboveMA, dict(ma1_period=[3, 5, 14, 30], ma1_type=[btind.SMA, btind.WMA])),
+    (Strategy.LimitCrossStrategy, dict(ma1_period=[3, 5, 14], ma2_period=[20, 30], atr_mult=[0.5, 1, 3])),
+])
+def test_batch_matches_single_runs(strategy, values, coin):
+    grid = param_grid(**values)
+    dataname = data_path(coin)
+    assert run_batch_backtest(strategy, grid, dataname) == [run_vectorized_backtest(strategy, params, dataname)
+                                                             for params in grid]